@@ -0,0 +1,4 @@
+import os
+
+# benchmarks run headless
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
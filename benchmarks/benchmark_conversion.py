@@ -0,0 +1,97 @@
+"""Benchmarks of the conversion between layers and spreadsheets."""
+
+from napari_spreadsheet._conversion import (
+    layer_to_dataframe,
+    layer_to_spreadsheet,
+    spreadsheet_to_layer,
+)
+from napari_spreadsheet._dataframe import dataframe_to_layer_data
+
+from .utils import (
+    MAX_SHAPES,
+    SIZES,
+    make_points,
+    make_shapes,
+    make_table_viewer,
+    make_vectors,
+    peak_memory,
+)
+
+
+class _ConversionSuite:
+    params = [SIZES]
+    param_names = ["n_rows"]
+    # a fresh spreadsheet is made for every measurement
+    number = 1
+    repeat = (1, 5, 30.0)
+    timeout = 600
+
+    def make_layer(self, n: int):
+        raise NotImplementedError
+
+    def setup(self, n: int):
+        self.layer = self.make_layer(n)
+        self.table_viewer = make_table_viewer()
+        self.table = layer_to_spreadsheet(self.layer, self.table_viewer)
+
+    def teardown(self, n: int):
+        self.table_viewer.close()
+
+    def time_layer_to_dataframe(self, n: int):
+        layer_to_dataframe(self.layer)
+
+    def track_peakmem_layer_to_dataframe(self, n: int):
+        return peak_memory(layer_to_dataframe, self.layer)
+
+    def time_layer_to_spreadsheet(self, n: int):
+        layer_to_spreadsheet(self.layer, self.table_viewer)
+
+    def track_peakmem_layer_to_spreadsheet(self, n: int):
+        return peak_memory(layer_to_spreadsheet, self.layer, self.table_viewer)
+
+    def time_spreadsheet_to_layer(self, n: int):
+        spreadsheet_to_layer(self.layer, self.table)
+
+    def track_peakmem_spreadsheet_to_layer(self, n: int):
+        return peak_memory(spreadsheet_to_layer, self.layer, self.table)
+
+    track_peakmem_layer_to_dataframe.unit = "bytes"
+    track_peakmem_layer_to_spreadsheet.unit = "bytes"
+    track_peakmem_spreadsheet_to_layer.unit = "bytes"
+
+
+class PointsConversionSuite(_ConversionSuite):
+    def make_layer(self, n: int):
+        return make_points(n)
+
+
+class ShapesConversionSuite(_ConversionSuite):
+    def make_layer(self, n: int):
+        if n > MAX_SHAPES:
+            raise NotImplementedError
+        return make_shapes(n)
+
+
+class VectorsConversionSuite(_ConversionSuite):
+    def make_layer(self, n: int):
+        return make_vectors(n)
+
+
+class ChunkedPointsConversionSuite:
+    """Scaling of the headless conversion with the number of threads."""
+
+    params = [[1, 2, 4, 8]]
+    param_names = ["max_workers"]
+    timeout = 600
+
+    def setup(self, max_workers: int):
+        self.layer = make_points(4_000_000)
+        self.df = layer_to_dataframe(self.layer).astype(
+            {"face_color": object, "edge_color": object}
+        )
+
+    def time_layer_to_dataframe(self, max_workers: int):
+        layer_to_dataframe(self.layer, max_workers=max_workers)
+
+    def time_dataframe_to_layer_data(self, max_workers: int):
+        dataframe_to_layer_data(self.df, "points", max_workers=max_workers)
@@ -0,0 +1,153 @@
+"""Benchmarks of linked edits and selections of layers and spreadsheets."""
+
+import numpy as np
+
+from napari_spreadsheet._conversion import layer_to_spreadsheet
+from napari_spreadsheet._linker import get_linker
+
+from .utils import (
+    MAX_SHAPES,
+    SIZES,
+    make_points,
+    make_shapes,
+    make_table_viewer,
+    make_vectors,
+    peak_memory,
+)
+
+
+class _LinkerSuite:
+    params = [SIZES]
+    param_names = ["n_rows"]
+    # edits are applied to a freshly linked layer for every measurement
+    number = 1
+    repeat = (1, 5, 30.0)
+    timeout = 600
+
+    def make_layer(self, n: int):
+        raise NotImplementedError
+
+    def edit_layer(self):
+        """Edit a row of the layer."""
+        raise NotImplementedError
+
+    def setup(self, n: int):
+        self.layer = self.make_layer(n)
+        self.table_viewer = make_table_viewer()
+        self.table = layer_to_spreadsheet(self.layer, self.table_viewer)
+        self.linker = get_linker(self.layer, self.table)
+        self.row = n // 2
+        # values pasted to the first column of a tenth of the rows
+        self.block = slice(0, max(n // 10, 1))
+        column = self.table.data.iloc[:, 0]
+        self.value = column.iloc[1]
+        self.pasted = column.iloc[self.block].to_numpy()[::-1]
+
+    def teardown(self, n: int):
+        self.linker.unlink()
+        self.table_viewer.close()
+
+    def edit_cell(self):
+        self.table.cell[self.row, 0] = self.value
+
+    def paste_block(self):
+        self.table.cell[self.block, 0] = self.pasted
+
+    def time_edit_cell(self, n: int):
+        self.edit_cell()
+
+    def track_peakmem_edit_cell(self, n: int):
+        return peak_memory(self.edit_cell)
+
+    def time_paste_block(self, n: int):
+        self.paste_block()
+
+    def track_peakmem_paste_block(self, n: int):
+        return peak_memory(self.paste_block)
+
+    def time_edit_layer(self, n: int):
+        self.edit_layer()
+
+    def track_peakmem_edit_layer(self, n: int):
+        return peak_memory(self.edit_layer)
+
+    track_peakmem_edit_cell.unit = "bytes"
+    track_peakmem_paste_block.unit = "bytes"
+    track_peakmem_edit_layer.unit = "bytes"
+
+
+class _CoordinatesLinkerSuite(_LinkerSuite):
+    def setup(self, n: int):
+        super().setup(n)
+        # a copy of the layer data with one row moved
+        self.data = self.layer.data.copy()
+        self.data[self.row] += 1
+
+    def edit_layer(self):
+        self.layer.data = self.data
+
+
+class PointsLinkerSuite(_CoordinatesLinkerSuite):
+    def make_layer(self, n: int):
+        return make_points(n)
+
+
+class ShapesLinkerSuite(_LinkerSuite):
+    def make_layer(self, n: int):
+        if n > MAX_SHAPES:
+            raise NotImplementedError
+        return make_shapes(n)
+
+    def setup(self, n: int):
+        super().setup(n)
+        # face colors with one row changed
+        self.face_color = self.layer.face_color.copy()
+        self.face_color[self.row] = [1, 0, 0, 1]
+
+    def edit_layer(self):
+        self.layer.face_color = self.face_color
+
+
+class VectorsLinkerSuite(_CoordinatesLinkerSuite):
+    def make_layer(self, n: int):
+        return make_vectors(n)
+
+
+class SortedPointsLinkerSuite(PointsLinkerSuite):
+    """Linked edits of a points layer through a sorted view."""
+
+    def setup(self, n: int):
+        super().setup(n)
+        self.table.proxy.sort(self.table.columns[0], ascending=False)
+
+
+class PointsSelectionSuite:
+    """Mirroring the selection of a quarter of the points to the sheet."""
+
+    params = [SIZES, ["contiguous", "scattered"]]
+    param_names = ["n_rows", "selection"]
+    number = 1
+    repeat = (1, 5, 30.0)
+    timeout = 600
+
+    def setup(self, n: int, selection: str):
+        self.layer = make_points(n)
+        self.table_viewer = make_table_viewer()
+        self.table = layer_to_spreadsheet(self.layer, self.table_viewer)
+        self.linker = get_linker(self.layer, self.table)
+        if selection == "contiguous":
+            indices = range(n // 4)
+        else:
+            # a lasso over scattered points splits into many row blocks
+            rng = np.random.default_rng(0)
+            indices = rng.choice(n, size=n // 4, replace=False).tolist()
+        # napari's own selection update is not measured
+        with self.linker.blocked():
+            self.layer.selected_data = set(indices)
+
+    def teardown(self, n: int, selection: str):
+        self.linker.unlink()
+        self.table_viewer.close()
+
+    def time_select_rows(self, n: int, selection: str):
+        self.linker._on_highlight()
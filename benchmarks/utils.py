@@ -0,0 +1,79 @@
+"""Synthetic layers and widgets for benchmarks."""
+
+from __future__ import annotations
+
+import numpy as np
+from napari.layers import Points, Shapes, Vectors
+
+# number of rows of the benchmarked tables
+SIZES = [1_000, 100_000, 1_000_000]
+# Constructing a million Shape objects takes several minutes, larger shapes
+# layers are skipped.
+MAX_SHAPES = 100_000
+
+
+def make_points(n: int, ndim: int = 2, seed: int = 0) -> Points:
+    """Make a points layer with ``n`` points of random colors and sizes."""
+    rng = np.random.default_rng(seed)
+    return Points(
+        rng.uniform(0, 1000, size=(n, ndim)),
+        size=rng.uniform(1, 10, size=n),
+        face_color=rng.random((n, 4)),
+        features={"value": rng.random(n)},
+    )
+
+
+def make_shapes(n: int, ndim: int = 2, seed: int = 0) -> Shapes:
+    """Make a shapes layer with ``n`` rectangles of random colors."""
+    rng = np.random.default_rng(seed)
+    corner = rng.uniform(0, 1000, size=(n, 1, ndim))
+    size = rng.uniform(1, 10, size=(n, 1, ndim))
+    # (n, 2, ndim) array of the two corners of each rectangle
+    data = np.concatenate([corner, corner + size], axis=1)
+    return Shapes(
+        list(data),
+        shape_type="rectangle",
+        face_color=rng.random((n, 4)),
+        features={"value": rng.random(n)},
+    )
+
+
+def make_vectors(n: int, ndim: int = 2, seed: int = 0) -> Vectors:
+    """Make a vectors layer with ``n`` vectors of random colors."""
+    rng = np.random.default_rng(seed)
+    data = np.stack(
+        [
+            rng.uniform(0, 1000, size=(n, ndim)),
+            rng.uniform(-10, 10, size=(n, ndim)),
+        ],
+        axis=1,
+    )
+    return Vectors(
+        data,
+        edge_color=rng.random((n, 4)),
+        features={"value": rng.random(n)},
+    )
+
+
+def make_table_viewer():
+    """Make a hidden table viewer widget."""
+    from qtpy.QtWidgets import QApplication
+    from tabulous import TableViewerWidget
+
+    if QApplication.instance() is None:
+        # keep a reference so that the application is not deleted
+        make_table_viewer._app = QApplication([])
+    return TableViewerWidget(show=False)
+
+
+def peak_memory(func, *args, **kwargs) -> int:
+    """Return the peak memory (bytes) allocated while calling a function."""
+    import tracemalloc
+
+    tracemalloc.start()
+    try:
+        func(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
@@ -1,10 +1,54 @@
-from typing import Union
+from __future__ import annotations
 
-from ._widget import MainWidget
+from typing import TYPE_CHECKING, Any
 
-__all__ = ["MainWidget", "current_widget"]
+if TYPE_CHECKING:  # pragma: no cover
+    from ._dataframe import (
+        dataframe_to_layer_data,
+        layer_to_arrow,
+        layer_to_dataframe,
+    )
+    from ._stats import enable_stats, reset_stats, stats
+    from ._widget import MainWidget, TableViewerWidget
 
+__all__ = [
+    "MainWidget",
+    "current_widget",
+    "dataframe_to_layer_data",
+    "enable_stats",
+    "layer_to_arrow",
+    "layer_to_dataframe",
+    "reset_stats",
+    "stats",
+]
 
-def current_widget() -> Union[MainWidget, None]:
+# Qt, tabulous and napari are imported on first use, so that napari can import
+# the reader without loading them.
+_LAZY_ATTRIBUTES = {
+    "MainWidget": "._widget",
+    "dataframe_to_layer_data": "._dataframe",
+    "enable_stats": "._stats",
+    "layer_to_arrow": "._dataframe",
+    "layer_to_dataframe": "._dataframe",
+    "reset_stats": "._stats",
+    "stats": "._stats",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if (module := _LAZY_ATTRIBUTES.get(name)) is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+
+    return getattr(import_module(module, __name__), name)
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
+
+
+def current_widget() -> TableViewerWidget | None:
     """Return the current widget, if any."""
+    from ._widget import MainWidget
+
     return MainWidget._current_widget
@@ -0,0 +1,45 @@
+"""Chunked processing of rows on a thread pool."""
+
+from __future__ import annotations
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Sequence, TypeVar
+
+_T = TypeVar("_T")
+_R = TypeVar("_R")
+
+# Number of rows processed at once. Arrays of fewer rows are not split.
+DEFAULT_CHUNK_SIZE = 2**20
+
+
+def row_chunks(nrows: int, chunk_size: int | None = None) -> list[slice]:
+    """Split ``nrows`` rows into slices of ``chunk_size`` rows at most."""
+    if chunk_size is None:
+        chunk_size = DEFAULT_CHUNK_SIZE
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be positive, got {chunk_size}.")
+    return [
+        slice(start, min(start + chunk_size, nrows))
+        for start in range(0, max(nrows, 1), chunk_size)
+    ]
+
+
+def map_chunks(
+    func: Callable[[_T], _R],
+    chunks: Sequence[_T],
+    max_workers: int | None = None,
+) -> list[_R]:
+    """
+    Call ``func`` on each chunk and return the results in order.
+
+    Chunks are processed on a pool of ``max_workers`` threads (the number of
+    CPUs by default). ``func`` should spend most of its time in NumPy or
+    pandas functions that release the GIL.
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if len(chunks) < 2 or max_workers < 2:
+        return [func(chunk) for chunk in chunks]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as ex:
+        return list(ex.map(func, chunks))
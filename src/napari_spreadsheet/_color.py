@@ -0,0 +1,228 @@
+"""Vectorized conversion between RGBA arrays and HTML color strings."""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from itertools import islice
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from ._chunks import map_chunks, row_chunks
+from ._stats import count, timed
+
+# Maximum number of colors kept parsed in advance (the oldest ones are evicted
+# first), the number of colors parsed at once, and the number of other colors
+# cached on demand.
+_MAX_PRECOMPUTED = 2**20
+_PRECOMPUTE_CHUNK = 2**16
+_LRU_SIZE = 4096
+
+_HEX_CHARS = np.frombuffer(b"0123456789ABCDEF", dtype=np.uint8)
+
+# ASCII code -> nibble value (255 for non-hex characters)
+_NIBBLES = np.full(256, 255, dtype=np.uint8)
+for _i, _c in enumerate(b"0123456789abcdef"):
+    _NIBBLES[_c] = _i
+    _NIBBLES[ord(chr(_c).upper())] = _i
+del _i, _c
+
+
+def _to_uint8(rgba: np.ndarray) -> np.ndarray:
+    rgba = np.asarray(rgba, dtype=np.float32)
+    if rgba.ndim != 2 or rgba.shape[1] != 4:
+        raise ValueError(f"Expected a (N, 4) array, got shape {rgba.shape}.")
+    return np.round(np.clip(rgba, 0, 1) * 255).astype(np.uint8)
+
+
+def _uint8_to_hex(rgba8: np.ndarray) -> np.ndarray:
+    """Encode (N, 4) uint8 array into an array of "#RRGGBB[AA]" strings."""
+    n = rgba8.shape[0]
+    buf = np.empty((n, 9), dtype=np.uint8)
+    buf[:, 0] = ord("#")
+    buf[:, 1::2] = _HEX_CHARS[rgba8 >> 4]
+    buf[:, 2::2] = _HEX_CHARS[rgba8 & 0x0F]
+    # trailing null bytes are stripped by the "S" dtype
+    buf[rgba8[:, 3] == 255, 7:] = 0
+    return buf.view("S9").ravel().astype(str)
+
+
+@timed("rgba_to_hex")
+def rgba_to_hex(rgba: np.ndarray) -> np.ndarray:
+    """
+    Convert a (N, 4) float RGBA array into HTML color strings.
+
+    Colors are "#RRGGBB" if opaque and "#RRGGBBAA" otherwise. Channels are
+    rounded to the nearest 8-bit value, so the output may differ by one from
+    ``normalize_color(x * 255).html``, which truncates them.
+    """
+    return _uint8_to_hex(_to_uint8(rgba))
+
+
+def pack_rgba(rgba: np.ndarray) -> np.ndarray:
+    """Pack a (N, 4) float RGBA array into a (N,) uint32 array."""
+    rgba8 = np.ascontiguousarray(_to_uint8(rgba))
+    return rgba8.view(np.uint32).ravel()
+
+
+@timed("rgba_to_categorical")
+def rgba_to_categorical(
+    rgba: np.ndarray,
+    chunk_size: int | None = None,
+    max_workers: int | None = None,
+) -> pd.Categorical:
+    """
+    Convert a (N, 4) float RGBA array into a categorical of HTML colors.
+
+    Only the unique colors are encoded, so that layers with few distinct
+    colors are converted in (almost) constant time. Rows are factorized in
+    chunks of ``chunk_size`` on ``max_workers`` threads.
+    """
+    chunks = row_chunks(len(rgba), chunk_size)
+    results = map_chunks(
+        lambda sl: pd.factorize(pack_rgba(rgba[sl])), chunks, max_workers
+    )
+    if len(results) == 1:
+        # sort the unique colors without searching them
+        chunk_codes, unique = results[0]
+        order = np.argsort(unique)
+        rank = np.empty_like(order)
+        rank[order] = np.arange(order.size)
+        unique, codes = unique[order], rank[chunk_codes]
+    else:
+        unique, inverse = np.unique(
+            np.concatenate([u for _, u in results]), return_inverse=True
+        )
+        sizes = [u.size for _, u in results]
+        remaps = np.split(inverse.ravel(), np.cumsum(sizes)[:-1])
+        codes = np.empty(len(rgba), dtype=np.intp)
+
+        def _remap(args: tuple[slice, np.ndarray, np.ndarray]):
+            sl, chunk_codes, remap = args
+            codes[sl] = remap[chunk_codes]
+
+        args = [(sl, c, r) for sl, (c, _), r in zip(chunks, results, remaps)]
+        map_chunks(_remap, args, max_workers)
+    categories = _uint8_to_hex(unique.view(np.uint8).reshape(-1, 4))
+    return pd.Categorical.from_codes(codes, categories=categories)
+
+
+def _parse_hex(colors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Parse "#RRGGBB" and "#RRGGBBAA" strings, return (rgba8, is_valid)."""
+    n = colors.size
+    # code points of the strings, padded with zeros
+    colors = np.ascontiguousarray(colors)
+    chars = colors.view(np.uint32).reshape(n, colors.dtype.itemsize // 4)
+    lengths = np.count_nonzero(chars, axis=1)
+    head = chars[:, :9]
+    buf = np.zeros((n, 9), dtype=np.uint8)
+    # non-ASCII characters are never valid
+    buf[:, : head.shape[1]] = np.where(head < 128, head, 255)
+    nibbles = _NIBBLES[buf[:, 1:]]
+    # opaque if alpha is not given
+    nibbles[lengths == 7, 6:] = 15
+    valid = (buf[:, 0] == ord("#")) & ((lengths == 7) | (lengths == 9))
+    valid &= np.all(nibbles != 255, axis=1)
+    rgba8 = (nibbles[:, 0::2] << 4) | nibbles[:, 1::2]
+    return rgba8, valid
+
+
+@timed("hex_to_rgba")
+def hex_to_rgba(
+    colors: Iterable[str],
+    chunk_size: int | None = None,
+    max_workers: int | None = None,
+) -> np.ndarray:
+    """
+    Convert color strings into a (N, 4) float32 RGBA array.
+
+    Colors are factorized first so that each distinct string is parsed only
+    once. Hexadecimal strings are decoded with NumPy and any other format
+    (such as "red") falls back to ``tabulous.color.normalize_color``. Colors
+    are parsed and gathered in chunks of ``chunk_size`` on ``max_workers``
+    threads.
+    """
+    if not isinstance(colors, (pd.Series, pd.Categorical, np.ndarray)):
+        colors = np.asarray(colors, dtype=object)
+    # hashing strings holds the GIL, so it is not worth splitting
+    codes, unique = pd.factorize(colors)
+    if np.any(codes < 0):
+        raise ValueError("Color column must not contain missing values.")
+    unique = np.asarray(unique, dtype=str)
+    lut = np.empty((unique.size, 4), dtype=np.float32)
+
+    def _parse(sl: slice):
+        lut[sl] = _parse_colors(unique[sl]) / 255
+
+    map_chunks(_parse, row_chunks(unique.size, chunk_size), max_workers)
+    out = np.empty((codes.size, 4), dtype=np.float32)
+    map_chunks(
+        lambda sl: np.take(lut, codes[sl], axis=0, out=out[sl]),
+        row_chunks(codes.size, chunk_size),
+        max_workers,
+    )
+    return out
+
+
+def _parse_colors(colors: np.ndarray) -> np.ndarray:
+    """Parse distinct color strings into a (N, 4) uint8 array."""
+    rgba8, valid = _parse_hex(colors)
+    if not np.all(valid):
+        from tabulous.color import normalize_color
+
+        invalid = np.flatnonzero(~valid)
+        count("normalize_color", invalid.size)
+        for i in invalid:
+            rgba8[i] = normalize_color(colors[i])
+    return rgba8
+
+
+class ColorLookup:
+    """
+    Map color strings to 8-bit RGBA tuples, used as a background colormap.
+
+    Distinct colors of a column are parsed in advance, in chunks. Any other
+    string, such as a color typed by users, is parsed on its first lookup and
+    kept in a LRU cache, so that repainting cells never parses colors again.
+    At most ``_MAX_PRECOMPUTED`` colors are kept, evicting the oldest ones.
+    """
+
+    def __init__(self, colors: Iterable[str] = (), opacity: float = 1.0):
+        self._alpha = int(opacity * 255)
+        # color -> 0xRRGGBB, as ints are much cheaper to create than tuples
+        self._colors: dict[str, int] = {}
+        self._parse_one = lru_cache(maxsize=_LRU_SIZE)(self._parse_one)
+        self.update(colors)
+
+    def update(self, colors: Iterable[str]):
+        """Parse the given colors in advance."""
+        unique = pd.unique(np.asarray(colors, dtype=object))
+        unique = unique[unique != ""][:_MAX_PRECOMPUTED]
+        if unique.size == 0:
+            return None
+        for sl in row_chunks(unique.size, _PRECOMPUTE_CHUNK):
+            chunk = unique[sl]
+            try:
+                rgba8 = _parse_colors(chunk.astype(str))
+            except ValueError:
+                # invalid colors are reported when the cells are painted
+                continue
+            rgb = rgba8[:, :3].astype(np.uint32)
+            packed = rgb[:, 0] << 16 | rgb[:, 1] << 8 | rgb[:, 2]
+            self._colors.update(zip(chunk.tolist(), packed.tolist()))
+        if (excess := len(self._colors) - _MAX_PRECOMPUTED) > 0:
+            for color in list(islice(self._colors, excess)):
+                del self._colors[color]
+        return None
+
+    def _parse_one(self, color: str) -> tuple[int, int, int, int]:
+        rgba8 = _parse_colors(np.array([color], dtype=str))[0]
+        return (*rgba8[:3].tolist(), self._alpha)
+
+    def __call__(self, color: str) -> tuple[int, int, int, int] | None:
+        if (rgb := self._colors.get(color)) is not None:
+            return (rgb >> 16, rgb >> 8 & 0xFF, rgb & 0xFF, self._alpha)
+        if color == "":
+            return None
+        return self._parse_one(color)
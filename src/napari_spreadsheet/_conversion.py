@@ -2,22 +2,42 @@
 
 from __future__ import annotations
 
-from typing import Sequence
-from functools import singledispatch
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Sequence
+from functools import partial, singledispatch
+import numpy as np
 import pandas as pd
 import napari
-from napari.layers import Points, Shapes, Vectors, Layer
+from napari.layers import (
+    Labels,
+    Points,
+    Shapes,
+    Surface,
+    Tracks,
+    Vectors,
+    Layer,
+)
 from tabulous import TableViewerWidget
-from tabulous.color import normalize_color
+from tabulous.types import ItemInfo
 from tabulous.widgets import SpreadSheet
 
-
-@singledispatch
-def layer_to_dataframe(layer: Layer, axis_labels) -> pd.DataFrame:
-    """Convert layer state to a pandas DataFrame."""
-    raise NotImplementedError
+from ._color import ColorLookup, hex_to_rgba, pack_rgba
+from ._dataframe import (
+    COLOR_COLUMNS,
+    LAYER_STATE,
+    layer_to_dataframe,
+    parse_state_columns,
+    shapes_to_vertex_dataframe,
+    vertex_dataframe_to_shapes_data,
+)
+from ._features import _as_slice
+from ._napari_compat import set_shapes_colors
+from ._stats import timed, timer
+from ._tabulous_compat import raw_data, source_shape
 
 
+@timed("layer_to_spreadsheet")
 @singledispatch
 def layer_to_spreadsheet(
     layer: Layer, table_viewer: TableViewerWidget
@@ -26,93 +46,129 @@ def layer_to_spreadsheet(
     raise NotImplementedError
 
 
+@timed("spreadsheet_to_layer")
 @singledispatch
 def spreadsheet_to_layer(
     layer: Layer,
     spreadsheet: SpreadSheet,
+    columns: Iterable[str] | None = None,
 ):
-    """Convert a tabulous SpreadSheet widget to a napari layer."""
+    """
+    Convert a tabulous SpreadSheet widget to a napari layer.
+
+    If ``columns`` is given, only the layer properties that correspond to
+    these columns are considered. In any case, a property is assigned to the
+    layer only if its value differs from the current one.
+    """
     raise NotImplementedError
 
 
-@layer_to_dataframe.register
-def points_to_dataframe(
-    layer: Points,
-    axis_labels: Sequence[str] = None,
-) -> pd.DataFrame:
-    data = layer.data
-    if axis_labels is None:
-        viewer = napari.current_viewer()
-        axis_labels = [
-            f"data_{a}"
-            for a in viewer.dims.axis_labels[-layer.ndim :]  # noqa: E203
-        ]
-    dict_ = {}
-    for i, axis_label in enumerate(axis_labels):
-        dict_[axis_label] = data[:, i]
-    dict_["face_color"] = [
-        normalize_color(x * 255).html for x in layer.face_color
-    ]
-    dict_["edge_color"] = [
-        normalize_color(x * 255).html for x in layer.edge_color
-    ]
-    dict_["edge_width"] = layer.edge_width
-    dict_["size"] = layer.size[:, 0]
-    return pd.DataFrame(dict_)
+@timed("update_layer_rows")
+@singledispatch
+def update_layer_rows(
+    layer: Layer,
+    spreadsheet: SpreadSheet,
+    rows: slice,
+    columns: slice,
+):
+    """Update the given rows and columns of a napari layer in-place."""
+    raise NotImplementedError
 
 
-@layer_to_dataframe.register
-def shapes_to_dataframe(
-    layer: Shapes,
-    axis_labels: Sequence[str] = None,
-) -> pd.DataFrame:
-    dict_ = {}
-    dict_["face_color"] = [
-        normalize_color(x * 255).html for x in layer.face_color
-    ]
-    dict_["edge_color"] = [
-        normalize_color(x * 255).html for x in layer.edge_color
-    ]
-    dict_["edge_width"] = layer.edge_width
-    return pd.DataFrame(dict_)
+def _viewer_axis_labels() -> tuple[str, ...] | None:
+    """Axis labels of the current viewer, if any."""
+    viewer = napari.current_viewer()
+    if viewer is None:
+        return None
+    return viewer.dims.axis_labels
 
 
-@layer_to_dataframe.register
-def vectors_to_dataframe(
-    layer: Vectors,
-    axis_labels: Sequence[str] = None,
+def layer_to_sheet_data(layer: Layer) -> pd.DataFrame:
+    """Convert layer state to a DataFrame that can be set to a spreadsheet."""
+    df = layer_to_dataframe(layer, _viewer_axis_labels())
+    # A dtyped spreadsheet keeps the categorical dtype, which converts any
+    # color not in the categories into NaN. Color columns must be strings.
+    return df.astype({c: object for c in df.columns if c in COLOR_COLUMNS})
+
+
+@timed("layers_to_sheet_data")
+def layers_to_sheet_data(
+    layers: Sequence[Layer], max_workers: int | None = None
+) -> list[pd.DataFrame]:
+    """
+    Convert the states of many layers to spreadsheet data concurrently.
+
+    Conversions run on a thread pool of ``max_workers`` threads. Most of the
+    work is done by NumPy and pandas, which release the GIL.
+    """
+    if len(layers) < 2:
+        return [layer_to_sheet_data(layer) for layer in layers]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(layer_to_sheet_data, layers))
+
+
+def concat_sheet_data(
+    layers: Sequence[Layer], dfs: Sequence[pd.DataFrame]
 ) -> pd.DataFrame:
-    data = layer.data
-    if axis_labels is None:
-        viewer = napari.current_viewer()
-        axis_labels = [
-            f"data_{a}"
-            for a in viewer.dims.axis_labels[-layer.ndim :]  # noqa: E203
-        ]
-    vec_labels = [f"{a}_vec" for a in axis_labels]
-    dict_ = {}
-    for i, axis_label in enumerate(axis_labels):
-        dict_[axis_label] = data[:, 0, i]
-    for i, vec_label in enumerate(vec_labels):
-        dict_[vec_label] = data[:, 1, i]
-    dict_["edge_color"] = [
-        normalize_color(x * 255).html for x in layer.edge_color
-    ]
-    return pd.DataFrame(dict_)
+    """
+    Concatenate spreadsheet data of layers into one DataFrame.
 
+    The first column "layer" is the name of the layer of each row. Columns
+    that a layer does not have are filled with NaN.
+    """
+    df = pd.concat(dfs, ignore_index=True)
+    names = np.repeat(
+        np.array([layer.name for layer in layers], dtype=object),
+        [len(each) for each in dfs],
+    )
+    df.insert(0, "layer", names)
+    return df
 
-def _parse_color(x: str):
-    if x == "":
-        return None
-    return normalize_color(x)
+
+def sheet_data_to_spreadsheet(
+    df: pd.DataFrame, table_viewer: TableViewerWidget, name: str
+) -> SpreadSheet:
+    """Add spreadsheet data of layers to a table viewer."""
+    table = table_viewer.add_spreadsheet(df, name=name, dtyped=True)
+    _set_background_color(table, [n for n in COLOR_COLUMNS if n in df.columns])
+    table.undo_manager.clear()
+    return table
 
 
 def _set_background_color(
-    table: SpreadSheet, name: Sequence[str] = ("face_color", "edge_color")
+    table: SpreadSheet, name: Sequence[str] = COLOR_COLUMNS
 ):
+    data_raw = raw_data(table)
     for n in name:
-        table[n].background_color.set(_parse_color)
-        table[n].background_color.set_opacity(0.5)
+        lookup = ColorLookup(data_raw[n], opacity=0.5)
+        table.background_color.set(n, lookup, infer_parser=False)
+    if name:
+        # a weak reference, so that the table is not kept alive by itself
+        table.events.data.connect(
+            partial(_on_color_edited, weakref.ref(table))
+        )
+
+
+def update_color_lookups(
+    table: SpreadSheet, rows: slice, names: Iterable[str]
+):
+    """Parse the colors of edited cells into the background colormaps."""
+    data_raw = raw_data(table)
+    for name in names:
+        lookup = table.background_color.get(name)
+        if isinstance(lookup, ColorLookup):
+            lookup.update(data_raw[name].iloc[rows])
+
+
+def _on_color_edited(table_ref: weakref.ref[SpreadSheet], info: ItemInfo):
+    if (table := table_ref()) is None or info.value is ItemInfo.DELETED:
+        return None
+    nrows, ncols = source_shape(table)
+    columns = raw_data(table).columns[_as_slice(info.column, ncols)]
+    names = [c for c in columns if c in COLOR_COLUMNS]
+    if names:
+        update_color_lookups(table, _as_slice(info.row, nrows), names)
+    return None
 
 
 @layer_to_spreadsheet.register
@@ -121,11 +177,8 @@ def points_to_spreadsheet(
     table_viewer: TableViewerWidget,
 ):
     """Convert a points layer to a tabulous table."""
-    df = layer_to_dataframe(layer)
-    table = table_viewer.add_spreadsheet(df, name=layer.name, dtyped=True)
-    _set_background_color(table)
-    table.undo_manager.clear()
-    return table
+    df = layer_to_sheet_data(layer)
+    return sheet_data_to_spreadsheet(df, table_viewer, layer.name)
 
 
 @layer_to_spreadsheet.register
@@ -134,11 +187,8 @@ def shapes_to_spreadsheet(
     table_viewer: TableViewerWidget,
 ):
     """Convert a shapes layer to a tabulous table."""
-    df = layer_to_dataframe(layer)
-    table = table_viewer.add_spreadsheet(df, name=layer.name, dtyped=True)
-    _set_background_color(table)
-    table.undo_manager.clear()
-    return table
+    df = layer_to_sheet_data(layer)
+    return sheet_data_to_spreadsheet(df, table_viewer, layer.name)
 
 
 @layer_to_spreadsheet.register
@@ -147,42 +197,320 @@ def vectors_to_spreadsheet(
     table_viewer: TableViewerWidget,
 ):
     """Convert a vector layer to a tabulous table."""
-    df = layer_to_dataframe(layer)
-    table = table_viewer.add_spreadsheet(df, name=layer.name, dtyped=True)
-    _set_background_color(table, name=("edge_color",))
+    df = layer_to_sheet_data(layer)
+    return sheet_data_to_spreadsheet(df, table_viewer, layer.name)
+
+
+@layer_to_spreadsheet.register(Tracks)
+@layer_to_spreadsheet.register(Labels)
+@layer_to_spreadsheet.register(Surface)
+def data_to_spreadsheet(
+    layer: Tracks | Labels | Surface,
+    table_viewer: TableViewerWidget,
+):
+    """Convert a tracks, labels or surface layer to a tabulous table."""
+    df = layer_to_sheet_data(layer)
+    return sheet_data_to_spreadsheet(df, table_viewer, layer.name)
+
+
+def shapes_vertices_to_spreadsheet(
+    layer: Shapes,
+    table_viewer: TableViewerWidget,
+) -> SpreadSheet:
+    """Convert shapes to a tabulous table with one row per vertex."""
+    df = shapes_to_vertex_dataframe(layer, _viewer_axis_labels())
+    # shape types other than the existing ones must be acceptable
+    df = df.astype({"shape_type": object})
+    table = table_viewer.add_spreadsheet(
+        df, name=f"{layer.name} (vertices)", copy=False, dtyped=True
+    )
     table.undo_manager.clear()
     return table
 
 
+def spreadsheet_to_shapes_vertices(layer: Shapes, table: SpreadSheet):
+    """Update shapes using a vertex table."""
+    layer.data = vertex_dataframe_to_shapes_data(table.data)
+
+
+def _dirty_columns(
+    df: pd.DataFrame, nrows: int, columns: Iterable[str] | None
+) -> set[str]:
+    if columns is None or df.shape[0] != nrows:
+        return set(df.columns)
+    return set(columns)
+
+
+def _colors_changed(colors: np.ndarray, current: np.ndarray) -> bool:
+    if colors.shape != current.shape:
+        return True
+    return not np.array_equal(pack_rgba(colors), pack_rgba(current))
+
+
+def _values_changed(values: np.ndarray, current: np.ndarray) -> bool:
+    return values.shape != current.shape or not np.array_equal(values, current)
+
+
+def _coordinate_buffer(data: np.ndarray, dtype) -> np.ndarray:
+    """
+    Return the coordinate array to be updated in-place.
+
+    The array itself is returned unless it has to be upcast to ``dtype``, so
+    that updating coordinates does not allocate a new (N, D) array.
+    """
+    if np.can_cast(dtype, data.dtype, "same_kind") and data.flags.c_contiguous:
+        return data
+    return data.astype(np.result_type(data.dtype, dtype))
+
+
+def _set_coordinates(layer: Layer, values: list[np.ndarray]):
+    """Set coordinate columns to the layer data, reusing its buffer."""
+    nrows = values[0].shape[0]
+    if len(layer.data) != nrows:
+        data = np.stack(values, axis=1)
+        layer.data = data.reshape(nrows, *layer.data.shape[1:])
+        return None
+    data = _coordinate_buffer(layer.data, np.result_type(*values))
+    flat = data.reshape(nrows, -1)  # a view of the C-contiguous data
+    changed = data is not layer.data
+    for i, value in enumerate(values):
+        if not np.array_equal(flat[:, i], value):
+            flat[:, i] = value
+            changed = True
+    if changed:
+        layer.data = data  # napari does not copy the data
+    return None
+
+
+def _set_state(layer: Layer, kwargs: dict[str, np.ndarray]):
+    """Set parsed state columns to the layer if they differ."""
+    for name, value in kwargs.items():
+        current = getattr(layer, name)
+        if name in COLOR_COLUMNS:
+            changed = _colors_changed(value, current)
+        elif name == "size":
+            changed = _values_changed(value, current[:, 0])
+        else:
+            changed = _values_changed(value, current)
+        if changed:
+            setattr(layer, name, value)
+    return None
+
+
 @spreadsheet_to_layer.register
 def spreadsheet_to_points(
     layer: Points,
     table: SpreadSheet,
+    columns: Iterable[str] | None = None,
 ):
     df = table.data
+    dirty = _dirty_columns(df, len(layer.data), columns)
     cols = df.columns[: layer.ndim]
-    layer.data = df[cols].to_numpy()
-    layer.face_color = df["face_color"].to_list()
-    layer.edge_color = df["edge_color"].to_list()
-    layer.size = df["size"].to_numpy()
+    if not dirty.isdisjoint(cols):
+        _set_coordinates(layer, [df[c].to_numpy() for c in cols])
+    _set_state(layer, parse_state_columns(df, LAYER_STATE["points"], dirty))
 
 
 @spreadsheet_to_layer.register
 def spreadsheet_to_shapes(
     layer: Shapes,
     table: SpreadSheet,
+    columns: Iterable[str] | None = None,
 ):
     df = table.data
-    layer.face_color = df["face_color"].to_list()
-    layer.edge_color = df["edge_color"].to_list()
+    dirty = _dirty_columns(df, layer.nshapes, columns)
+    _set_state(layer, parse_state_columns(df, COLOR_COLUMNS, dirty))
 
 
 @spreadsheet_to_layer.register
 def spreadsheet_to_vectors(
     layer: Vectors,
     table: SpreadSheet,
+    columns: Iterable[str] | None = None,
 ):
     df = table.data
+    dirty = _dirty_columns(df, len(layer.data), columns)
     cols = df.columns[: layer.ndim * 2]
-    layer.data = df[cols].to_numpy().reshape(-1, 2, layer.ndim)
-    layer.edge_color = df["edge_color"].to_list()
+    if not dirty.isdisjoint(cols):
+        _set_coordinates(layer, [df[c].to_numpy() for c in cols])
+    _set_state(layer, parse_state_columns(df, LAYER_STATE["vectors"], dirty))
+
+
+@spreadsheet_to_layer.register
+def spreadsheet_to_tracks(
+    layer: Tracks,
+    table: SpreadSheet,
+    columns: Iterable[str] | None = None,
+):
+    df = table.data
+    dirty = _dirty_columns(df, len(layer.data), columns)
+    cols = df.columns[: layer.ndim + 1]
+    if not dirty.isdisjoint(cols):
+        data = df[cols].to_numpy()
+        if _values_changed(data, layer.data):
+            layer.data = data
+
+
+@spreadsheet_to_layer.register
+def spreadsheet_to_surface(
+    layer: Surface,
+    table: SpreadSheet,
+    columns: Iterable[str] | None = None,
+):
+    df = table.data
+    dirty = _dirty_columns(df, len(layer.vertices), columns)
+    if dirty.isdisjoint(df.columns):
+        return None
+    ndim = layer.vertices.shape[1]
+    vertices = df.iloc[:, :ndim].to_numpy()
+    values = df.iloc[:, ndim:].to_numpy().T
+    values = values.reshape(*layer.vertex_values.shape[:-1], -1)
+    if _values_changed(vertices, layer.vertices) or _values_changed(
+        values, layer.vertex_values
+    ):
+        layer.data = (vertices, layer.faces, values)
+    return None
+
+
+def _get_sub_frame(table: SpreadSheet, rows: slice, columns: slice):
+    """
+    Return the given range of the spreadsheet as a string DataFrame.
+
+    Rows are those of the table data, not of the sorted or filtered view.
+    """
+    return raw_data(table).iloc[rows, columns]
+
+
+def _to_numeric(df: pd.Series | pd.DataFrame) -> np.ndarray:
+    """Parse string cells into an int64 or float64 array."""
+    if isinstance(df, pd.DataFrame):
+        columns = [_to_numeric(df[c]) for c in df.columns]
+        return np.stack(columns, axis=1)
+    # object array avoids the nullable dtypes of the "string" extension
+    return pd.to_numeric(df.to_numpy(dtype=object))
+
+
+@update_layer_rows.register
+def update_points_rows(
+    layer: Points,
+    table: SpreadSheet,
+    rows: slice,
+    columns: slice,
+):
+    df = _get_sub_frame(table, rows, columns)
+    axes = [
+        i for i, c in enumerate(table.columns[: layer.ndim]) if c in df.columns
+    ]
+    if axes:
+        cols = [table.columns[i] for i in axes]
+        values = _to_numeric(df[cols])
+        data = _coordinate_buffer(layer.data, values.dtype)
+        data[rows, axes] = values
+        # napari does not copy the data, and the setter updates the extent
+        layer.data = data
+    if "face_color" in df.columns:
+        layer.face_color[rows] = hex_to_rgba(df["face_color"])
+        layer.events.face_color()
+    if "edge_color" in df.columns:
+        layer.edge_color[rows] = hex_to_rgba(df["edge_color"])
+        layer.events.edge_color()
+    if "edge_width" in df.columns:
+        layer.edge_width[rows] = _to_numeric(df["edge_width"])
+        layer.events.edge_width()
+    if "size" in df.columns:
+        layer.size[rows] = _to_numeric(df["size"])[:, np.newaxis]
+        layer.events.size()
+    with timer("layer.refresh"):
+        layer.refresh()
+
+
+@update_layer_rows.register
+def update_shapes_rows(
+    layer: Shapes,
+    table: SpreadSheet,
+    rows: slice,
+    columns: slice,
+):
+    df = _get_sub_frame(table, rows, columns)
+    indices = np.arange(rows.start, rows.stop)
+    for attr in ("face", "edge"):
+        if (name := f"{attr}_color") in df.columns:
+            colors = hex_to_rgba(df[name])
+            set_shapes_colors(layer, attr, indices, colors)
+    with timer("layer.refresh"):
+        layer.refresh()
+
+
+@update_layer_rows.register
+def update_vectors_rows(
+    layer: Vectors,
+    table: SpreadSheet,
+    rows: slice,
+    columns: slice,
+):
+    df = _get_sub_frame(table, rows, columns)
+    ndim = layer.ndim
+    axes = [
+        i for i, c in enumerate(table.columns[: ndim * 2]) if c in df.columns
+    ]
+    if axes:
+        cols = [table.columns[i] for i in axes]
+        values = _to_numeric(df[cols])
+        data = _coordinate_buffer(layer.data, values.dtype)
+        data.reshape(len(data), -1)[rows, axes] = values
+        # vector meshes are only regenerated by the data setter
+        layer.data = data
+    if "edge_color" in df.columns:
+        layer.edge_color[rows] = hex_to_rgba(df["edge_color"])
+        layer.events.edge_color()
+    with timer("layer.refresh"):
+        layer.refresh()
+
+
+@update_layer_rows.register
+def update_tracks_rows(
+    layer: Tracks,
+    table: SpreadSheet,
+    rows: slice,
+    columns: slice,
+):
+    df = _get_sub_frame(table, rows, columns)
+    axes = [
+        i
+        for i, c in enumerate(table.columns[: layer.ndim + 1])
+        if c in df.columns
+    ]
+    if axes:
+        cols = [table.columns[i] for i in axes]
+        values = _to_numeric(df[cols])
+        data = _coordinate_buffer(layer.data, values.dtype)
+        data[rows, axes] = values
+        # tracks and graph are only rebuilt by the data setter
+        layer.data = data
+
+
+@update_layer_rows.register
+def update_surface_rows(
+    layer: Surface,
+    table: SpreadSheet,
+    rows: slice,
+    columns: slice,
+):
+    df = _get_sub_frame(table, rows, columns)
+    ndim = layer.vertices.shape[1]
+    loc = [table.columns.get_loc(c) for c in df.columns]
+    vertices = layer.vertices
+    values = np.asarray(layer.vertex_values)
+    if axes := [i for i in loc if i < ndim]:
+        cols = [table.columns[i] for i in axes]
+        new = _to_numeric(df[cols])
+        vertices = _coordinate_buffer(vertices, new.dtype)
+        vertices[rows, axes] = new
+    if value_axes := [i - ndim for i in loc if i >= ndim]:
+        cols = [table.columns[i + ndim] for i in value_axes]
+        new = _to_numeric(df[cols])
+        values = _coordinate_buffer(values, new.dtype)
+        flat = values.reshape(-1, values.shape[-1])
+        flat[value_axes, rows] = new.T
+    # meshes are only regenerated by the data setter
+    layer.data = (vertices, layer.faces, values)
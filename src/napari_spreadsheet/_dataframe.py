@@ -0,0 +1,428 @@
+"""
+Conversion between layer data and DataFrames without Qt or a viewer.
+
+Functions in this module only need NumPy and pandas (and pyarrow for Arrow
+tables), so that they can be used in batch jobs and multiprocessing workers.
+Layers are given either as napari layers or as layer data tuples
+``(data, kwargs, layer_type)``.
+
+Coordinate columns are named "data_{axis label}", as in the spreadsheets of
+the widget, and are found by this prefix when converting back. Explicitly
+given axis labels are prefixed as well, unlike the former converters of
+points and vectors, which used them as column names as is.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Callable, Dict, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ._chunks import map_chunks, row_chunks
+from ._color import hex_to_rgba, rgba_to_categorical
+from ._labels import get_label_statistics, label_statistics
+from ._stats import timed
+
+if TYPE_CHECKING:  # pragma: no cover
+    import pyarrow as pa
+    from napari.layers import Layer, Shapes
+
+LayerData = Tuple[Any, Dict[str, Any], str]
+
+COLOR_COLUMNS = ("face_color", "edge_color")
+
+# layer type -> names of the layer attributes converted into columns
+LAYER_STATE: dict[str, tuple[str, ...]] = {
+    "points": ("face_color", "edge_color", "edge_width", "size"),
+    "shapes": ("face_color", "edge_color", "edge_width"),
+    "vectors": ("edge_color",),
+    "tracks": (),
+    "labels": (),
+    "surface": (),
+}
+
+# layer type -> function(data, kwargs, axis_labels) -> DataFrame
+_TO_DATAFRAME: dict[str, Callable[..., pd.DataFrame]] = {}
+# layer type -> function(df, ndim) -> LayerData
+_FROM_DATAFRAME: dict[str, Callable[..., LayerData]] = {}
+
+
+def _register(registry: dict[str, Callable], layer_type: str):
+    def _decorator(func: Callable) -> Callable:
+        registry[layer_type] = func
+        return func
+
+    return _decorator
+
+
+@timed("layer_to_dataframe")
+def layer_to_dataframe(
+    layer: Layer | LayerData,
+    axis_labels: Sequence[str] | None = None,
+    *,
+    chunk_size: int | None = None,
+    max_workers: int | None = None,
+) -> pd.DataFrame:
+    """
+    Convert layer state to a pandas DataFrame.
+
+    Coordinates are named after ``axis_labels``. If more labels than the
+    layer dimensions are given, the last ones are used as in a viewer. The
+    default labels are "0", "1", ... . Rows of large layers are converted in
+    chunks of ``chunk_size`` on ``max_workers`` threads.
+    """
+    data, kwargs, layer_type = as_layer_data(layer)
+    if (func := _TO_DATAFRAME.get(layer_type)) is None:
+        raise NotImplementedError(f"Cannot convert {layer_type!r} layer.")
+    return func(
+        data,
+        kwargs,
+        axis_labels,
+        chunk_size=chunk_size,
+        max_workers=max_workers,
+    )
+
+
+def layer_to_arrow(
+    layer: Layer | LayerData,
+    axis_labels: Sequence[str] | None = None,
+    **kwargs,
+) -> pa.Table:
+    """Convert layer state to a pyarrow Table."""
+    import pyarrow as pa
+
+    df = layer_to_dataframe(layer, axis_labels, **kwargs)
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+@timed("dataframe_to_layer_data")
+def dataframe_to_layer_data(
+    df: pd.DataFrame | pa.Table,
+    layer_type: str,
+    ndim: int | None = None,
+    *,
+    chunk_size: int | None = None,
+    max_workers: int | None = None,
+) -> LayerData:
+    """
+    Convert a DataFrame back to a layer data tuple.
+
+    ``ndim`` is the number of coordinate columns. By default, it is inferred
+    from the columns prefixed with "data_". Colors of large tables are parsed
+    in chunks of ``chunk_size`` on ``max_workers`` threads.
+    """
+    if not isinstance(df, pd.DataFrame):
+        df = df.to_pandas()
+    layer_type = layer_type.lower()
+    if (func := _FROM_DATAFRAME.get(layer_type)) is None:
+        raise NotImplementedError(
+            f"Cannot convert a DataFrame to {layer_type!r} layer data."
+        )
+    if ndim is None:
+        ndim = sum(str(c).startswith("data_") for c in df.columns)
+        if layer_type == "vectors":
+            ndim //= 2
+    return func(df, ndim, chunk_size=chunk_size, max_workers=max_workers)
+
+
+def as_layer_data(layer: Layer | LayerData) -> LayerData:
+    """Return the data, state and type of a layer or a layer data tuple."""
+    if isinstance(layer, tuple):
+        data, kwargs, layer_type = layer
+        return data, dict(kwargs), layer_type.lower()
+    for cls in type(layer).__mro__:
+        if (layer_type := cls.__name__.lower()) in LAYER_STATE:
+            break
+    else:
+        raise NotImplementedError(f"Cannot convert {type(layer)}.")
+    if layer_type == "labels":
+        # statistics are cached until the label image changes
+        return get_label_statistics(layer), {}, layer_type
+    kwargs = {name: getattr(layer, name) for name in LAYER_STATE[layer_type]}
+    return layer.data, kwargs, layer_type
+
+
+def _axis_labels(axis_labels: Sequence[str] | None, ndim: int) -> list[str]:
+    if axis_labels is None:
+        return [str(i) for i in range(ndim)]
+    if len(axis_labels) < ndim:
+        raise ValueError(
+            f"Expected {ndim} axis labels, got {len(axis_labels)}."
+        )
+    # layers are aligned to the last axes of a viewer
+    start = len(axis_labels) - ndim
+    return list(axis_labels)[start:]
+
+
+def _as_rgba(color, n: int) -> np.ndarray:
+    """Broadcast colors to a (N, 4) RGBA array."""
+    color = np.asarray(color)
+    if color.dtype.kind in "OSU":
+        return hex_to_rgba(np.broadcast_to(color.astype(object), (n,)))
+    return np.broadcast_to(color, (n, 4))
+
+
+def _state_columns(
+    dict_: dict[str, Any],
+    kwargs: dict[str, Any],
+    layer_type: str,
+    n: int,
+    **chunking,
+) -> dict[str, Any]:
+    for name in LAYER_STATE[layer_type]:
+        if (value := kwargs.get(name)) is None:
+            continue
+        if name in COLOR_COLUMNS:
+            dict_[name] = rgba_to_categorical(_as_rgba(value, n), **chunking)
+            continue
+        value = np.asarray(value)
+        if value.ndim == 2:
+            # size of each dimension
+            value = value[:, 0]
+        dict_[name] = np.broadcast_to(value, (n,))
+    return dict_
+
+
+def _frame(
+    dict_: dict[str, Any],
+    chunk_size: int | None = None,
+    max_workers: int | None = None,
+) -> pd.DataFrame:
+    """
+    Build a DataFrame from columns.
+
+    Numeric columns of the same dtype are copied into one block in chunks,
+    so that pandas does not need to consolidate (copy) them again.
+    """
+    arrays = {k: v for k, v in dict_.items() if isinstance(v, np.ndarray)}
+    if len(arrays) < 2 or len({a.dtype for a in arrays.values()}) > 1:
+        return pd.DataFrame(dict_)
+    values = list(arrays.values())
+    block = np.empty((len(values), len(values[0])), dtype=values[0].dtype)
+
+    def _copy(sl: slice):
+        for i, value in enumerate(values):
+            block[i, sl] = value[sl]
+
+    map_chunks(_copy, row_chunks(block.shape[1], chunk_size), max_workers)
+    df = pd.DataFrame(block.T, columns=list(arrays), copy=False)
+    for loc, (name, value) in enumerate(dict_.items()):
+        if name not in arrays:
+            df.insert(loc, name, value)
+    return df
+
+
+def parse_state_columns(
+    df: pd.DataFrame, names: Sequence[str], columns=None, **chunking
+) -> dict[str, np.ndarray]:
+    """
+    Parse state columns of a DataFrame into layer attributes.
+
+    Only the ``names`` in ``columns`` (all by default) are parsed.
+    """
+    kwargs = {}
+    for name in names:
+        if name not in df.columns or (
+            columns is not None and name not in columns
+        ):
+            continue
+        if name in COLOR_COLUMNS:
+            kwargs[name] = hex_to_rgba(df[name], **chunking)
+        else:
+            kwargs[name] = df[name].to_numpy()
+    return kwargs
+
+
+@_register(_TO_DATAFRAME, "points")
+def points_data_to_dataframe(
+    data: np.ndarray,
+    kwargs: dict[str, Any],
+    axis_labels: Sequence[str] | None = None,
+    **chunking,
+) -> pd.DataFrame:
+    data = np.asarray(data)
+    axis_labels = _axis_labels(axis_labels, data.shape[1])
+    dict_ = {f"data_{a}": data[:, i] for i, a in enumerate(axis_labels)}
+    _state_columns(dict_, kwargs, "points", data.shape[0], **chunking)
+    return _frame(dict_, **chunking)
+
+
+@_register(_TO_DATAFRAME, "shapes")
+def shapes_data_to_dataframe(
+    data: list[np.ndarray],
+    kwargs: dict[str, Any],
+    axis_labels: Sequence[str] | None = None,
+    **chunking,
+) -> pd.DataFrame:
+    dict_ = _state_columns({}, kwargs, "shapes", len(data), **chunking)
+    return _frame(dict_, **chunking)
+
+
+@_register(_TO_DATAFRAME, "vectors")
+def vectors_data_to_dataframe(
+    data: np.ndarray,
+    kwargs: dict[str, Any],
+    axis_labels: Sequence[str] | None = None,
+    **chunking,
+) -> pd.DataFrame:
+    data = np.asarray(data)
+    axis_labels = _axis_labels(axis_labels, data.shape[2])
+    dict_ = {}
+    for i, axis_label in enumerate(axis_labels):
+        dict_[f"data_{axis_label}"] = data[:, 0, i]
+    for i, axis_label in enumerate(axis_labels):
+        dict_[f"data_{axis_label}_vec"] = data[:, 1, i]
+    _state_columns(dict_, kwargs, "vectors", data.shape[0], **chunking)
+    return _frame(dict_, **chunking)
+
+
+@_register(_TO_DATAFRAME, "tracks")
+def tracks_data_to_dataframe(
+    data: np.ndarray,
+    kwargs: dict[str, Any],
+    axis_labels: Sequence[str] | None = None,
+    **chunking,
+) -> pd.DataFrame:
+    data = np.asarray(data)
+    axis_labels = _axis_labels(axis_labels, data.shape[1] - 1)
+    dict_ = {"track_id": data[:, 0]}
+    for i, axis_label in enumerate(axis_labels):
+        dict_[f"data_{axis_label}"] = data[:, i + 1]
+    return _frame(dict_, **chunking)
+
+
+@_register(_TO_DATAFRAME, "labels")
+def labels_data_to_dataframe(
+    data: np.ndarray | dict[str, np.ndarray],
+    kwargs: dict[str, Any],
+    axis_labels: Sequence[str] | None = None,
+    **chunking,
+) -> pd.DataFrame:
+    # precalculated statistics are given for napari layers
+    stats = data if isinstance(data, dict) else label_statistics(data)
+    axis_labels = _axis_labels(axis_labels, stats["centroid"].shape[1])
+    dict_ = {"label": stats["label"], "area": stats["area"]}
+    for key in ("centroid", "bbox_min", "bbox_max"):
+        for i, axis_label in enumerate(axis_labels):
+            dict_[f"{key}_{axis_label}"] = stats[key][:, i]
+    return _frame(dict_, **chunking)
+
+
+def surface_values(data: tuple[np.ndarray, ...]) -> np.ndarray:
+    """Vertex values of surface data as a (N, K) array."""
+    if len(data) < 3:
+        return np.ones((len(data[0]), 1))
+    values = np.asarray(data[2])
+    return values.reshape(-1, values.shape[-1]).T
+
+
+@_register(_TO_DATAFRAME, "surface")
+def surface_data_to_dataframe(
+    data: tuple[np.ndarray, ...],
+    kwargs: dict[str, Any],
+    axis_labels: Sequence[str] | None = None,
+    **chunking,
+) -> pd.DataFrame:
+    vertices = np.asarray(data[0])
+    axis_labels = _axis_labels(axis_labels, vertices.shape[1])
+    dict_ = {}
+    for i, axis_label in enumerate(axis_labels):
+        dict_[f"data_{axis_label}"] = vertices[:, i]
+    values = surface_values(data)
+    if values.shape[1] == 1:
+        dict_["value"] = values[:, 0]
+    else:
+        for i in range(values.shape[1]):
+            dict_[f"value_{i}"] = values[:, i]
+    return _frame(dict_, **chunking)
+
+
+@_register(_FROM_DATAFRAME, "points")
+def dataframe_to_points_data(
+    df: pd.DataFrame, ndim: int, **chunking
+) -> LayerData:
+    data = df.iloc[:, :ndim].to_numpy()
+    kwargs = parse_state_columns(df, LAYER_STATE["points"], **chunking)
+    return data, kwargs, "points"
+
+
+@_register(_FROM_DATAFRAME, "vectors")
+def dataframe_to_vectors_data(
+    df: pd.DataFrame, ndim: int, **chunking
+) -> LayerData:
+    data = df.iloc[:, : ndim * 2].to_numpy().reshape(-1, 2, ndim)
+    kwargs = parse_state_columns(df, LAYER_STATE["vectors"], **chunking)
+    return data, kwargs, "vectors"
+
+
+@_register(_FROM_DATAFRAME, "tracks")
+def dataframe_to_tracks_data(
+    df: pd.DataFrame, ndim: int, **chunking
+) -> LayerData:
+    return df.iloc[:, : ndim + 1].to_numpy(), {}, "tracks"
+
+
+@_register(_FROM_DATAFRAME, "shapes")
+def dataframe_to_shapes_data(
+    df: pd.DataFrame, ndim: int, **chunking
+) -> LayerData:
+    if "shape_id" not in df.columns:
+        raise ValueError("Shapes data can only be made from a vertex table.")
+    shapes = vertex_dataframe_to_shapes_data(df)
+    data = [vertices for vertices, _ in shapes]
+    return data, {"shape_type": [t for _, t in shapes]}, "shapes"
+
+
+@timed("shapes_to_vertex_dataframe")
+def shapes_to_vertex_dataframe(
+    layer: Shapes,
+    axis_labels: Sequence[str] | None = None,
+) -> pd.DataFrame:
+    """
+    Convert shapes to a long-format table with one row per vertex.
+
+    Columns are "shape_id", "shape_type", "vertex_index" and the coordinates.
+    """
+    data = layer.data
+    axis_labels = _axis_labels(axis_labels, layer.ndim)
+    lengths = np.fromiter(map(len, data), dtype=np.intp, count=len(data))
+    if lengths.size > 0:
+        vertices = np.concatenate(data, axis=0)
+    else:
+        vertices = np.zeros((0, len(axis_labels)))
+    starts = np.cumsum(lengths) - lengths
+    shape_id = np.repeat(np.arange(lengths.size), lengths)
+    dict_ = {
+        "shape_id": shape_id,
+        "shape_type": pd.Categorical(
+            np.repeat(np.asarray(layer.shape_type, dtype=object), lengths)
+        ),
+        "vertex_index": np.arange(shape_id.size) - starts[shape_id],
+    }
+    for i, axis_label in enumerate(axis_labels):
+        dict_[f"data_{axis_label}"] = vertices[:, i]
+    return pd.DataFrame(dict_)
+
+
+@timed("vertex_dataframe_to_shapes_data")
+def vertex_dataframe_to_shapes_data(
+    df: pd.DataFrame,
+) -> list[tuple[np.ndarray, str]]:
+    """
+    Convert a vertex table into a list of (vertices, shape_type).
+
+    Rows are grouped by "shape_id" and ordered by "vertex_index".
+    """
+    if df.shape[0] == 0:
+        return []
+    shape_id = df["shape_id"].to_numpy()
+    order = np.lexsort((df["vertex_index"].to_numpy(), shape_id))
+    shape_id = shape_id[order]
+    coords = df.iloc[:, 3:].to_numpy(dtype=np.float64)[order]
+    shape_type = df["shape_type"].to_numpy(dtype=object)[order]
+    starts = np.flatnonzero(
+        np.concatenate([[True], shape_id[1:] != shape_id[:-1]])
+    )
+    vertices = np.split(coords, starts[1:])
+    return list(zip(vertices, shape_type[starts]))
@@ -0,0 +1,209 @@
+"""Layer features specific functions."""
+
+from __future__ import annotations
+
+import weakref
+from functools import singledispatch
+from io import StringIO
+from string import Formatter
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+from napari.layers import Layer, Points, Shapes, Vectors
+from tabulous.types import ItemInfo
+
+from . import _napari_compat
+from ._stats import timed
+from ._tabulous_compat import raw_data, read_csv_kwargs, source_shape
+
+if TYPE_CHECKING:  # pragma: no cover
+    from napari.layers.utils.text_manager import TextManager
+    from tabulous.widgets import SpreadSheet
+    from ._types import LayerWithFeatures
+
+# If edited rows of a column are split into more blocks than this, the
+# bounding block is parsed at once.
+_MAX_BLOCKS = 32
+
+
+class FeaturesTracker:
+    """
+    Track the cells of a features spreadsheet edited since loading.
+
+    The edited cells are written to the layer features in-place, so that the
+    rest of the table needs neither parsing nor copying.
+    """
+
+    def __init__(self, sheet: SpreadSheet, features: pd.DataFrame):
+        # sheet metadata refers to this object, avoid a reference cycle
+        self._sheet = weakref.ref(sheet)
+        self._features: weakref.ReferenceType[pd.DataFrame] | None = None
+        # column name -> edited row ranges. None means that the whole table
+        # has to be parsed.
+        self._dirty: dict[str, list[slice]] | None = {}
+        self.reset(features)
+        sheet.events.data.connect(self._on_data_change)
+
+    def reset(self, features: pd.DataFrame):
+        """Reset the tracker with the features the spreadsheet reflects."""
+        self._features = weakref.ref(features)
+        self._dirty = {}
+
+    @property
+    def dirty(self) -> set[str] | None:
+        """Edited columns, or None if the table structure changed."""
+        if self._dirty is None:
+            return None
+        return set(self._dirty)
+
+    def is_synced(self, layer: LayerWithFeatures) -> bool:
+        """True if the spreadsheet is not edited since loading the features."""
+        return self._dirty == {} and self._features() is layer.features
+
+    def _on_data_change(self, info: ItemInfo):
+        if self._dirty is None or (sheet := self._sheet()) is None:
+            return None
+        if (
+            info.value is ItemInfo.DELETED
+            or info.old_value is ItemInfo.INSERTED
+        ):
+            self._dirty = None
+            return None
+        rows = _as_slice(info.row, source_shape(sheet)[0])
+        columns = sheet.columns
+        if isinstance(info.column, slice):
+            names = columns[info.column]
+        else:
+            names = [columns[info.column]]
+        for name in names:
+            self._dirty.setdefault(name, []).append(rows)
+        return None
+
+    @timed("FeaturesTracker.update_layer")
+    def update_layer(self, layer: LayerWithFeatures) -> bool:
+        """
+        Write the edited cells to the layer features in-place.
+
+        Return False if the layer features are not the ones the spreadsheet
+        was loaded from, or the table structure changed. In this case the
+        whole table must be set to the layer.
+        """
+        sheet = self._sheet()
+        features = layer.features
+        if (
+            sheet is None
+            or self._dirty is None
+            or self._features() is not features
+            or source_shape(sheet)[0] != features.shape[0]
+            or list(sheet.columns) != list(features.columns)
+        ):
+            return False
+        if not self._dirty:
+            return True
+        for name, rows in self._dirty.items():
+            icol = features.columns.get_loc(name)
+            for sl in _merge_slices(rows):
+                values = _parse_cells(sheet, sl, name)
+                features.iloc[sl, icol] = values.to_numpy()
+        refresh_features(layer, set(self._dirty))
+        self._dirty = {}
+        return True
+
+
+def _as_slice(index: int | slice | np.ndarray, size: int) -> slice:
+    if isinstance(index, slice):
+        return slice(*index.indices(size))
+    if isinstance(index, np.ndarray):
+        # source rows of a block in a sorted or filtered view
+        return slice(int(index.min()), int(index.max()) + 1)
+    return slice(index, index + 1)
+
+
+def _merge_slices(slices: list[slice]) -> list[slice]:
+    """Merge overlapping or adjacent slices."""
+    slices = sorted(slices, key=lambda sl: sl.start)
+    out = [slices[0]]
+    for sl in slices[1:]:
+        last = out[-1]
+        if sl.start <= last.stop:
+            out[-1] = slice(last.start, max(last.stop, sl.stop))
+        else:
+            out.append(sl)
+    if len(out) > _MAX_BLOCKS:
+        return [slice(out[0].start, out[-1].stop)]
+    return out
+
+
+def _parse_cells(sheet: SpreadSheet, rows: slice, name: str) -> pd.Series:
+    """Parse cells of a spreadsheet column in the same way as sheet.data."""
+    data_raw = raw_data(sheet)[[name]].iloc[rows]
+    buf = StringIO(data_raw.to_csv(sep="\t", index=False))
+    out = pd.read_csv(
+        buf,
+        sep="\t",
+        header=0,
+        na_values=["#ERROR"],
+        names=[name],
+        **read_csv_kwargs(sheet, name),
+    )
+    return out[name]
+
+
+def _text_features(text: TextManager) -> set[str]:
+    """Return the names of features that the text encodings depend on."""
+    out = set()
+    for encoding in (text.string, text.color):
+        if (feature := getattr(encoding, "feature", None)) is not None:
+            out.add(feature)
+        elif (fmt := getattr(encoding, "format", None)) is not None:
+            out.update(
+                field for _, field, _, _ in Formatter().parse(fmt) if field
+            )
+    return out
+
+
+def _refresh_text(layer: Layer, columns: set[str]):
+    if not columns.isdisjoint(_text_features(layer.text)):
+        layer.text.refresh(layer.features)
+
+
+def _refresh_colors(layer: Layer, columns: set[str], attrs: list[str]):
+    for attr in attrs:
+        if _napari_compat.color_feature(layer, attr) in columns:
+            _napari_compat.refresh_colors(layer, attr)
+
+
+@timed("refresh_features")
+def refresh_features(layer: Layer, columns: set[str]):
+    """
+    Refresh the layer after its features are updated in-place.
+
+    Only the encodings that depend on ``columns`` are recalculated, unless
+    napari is of a version that this is not known to work with.
+    """
+    if not _napari_compat.SUPPORTED:
+        layer.features = layer.features
+        return None
+    return _refresh_features(layer, columns)
+
+
+@singledispatch
+def _refresh_features(layer: Layer, columns: set[str]):
+    layer.features = layer.features
+
+
+@_refresh_features.register(Points)
+@_refresh_features.register(Shapes)
+def _refresh_points_shapes_features(layer: Points | Shapes, columns: set[str]):
+    _refresh_colors(layer, columns, ["face", "edge"])
+    _refresh_text(layer, columns)
+    layer.events.properties()
+    layer.events.features()
+
+
+@_refresh_features.register
+def _refresh_vectors_features(layer: Vectors, columns: set[str]):
+    _refresh_colors(layer, columns, ["edge"])
+    layer.events.properties()
+    layer.events.features()
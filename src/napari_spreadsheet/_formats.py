@@ -0,0 +1,14 @@
+"""File formats of table data."""
+
+TEXT_SUFFIXES = (".csv", ".txt", ".dat")
+EXCEL_SUFFIXES = (".xlsx",)
+PARQUET_SUFFIXES = (".parquet", ".pq")
+FEATHER_SUFFIXES = (".feather", ".arrow", ".ipc")
+HDF5_SUFFIXES = (".h5", ".hdf5", ".hdf")
+SUPPORTED_SUFFIXES = (
+    TEXT_SUFFIXES
+    + EXCEL_SUFFIXES
+    + PARQUET_SUFFIXES
+    + FEATHER_SUFFIXES
+    + HDF5_SUFFIXES
+)
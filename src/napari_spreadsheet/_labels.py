@@ -0,0 +1,134 @@
+"""Vectorized per-label statistics of label images."""
+
+from __future__ import annotations
+
+import weakref
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:  # pragma: no cover
+    from napari.layers import Labels
+
+# layer -> statistics of the current label image
+_CACHE: weakref.WeakKeyDictionary[
+    Labels, dict[str, np.ndarray]
+] = weakref.WeakKeyDictionary()
+# layers whose events are connected to invalidate the cache
+_WATCHED: weakref.WeakSet[Labels] = weakref.WeakSet()
+
+
+def label_statistics(data: np.ndarray) -> dict[str, np.ndarray]:
+    """
+    Calculate area, centroid and bounding box of each label.
+
+    Returns a dict with "label", "area", "centroid" (N, ndim), "bbox_min"
+    (N, ndim) and "bbox_max" (N, ndim) arrays. Background (0) is excluded.
+    """
+    data = np.asarray(data)
+    flat = data.ravel()
+    if flat.size > 0 and flat.min() < 0:
+        raise ValueError("Labels must be non-negative.")
+    max_label = int(flat.max()) if flat.size > 0 else 0
+    if max_label <= flat.size:
+        labels = np.arange(max_label + 1)
+        # bincount does not accept uint64
+        index = flat.astype(np.intp, copy=False)
+    else:
+        # sparse labels, avoid allocating arrays of the maximum label size
+        labels, index = np.unique(flat, return_inverse=True)
+        if labels[0] != 0:
+            labels = np.concatenate([[0], labels])
+            index = index + 1
+    counts = np.bincount(index, minlength=labels.size)
+    ids = np.flatnonzero(counts[1:]) + 1
+
+    centroid = np.empty((ids.size, data.ndim), dtype=np.float64)
+    for axis, size in enumerate(data.shape):
+        shape = [1] * data.ndim
+        shape[axis] = size
+        coords = np.broadcast_to(np.arange(size).reshape(shape), data.shape)
+        sums = np.bincount(
+            index, weights=coords.ravel(), minlength=labels.size
+        )
+        centroid[:, axis] = sums[ids] / counts[ids]
+
+    bbox_min, bbox_max = _bounding_boxes(index, data.shape, labels.size)
+    return {
+        "label": labels[ids],
+        "area": counts[ids],
+        "centroid": centroid,
+        "bbox_min": bbox_min[ids],
+        "bbox_max": bbox_max[ids],
+    }
+
+
+def _bounding_boxes(
+    index: np.ndarray, shape: tuple[int, ...], nlabels: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Calculate the bounding box of each label of a raveled label image.
+
+    Pixels are first merged into runs of the same label along the last axis,
+    so that the per-label reductions do not visit every pixel of labels
+    larger than a few pixels.
+    """
+    ndim = len(shape)
+    bbox_min = np.zeros((nlabels, ndim), dtype=np.intp)
+    bbox_max = np.zeros((nlabels, ndim), dtype=np.intp)
+    if index.size == 0:
+        return bbox_min, bbox_max
+    is_start = np.empty(index.size, dtype=np.bool_)
+    np.not_equal(index[1:], index[:-1], out=is_start[1:])
+    is_start[:: shape[-1]] = True
+    starts = np.flatnonzero(is_start)
+    lengths = np.diff(starts, append=index.size)
+    run_labels = index[starts]
+    start_coords = np.unravel_index(starts, shape)
+    for axis, size in enumerate(shape):
+        lower = np.full(nlabels, size, dtype=np.intp)
+        upper = np.zeros(nlabels, dtype=np.intp)
+        np.minimum.at(lower, run_labels, start_coords[axis])
+        if axis == ndim - 1:
+            # runs do not cross the rows of the last axis
+            np.maximum.at(upper, run_labels, start_coords[axis] + lengths)
+        else:
+            np.maximum.at(upper, run_labels, start_coords[axis] + 1)
+        bbox_min[:, axis] = lower
+        bbox_max[:, axis] = upper
+    return bbox_min, bbox_max
+
+
+def get_label_statistics(layer: Labels) -> dict[str, np.ndarray]:
+    """
+    Return the label statistics of a labels layer.
+
+    Statistics are cached until the label image is set or painted.
+    """
+    if (stats := _CACHE.get(layer)) is None:
+        data = layer.data[0] if layer.multiscale else layer.data
+        stats = _CACHE[layer] = label_statistics(data)
+        _watch(layer)
+    return stats
+
+
+def clear_label_statistics(layer: Labels):
+    """Clear the cached label statistics of a labels layer."""
+    _CACHE.pop(layer, None)
+
+
+def _watch(layer: Labels):
+    if layer in _WATCHED:
+        return None
+    ref = weakref.ref(layer)
+
+    def _invalidate(*_):
+        if (layer := ref()) is not None:
+            _CACHE.pop(layer, None)
+
+    # paint event is emitted before the label image is updated, so linkers
+    # must recalculate the statistics after it
+    layer.events.data.connect(_invalidate)
+    layer.events.paint.connect(_invalidate)
+    _WATCHED.add(layer)
+    return None
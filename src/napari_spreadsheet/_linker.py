@@ -1,20 +1,45 @@
 from __future__ import annotations
 
-from typing import Callable, Generic, TypeVar
+from typing import TYPE_CHECKING, Any, Callable, Generic, TypeVar
 from abc import abstractmethod
 from contextlib import contextmanager
-from napari.layers import Points, Shapes, Vectors, Layer
-from tabulous.color import normalize_color
-from tabulous.widgets import SpreadSheet
+import numpy as np
+import pandas as pd
+from napari.layers import (
+    Labels,
+    Points,
+    Shapes,
+    Surface,
+    Tracks,
+    Vectors,
+    Layer,
+)
+from qtpy.QtCore import QTimer
+from tabulous.types import ItemInfo
+from ._color import pack_rgba, rgba_to_hex
 from ._conversion import (
-    layer_to_dataframe,
+    layer_to_sheet_data,
     spreadsheet_to_layer,
+    update_color_lookups,
+    update_layer_rows,
 )
+from ._dataframe import COLOR_COLUMNS
+from ._features import _as_slice, _parse_cells, refresh_features
+from ._labels import clear_label_statistics, get_label_statistics
+from ._stats import count, timed, timer
+from ._tabulous_compat import proxy_released, source_shape
+
+if TYPE_CHECKING:  # pragma: no cover
+    from tabulous.widgets import SpreadSheet
 
 
 _F = TypeVar("_F", bound=Callable)
 _L = TypeVar("_L", bound=Layer)
 
+# If changed rows are split into more blocks than this, the bounding block is
+# updated at once (or whole table is synced) to avoid too many updates.
+_MAX_BLOCKS = 32
+
 
 def _check_if_blocked(func: _F) -> _F:
     def fn(self: _LayerLinker, *args, **kwargs):
@@ -26,32 +51,202 @@ def _check_if_blocked(func: _F) -> _F:
     return fn
 
 
-def get_linker(layer: Layer, sheet: SpreadSheet) -> _LayerLinker:
+def _same_layout(cache: np.ndarray | None, value: np.ndarray) -> bool:
+    if cache is None:
+        return False
+    return cache.shape == value.shape and cache.dtype == value.dtype
+
+
+def _not_equal(old: np.ndarray, new: np.ndarray, out: np.ndarray):
+    """Element-wise inequality, where missing values are equal."""
+    if old.dtype.kind == "O" or new.dtype.kind == "O":
+        # comparison with pd.NA is ambiguous
+        old_missing, new_missing = pd.isna(old), pd.isna(new)
+        np.not_equal(old_missing, new_missing, out=out)
+        both = ~(old_missing | new_missing)
+        out[both] = old[both] != new[both]
+        return out
+    np.not_equal(old, new, out=out)
+    if old.dtype.kind in "fcmM" and new.dtype.kind in "fcmM":
+        out &= ~(pd.isna(old) & pd.isna(new))
+    return out
+
+
+def get_linker(
+    layer: Layer, sheet: SpreadSheet, latency: int = 0
+) -> _LayerLinker:
     if isinstance(layer, Points):
-        return PointsLinker.prepare(layer, sheet)
+        return PointsLinker.prepare(layer, sheet, latency)
     elif isinstance(layer, Shapes):
-        return ShapesLinker.prepare(layer, sheet)
+        return ShapesLinker.prepare(layer, sheet, latency)
     elif isinstance(layer, Vectors):
-        return VectorsLinker.prepare(layer, sheet)
+        return VectorsLinker.prepare(layer, sheet, latency)
+    elif isinstance(layer, Tracks):
+        return TracksLinker.prepare(layer, sheet, latency)
+    elif isinstance(layer, Labels):
+        return LabelsLinker.prepare(layer, sheet, latency)
+    elif isinstance(layer, Surface):
+        return SurfaceLinker.prepare(layer, sheet, latency)
     else:
         raise NotImplementedError(
             f"Linker not implemented for {type(layer).__name__} layer."
         )
 
 
+def _block_bounds(rows: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Return the starts and stops of contiguous blocks of sorted rows."""
+    splits = np.flatnonzero(np.diff(rows) != 1) + 1
+    starts = rows[np.concatenate([[0], splits])]
+    stops = rows[np.concatenate([splits, [rows.size]]) - 1] + 1
+    return starts, stops
+
+
+def _as_blocks(rows: np.ndarray) -> list[slice]:
+    """Split sorted row indices into contiguous slices."""
+    if rows.size == 0:
+        return []
+    starts, stops = _block_bounds(rows)
+    return [slice(i0, i1) for i0, i1 in zip(starts.tolist(), stops.tolist())]
+
+
+def _coalesced_blocks(rows: np.ndarray, max_blocks: int) -> list[slice]:
+    """
+    Split sorted row indices into at most ``max_blocks`` slices.
+
+    If there are more contiguous blocks, blocks separated by the smallest
+    gaps are merged, so that the slices cover as few other rows as possible.
+    """
+    if rows.size == 0:
+        return []
+    starts, stops = _block_bounds(rows)
+    if starts.size > max_blocks:
+        # keep the largest gaps between blocks
+        gaps = starts[1:] - stops[:-1]
+        nkeep = max_blocks - 1
+        keep = np.sort(np.argpartition(-gaps, nkeep)[:nkeep])
+        starts = np.concatenate([starts[:1], starts[keep + 1]])
+        stops = np.concatenate([stops[keep], stops[-1:]])
+    return [slice(i0, i1) for i0, i1 in zip(starts.tolist(), stops.tolist())]
+
+
+class RowIndexMap:
+    """
+    Bidirectional map between rows of a spreadsheet view and layer indices.
+
+    Rows of the view differ from the layer indices if the spreadsheet is
+    sorted or filtered. The map is rebuilt only when the sort/filter proxy
+    or the number of rows changes.
+    """
+
+    def __init__(self, sheet: SpreadSheet):
+        self._sheet = sheet
+        self._key: tuple[Any, Any, int] | None = None
+        self._view_to_layer = np.zeros(0, dtype=np.intp)
+        self._layer_to_view = np.zeros(0, dtype=np.intp)
+
+    def _update(self):
+        proxy = self._sheet.proxy
+        obj = proxy.obj
+        indexer = None if obj is None else proxy.as_indexer()
+        nrows = source_shape(self._sheet)[0]
+        key = self._key
+        if (
+            key is not None
+            and key[0] is obj
+            and key[1] is indexer
+            and key[2] == nrows
+        ):
+            return None
+        if indexer is None:
+            view_to_layer = np.arange(nrows)
+        elif indexer.dtype.kind == "b":
+            view_to_layer = np.flatnonzero(indexer)
+        else:
+            view_to_layer = np.asarray(indexer, dtype=np.intp)
+        layer_to_view = np.full(nrows, -1, dtype=np.intp)
+        layer_to_view[view_to_layer] = np.arange(view_to_layer.size)
+        self._view_to_layer = view_to_layer
+        self._layer_to_view = layer_to_view
+        self._key = (obj, indexer, nrows)
+        return None
+
+    def to_layer(self, rows: np.ndarray) -> np.ndarray:
+        """Convert rows of the view into layer indices."""
+        self._update()
+        return self._view_to_layer[rows]
+
+    def to_view(self, indices: np.ndarray) -> np.ndarray:
+        """Convert layer indices into sorted rows of the view."""
+        self._update()
+        # the spreadsheet may not be updated yet after the layer data changed
+        indices = indices[indices < self._layer_to_view.size]
+        rows = self._layer_to_view[indices]
+        return np.sort(rows[rows >= 0])
+
+    @property
+    def nrows(self) -> int:
+        """Number of rows in the view."""
+        self._update()
+        return self._view_to_layer.size
+
+
+@contextmanager
+def _keep_proxy(sheet: SpreadSheet):
+    """Re-apply the sort/filter proxy that setting new data clears."""
+    obj = sheet.proxy.obj
+    # setting data and the proxy are undone at once
+    with sheet.undo_manager.merging(lambda cmds: cmds[0].format()):
+        yield
+        if obj is not None:
+            try:
+                sheet.proxy.set(obj, check_duplicate=False)
+            except Exception:
+                # e.g. the sorted column does not exist anymore
+                pass
+
+
+def _get_action(event: Any) -> str | None:
+    """Get the action type of napari>=0.4.18 data events."""
+    action = getattr(event, "action", None)
+    return getattr(action, "value", action)
+
+
 class _LayerLinker(Generic[_L]):
-    def __init__(self, layer: _L, sheet: SpreadSheet):
+    # state name -> function that returns the state of given rows
+    _STATE: dict[str, Callable[[_L, slice], np.ndarray]] = {}
+
+    def __init__(self, layer: _L, sheet: SpreadSheet, latency: int = 0):
         self._layer = layer
         self._sheet = sheet
         self._is_blocked = False
+        self._cache: dict[str, np.ndarray] = {}
+        self._masks: dict[str, np.ndarray] = {}
+        self._latency = latency
+        self._timer: QTimer | None = None
+        # pending updates (state names of the layer and range of the sheet)
+        self._pending_keys: dict[str, None] = {}
+        self._pending_range: tuple[slice, slice] | None = None
+        self._index_map = RowIndexMap(sheet)
+        # layer selection that the spreadsheet selection reflects
+        self._selected: set[int] = set()
 
     @classmethod
-    def prepare(cls, layer: _L, sheet: SpreadSheet):
-        self = cls(layer, sheet)
+    def prepare(cls, layer: _L, sheet: SpreadSheet, latency: int = 0):
+        self = cls(layer, sheet, latency=latency)
         self.sync_sheet()
         self.link()
         return self
 
+    @property
+    def latency(self) -> int:
+        """Minimum interval (msec) between two updates of linked events."""
+        return self._latency
+
+    @latency.setter
+    def latency(self, latency: int):
+        self.flush()
+        self._latency = int(latency)
+
     @contextmanager
     def blocked(self):
         _was_blocked = self._is_blocked
@@ -69,22 +264,339 @@ class _LayerLinker(Generic[_L]):
     def unlink(self):
         """Unlink the layer and the spreadsheet."""
 
+    @abstractmethod
+    def _sheet_values(self, key: str, rows: slice) -> dict[str, Any]:
+        """Return the spreadsheet values of the state at given rows."""
+
+    def _nrows(self) -> int:
+        """Number of rows the layer corresponds to."""
+        return len(self._layer.data)
+
+    def _source_nrows(self) -> int:
+        """Number of rows of the spreadsheet, including the hidden ones."""
+        return source_shape(self._sheet)[0]
+
+    def _is_proxied(self) -> bool:
+        """True if the spreadsheet is sorted or filtered."""
+        return self._sheet.proxy.proxy_type != "none"
+
+    @timed("linker.sync_sheet")
     def sync_sheet(self):
         """Sync the spreadsheet with the layer."""
-        df = layer_to_dataframe(self._layer)
-        self._sheet.data = df
+        df = layer_to_sheet_data(self._layer)
+        # pending edits of the spreadsheet are overwritten
+        self._pending_range = None
+        with timer("SpreadSheet.assign"), _keep_proxy(self._sheet):
+            self._sheet.data = df
+        self._update_cache()
+
+    def _update_cache(self, rows: slice | None = None):
+        """Update the cached layer state that the spreadsheet reflects."""
+        if rows is None:
+            for key, getter in self._STATE.items():
+                value = getter(self._layer, slice(None))
+                cache = self._cache.get(key)
+                if _same_layout(cache, value):
+                    np.copyto(cache, value)
+                else:
+                    self._cache[key] = np.array(value)
+        else:
+            for key, getter in self._STATE.items():
+                self._cache[key][rows] = getter(self._layer, rows)
+
+    def _changed_rows(self, key: str) -> np.ndarray:
+        """Return indices of the rows whose state differs from the cache."""
+        new = self._STATE[key](self._layer, slice(None))
+        old = self._cache[key]
+        # reuse the mask buffer to avoid allocating it on every event
+        mask = self._masks.get(key)
+        if mask is None or mask.shape != old.shape:
+            mask = self._masks[key] = np.empty(old.shape, dtype=np.bool_)
+        _not_equal(old, new, out=mask)
+        rows = np.flatnonzero(mask.reshape(new.shape[0], -1).any(axis=1))
+        old[rows] = new[rows]
+        return rows
+
+    def _write_rows(self, key: str, rows: np.ndarray):
+        """Write the state of given rows to the spreadsheet."""
+        sheet = self._sheet
+        columns = sheet.columns
+        blocks = _as_blocks(rows)
+        if len(blocks) > _MAX_BLOCKS:
+            blocks = [slice(blocks[0].start, blocks[-1].stop)]
+        if self._is_proxied():
+            self._write_source_rows(key, blocks)
+        else:
+            with sheet.events.data.blocked(), timer("SpreadSheet.assign"):
+                for sl in blocks:
+                    for label, values in self._sheet_values(key, sl).items():
+                        sheet.cell[sl, columns.get_loc(label)] = values
+        if key in COLOR_COLUMNS:
+            # the data event that updates the colormap is blocked
+            for sl in blocks:
+                update_color_lookups(sheet, sl, [key])
+
+    def _write_source_rows(self, key: str, blocks: list[slice]):
+        """
+        Write the state to the table data under the sorted or filtered view.
+
+        Cells of the view cannot be set by the layer indices, so the proxy is
+        released while the cells are set, as one step of the undo history.
+        """
+        sheet = self._sheet
+        columns = sheet.columns
+        with timer("SpreadSheet.assign"), sheet.undo_manager.merging(
+            lambda _: f"update {key!r} of {self._layer.name!r}"
+        ), sheet.events.data.blocked(), proxy_released(sheet):
+            for sl in blocks:
+                for label, values in self._sheet_values(key, sl).items():
+                    sheet.cell[sl, columns.get_loc(label)] = values
+
+    def _push_rows(self, key: str):
+        self._write_rows(key, self._changed_rows(key))
+
+    def _is_appended(self, nrows_old: int) -> bool:
+        """True if the layer state only differs by rows appended at the end."""
+        if "data" not in self._cache:
+            return True
+        data = self._STATE["data"](self._layer, slice(0, nrows_old))
+        return np.array_equal(self._cache["data"], data)
+
+    def _removed_rows(self, event, nrows: int) -> np.ndarray | None:
+        """Return indices of the removed rows, or None if unknown."""
+        if _get_action(event) == "removed":
+            indices = np.asarray(event.data_indices, dtype=np.intp)
+        elif not hasattr(self._layer, "selected_data"):
+            return None
+        else:
+            # selection is not cleared yet on data event in napari<0.4.18
+            indices = np.asarray(
+                sorted(self._layer.selected_data), dtype=np.intp
+            )
+        if indices.size != self._source_nrows() - nrows:
+            return None
+        if "data" in self._cache:
+            data = self._STATE["data"](self._layer, slice(None))
+            if not np.array_equal(
+                np.delete(self._cache["data"], indices, axis=0), data
+            ):
+                return None
+        return np.sort(indices)
+
+    def _schedule(self):
+        """Flush pending updates now or after the latency."""
+        if self._latency <= 0:
+            return self.flush()
+        if self._timer is None:
+            self._timer = QTimer()
+            self._timer.setSingleShot(True)
+            self._timer.timeout.connect(self.flush)
+        if not self._timer.isActive():
+            self._timer.start(self._latency)
+        return None
+
+    @timed("linker.flush")
+    def flush(self):
+        """Apply all the pending updates immediately."""
+        if self._timer is not None:
+            self._timer.stop()
+        rng, self._pending_range = self._pending_range, None
+        keys, self._pending_keys = self._pending_keys, {}
+        count("linker.applied", len(keys) + (rng is not None))
+        if rng is not None:
+            self._apply_sheet_change(*rng)
+        for key in keys:
+            self._apply_layer_change(key)
+        return None
+
+    def _request_layer_update(self, key: str):
+        if self._is_blocked:
+            return None
+        count("linker.layer_events")
+        if key in self._pending_keys:
+            count("linker.coalesced")
+        self._pending_keys[key] = None
+        return self._schedule()
+
+    @timed("linker.apply_layer_change")
+    @_check_if_blocked
+    def _apply_layer_change(self, key: str):
+        if self._nrows() != self._cache[key].shape[0]:
+            return self.sync_sheet()
+        return self._push_rows(key)
+
+    def _on_data_change(self, event=None):
+        if self._is_blocked or _get_action(event) in (
+            "adding",
+            "removing",
+            "changing",
+        ):
+            return None
+        if self._nrows() == self._source_nrows():
+            if "data" in self._STATE:
+                self._request_layer_update("data")
+        else:
+            # row-count changes must be processed before the layer selection
+            # is updated, so they are never delayed.
+            count("linker.layer_events")
+            self._update_row_count(event)
+            self.flush()
+        return None
 
     @_check_if_blocked
-    def _on_sheet_data_change(self, *_):
+    def _update_row_count(self, event=None):
+        nrows_old = self._source_nrows()
+        nrows = self._nrows()
+        if self._is_proxied():
+            # rows of a sorted or filtered view are not inserted in place
+            self.sync_sheet()
+        elif nrows > nrows_old and self._is_appended(nrows_old):
+            self._append_rows(nrows_old, nrows)
+        elif nrows < nrows_old and (
+            (removed := self._removed_rows(event, nrows)) is not None
+        ):
+            self._remove_rows(removed)
+        else:
+            self.sync_sheet()
+        return None
+
+    def _append_rows(self, start: int, stop: int):
+        with self._sheet.events.data.blocked():
+            self._sheet.index.insert(start, stop - start)
+        new = slice(start, stop)
+        for key, getter in self._STATE.items():
+            self._cache[key] = np.concatenate(
+                [self._cache[key], getter(self._layer, new)]
+            )
+            self._write_rows(key, np.arange(start, stop))
+
+    def _remove_rows(self, rows: np.ndarray):
+        blocks = _as_blocks(rows)
+        if len(blocks) > _MAX_BLOCKS:
+            return self.sync_sheet()
+        with self._sheet.events.data.blocked():
+            # remove from the last block so that indices are not shifted
+            for sl in reversed(blocks):
+                self._sheet.index.remove(sl.start, sl.stop - sl.start)
+        for key in self._STATE:
+            self._cache[key] = np.delete(self._cache[key], rows, axis=0)
+        if self._pending_range is not None:
+            # pending edits of the spreadsheet are shifted with the rows
+            pending, columns = self._pending_range
+            start, stop = (
+                i - int(np.searchsorted(rows, i))
+                for i in (pending.start, pending.stop)
+            )
+            if start < stop:
+                self._pending_range = (slice(start, stop), columns)
+            else:
+                self._pending_range = None
+        return None
+
+    def _link_selection(self):
+        self._layer.events.highlight.connect(self._on_highlight)
+        self._sheet.events.selections.connect(self._on_sheet_selection_change)
+
+    def _unlink_selection(self):
+        self._layer.events.highlight.disconnect(self._on_highlight)
+        self._sheet.events.selections.disconnect(
+            self._on_sheet_selection_change
+        )
+
+    @timed("linker.select_rows")
+    def _on_highlight(self, *_):
+        # highlight event is also emitted on hover
+        selected = self._layer.selected_data
+        if self._is_blocked or selected == self._selected:
+            return None
+        self._selected = set(selected)
+        indices = np.fromiter(selected, dtype=np.intp, count=len(selected))
+        rows = self._index_map.to_view(indices)
+        columns = slice(0, self._sheet.columns.size)
+        # too many ranges make the selection of the spreadsheet slow
+        blocks = _coalesced_blocks(rows, _MAX_BLOCKS)
+        with self.blocked():
+            self._sheet.selections = [(sl, columns) for sl in blocks]
+        return None
+
+    @timed("linker.select_layer")
+    def _on_sheet_selection_change(self, *_):
+        if self._is_blocked:
+            return None
+        nrows = self._index_map.nrows
+        mask = np.zeros(nrows, dtype=np.bool_)
+        for rows, _ in self._sheet.selections:
+            mask[rows] = True
+        indices = self._index_map.to_layer(np.flatnonzero(mask))
+        self._selected = set(indices.tolist())
+        with self.blocked():
+            self._layer.selected_data = self._selected
+        return None
+
+    def _on_sheet_data_change(self, info: ItemInfo):
+        if self._is_blocked:
+            return None
+        nr, nc = self._source_nrows(), self._sheet.columns.size
+        if (
+            info.value is ItemInfo.DELETED
+            or info.old_value is ItemInfo.INSERTED
+            or nr != self._nrows()
+        ):
+            # structural changes are applied immediately
+            count("linker.sheet_events")
+            self._pending_range = None
+            self.flush()
+            return self._apply_sheet_change(None, None)
+        rows = _as_slice(info.row, nr)
+        columns = _as_slice(info.column, nc)
+        count("linker.sheet_events")
+        if self._pending_range is not None:
+            count("linker.coalesced")
+            # merge into the bounding range
+            r0, c0 = self._pending_range
+            rows = slice(min(r0.start, rows.start), max(r0.stop, rows.stop))
+            columns = slice(
+                min(c0.start, columns.start), max(c0.stop, columns.stop)
+            )
+        self._pending_range = (rows, columns)
+        return self._schedule()
+
+    @timed("linker.apply_sheet_change")
+    @_check_if_blocked
+    def _apply_sheet_change(self, rows: slice | None, columns: slice | None):
+        nr = self._source_nrows()
+        if nr != self._nrows():
+            rows = columns = None
         with self._sheet.events.data.blocked():
             try:
-                spreadsheet_to_layer(self._layer, self._sheet)
+                if rows is None or (rows.start, rows.stop) == (0, nr):
+                    if columns is None:
+                        dirty = None
+                    else:
+                        dirty = self._sheet.columns[columns]
+                    spreadsheet_to_layer(self._layer, self._sheet, dirty)
+                    self._update_cache()
+                else:
+                    update_layer_rows(self._layer, self._sheet, rows, columns)
+                    self._update_cache(rows)
             except Exception as e:
                 self.sync_sheet()
                 raise e
 
 
+def _points_size(layer: Points, rows: slice) -> np.ndarray:
+    return layer.size[rows, 0]
+
+
 class PointsLinker(_LayerLinker[Points]):
+    _STATE = {
+        "data": lambda layer, rows: layer.data[rows],
+        "face_color": lambda layer, rows: pack_rgba(layer.face_color[rows]),
+        "edge_color": lambda layer, rows: pack_rgba(layer.edge_color[rows]),
+        "edge_width": lambda layer, rows: layer.edge_width[rows],
+        "size": _points_size,
+    }
+
     def link(self):
         self._layer.events.data.connect(self._on_data_change)
         self._layer.events.size.connect(self._on_size_change)
@@ -92,140 +604,360 @@ class PointsLinker(_LayerLinker[Points]):
         self._layer.events.edge_color.connect(self._on_edge_color_change)
         self._layer.events.edge_width.connect(self._on_edge_width_change)
         self._sheet.events.data.connect(self._on_sheet_data_change)
+        self._link_selection()
 
     def unlink(self):
+        self.flush()
         self._layer.events.data.disconnect(self._on_data_change)
         self._layer.events.size.disconnect(self._on_size_change)
         self._layer.events.face_color.disconnect(self._on_face_color_change)
         self._layer.events.edge_color.disconnect(self._on_edge_color_change)
         self._layer.events.edge_width.disconnect(self._on_edge_width_change)
         self._sheet.events.data.disconnect(self._on_sheet_data_change)
+        self._unlink_selection()
+
+    def _sheet_values(self, key: str, rows: slice) -> dict[str, Any]:
+        layer = self._layer
+        if key == "data":
+            cols = self._sheet.columns[: layer.ndim]
+            return {col: layer.data[rows, i] for i, col in enumerate(cols)}
+        elif key == "size":
+            return {key: _points_size(layer, rows)}
+        elif key in ("face_color", "edge_color"):
+            return {key: rgba_to_hex(getattr(layer, key)[rows])}
+        return {key: getattr(layer, key)[rows]}
 
-    @_check_if_blocked
-    def _on_data_change(self, *_):
-        data = self._layer.data
-        if data.shape[0] != self._sheet.index.size:
-            df = layer_to_dataframe(self._layer)
-            self._sheet.data = df
-        else:
-            cols = self._sheet.columns[: self._layer.ndim]
-            val = {}
-            for i, col in enumerate(cols):
-                val[col] = data[:, i].copy()
-            with self._sheet.events.data.blocked():
-                self._sheet.assign(val)
-
-    @_check_if_blocked
     def _on_size_change(self, *_):
-        with self._sheet.events.data.blocked():
-            self._sheet.assign(size=self._layer.size[:, 0])
+        self._request_layer_update("size")
 
-    @_check_if_blocked
     def _on_face_color_change(self, *_):
-        with self._sheet.events.data.blocked():
-            self._sheet.assign(
-                face_color=[
-                    normalize_color(x * 255).html
-                    for x in self._layer.face_color
-                ]
-            )
+        self._request_layer_update("face_color")
 
-    @_check_if_blocked
     def _on_edge_color_change(self, *_):
-        with self._sheet.events.data.blocked():
-            self._sheet.assign(
-                edge_color=[
-                    normalize_color(x * 255).html
-                    for x in self._layer.edge_color
-                ]
-            )
+        self._request_layer_update("edge_color")
 
-    @_check_if_blocked
     def _on_edge_width_change(self, *_):
-        with self._sheet.events.data.blocked():
-            self._sheet.assign(edge_width=self._layer.edge_width)
+        self._request_layer_update("edge_width")
 
 
 class ShapesLinker(_LayerLinker[Shapes]):
+    _STATE = {
+        "face_color": lambda layer, rows: pack_rgba(layer.face_color[rows]),
+        "edge_color": lambda layer, rows: pack_rgba(layer.edge_color[rows]),
+        "edge_width": lambda layer, rows: np.asarray(layer.edge_width)[rows],
+    }
+
     def link(self):
         self._layer.events.face_color.connect(self._on_face_color_change)
         self._layer.events.edge_color.connect(self._on_edge_color_change)
         self._layer.events.edge_width.connect(self._on_edge_width_change)
         self._layer.events.data.connect(self._on_data_change)
         self._sheet.events.data.connect(self._on_sheet_data_change)
+        self._link_selection()
 
     def unlink(self):
+        self.flush()
         self._layer.events.face_color.disconnect(self._on_face_color_change)
         self._layer.events.edge_color.disconnect(self._on_edge_color_change)
         self._layer.events.edge_width.disconnect(self._on_edge_width_change)
         self._layer.events.data.disconnect(self._on_data_change)
         self._sheet.events.data.disconnect(self._on_sheet_data_change)
+        self._unlink_selection()
 
-    @_check_if_blocked
-    def _on_data_change(self, *_):
-        if self._layer.nshapes != self._sheet.index.size:
-            df = layer_to_dataframe(self._layer)
-            self._sheet.data = df
+    def _nrows(self) -> int:
+        return self._layer.nshapes
+
+    def _sheet_values(self, key: str, rows: slice) -> dict[str, Any]:
+        if key in ("face_color", "edge_color"):
+            return {key: rgba_to_hex(getattr(self._layer, key)[rows])}
+        return {key: self._STATE[key](self._layer, rows)}
 
-    @_check_if_blocked
     def _on_face_color_change(self, *_):
-        with self._sheet.events.data.blocked():
-            self._sheet.assign(
-                face_color=[
-                    normalize_color(x * 255).html
-                    for x in self._layer.face_color
-                ]
-            )
+        self._request_layer_update("face_color")
 
-    @_check_if_blocked
     def _on_edge_color_change(self, *_):
-        with self._sheet.events.data.blocked():
-            self._sheet.assign(
-                edge_color=[
-                    normalize_color(x * 255).html
-                    for x in self._layer.edge_color
-                ]
-            )
+        self._request_layer_update("edge_color")
 
-    @_check_if_blocked
     def _on_edge_width_change(self, *_):
-        with self._sheet.events.data.blocked():
-            self._sheet.assign(edge_width=self._layer.edge_width)
+        self._request_layer_update("edge_width")
 
 
 class VectorsLinker(_LayerLinker[Vectors]):
+    _STATE = {
+        "data": lambda layer, rows: layer.data[rows],
+        "edge_color": lambda layer, rows: pack_rgba(layer.edge_color[rows]),
+    }
+
     def link(self):
         self._layer.events.edge_color.connect(self._on_edge_color_change)
         self._layer.events.data.connect(self._on_data_change)
         self._sheet.events.data.connect(self._on_sheet_data_change)
 
     def unlink(self):
+        self.flush()
         self._layer.events.edge_color.disconnect(self._on_edge_color_change)
         self._layer.events.data.disconnect(self._on_data_change)
         self._sheet.events.data.disconnect(self._on_sheet_data_change)
 
-    @_check_if_blocked
-    def _on_data_change(self, *_):
+    def _sheet_values(self, key: str, rows: slice) -> dict[str, Any]:
+        layer = self._layer
+        if key == "data":
+            ndim = layer.ndim
+            cols = self._sheet.columns[: ndim * 2]
+            return {
+                col: layer.data[rows, i // ndim, i % ndim]
+                for i, col in enumerate(cols)
+            }
+        return {key: rgba_to_hex(layer.edge_color[rows])}
+
+    def _on_edge_color_change(self, *_):
+        self._request_layer_update("edge_color")
+
+
+class TracksLinker(_LayerLinker[Tracks]):
+    _STATE = {
+        "data": lambda layer, rows: layer.data[rows],
+    }
+
+    def link(self):
+        self._layer.events.data.connect(self._on_data_change)
+        self._sheet.events.data.connect(self._on_sheet_data_change)
+
+    def unlink(self):
+        self.flush()
+        self._layer.events.data.disconnect(self._on_data_change)
+        self._sheet.events.data.disconnect(self._on_sheet_data_change)
+
+    def _sheet_values(self, key: str, rows: slice) -> dict[str, Any]:
         data = self._layer.data
-        if data.shape[0] != self._sheet.index.size:
-            df = layer_to_dataframe(self._layer)
-            self._sheet.data = df
+        cols = self._sheet.columns[: data.shape[1]]
+        return {col: data[rows, i] for i, col in enumerate(cols)}
+
+
+def _surface_values(layer: Surface, rows: slice) -> np.ndarray:
+    values = np.asarray(layer.vertex_values)
+    return values.reshape(-1, values.shape[-1]).T[rows]
+
+
+class SurfaceLinker(_LayerLinker[Surface]):
+    _STATE = {
+        "data": lambda layer, rows: layer.vertices[rows],
+        "vertex_values": _surface_values,
+    }
+
+    def link(self):
+        self._layer.events.data.connect(self._on_data_change)
+        self._sheet.events.data.connect(self._on_sheet_data_change)
+
+    def unlink(self):
+        self.flush()
+        self._layer.events.data.disconnect(self._on_data_change)
+        self._sheet.events.data.disconnect(self._on_sheet_data_change)
+
+    def _nrows(self) -> int:
+        return len(self._layer.vertices)
+
+    def _sheet_values(self, key: str, rows: slice) -> dict[str, Any]:
+        ndim = self._layer.vertices.shape[1]
+        if key == "data":
+            values = self._layer.vertices[rows]
+            cols = self._sheet.columns[:ndim]
         else:
-            cols = self._sheet.columns[: self._layer.ndim * 2]
-            val = {}
-            for i in range(self._layer.ndim):
-                val[cols[i]] = data[:, 0, i].copy()
-            for i in range(self._layer.ndim):
-                val[cols[i + self._layer.ndim]] = data[:, 1, i].copy()
-            with self._sheet.events.data.blocked():
-                self._sheet.assign(val)
+            values = _surface_values(self._layer, rows)
+            cols = self._sheet.columns[ndim:]
+        return {col: values[:, i] for i, col in enumerate(cols)}
+
+    def _on_data_change(self, event=None):
+        super()._on_data_change(event)
+        # vertex values are also updated by the data event
+        self._request_layer_update("vertex_values")
+
+
+def _label_stats_getter(key: str) -> Callable[[Labels, slice], np.ndarray]:
+    def _get(layer: Labels, rows: slice) -> np.ndarray:
+        return get_label_statistics(layer)[key][rows]
+
+    return _get
+
+
+class LabelsLinker(_LayerLinker[Labels]):
+    """
+    Linker of a labels layer and its label statistics.
+
+    Statistics are derived from the label image, so that edits in the
+    spreadsheet are reverted.
+    """
+
+    _STATE = {
+        key: _label_stats_getter(key)
+        for key in ["label", "area", "centroid", "bbox_min", "bbox_max"]
+    }
+
+    def link(self):
+        self._layer.events.data.connect(self._on_labels_change)
+        self._layer.events.paint.connect(self._on_paint)
+        self._sheet.events.data.connect(self._on_sheet_data_change)
 
+    def unlink(self):
+        self.flush()
+        self._layer.events.data.disconnect(self._on_labels_change)
+        self._layer.events.paint.disconnect(self._on_paint)
+        self._sheet.events.data.disconnect(self._on_sheet_data_change)
+
+    def _nrows(self) -> int:
+        return get_label_statistics(self._layer)["label"].size
+
+    def _sheet_values(self, key: str, rows: slice) -> dict[str, Any]:
+        values = self._STATE[key](self._layer, rows)
+        if values.ndim == 1:
+            return {key: values}
+        # columns are ordered as label, area, centroid, bbox_min, bbox_max
+        ndim = values.shape[1]
+        start = 2 + (list(self._STATE).index(key) - 2) * ndim
+        cols = self._sheet.columns[start : start + ndim]  # noqa: E203
+        return {col: values[:, i] for i, col in enumerate(cols)}
+
+    def _on_labels_change(self, *_):
+        # events of this linker may be emitted before the cache is cleared
+        clear_label_statistics(self._layer)
+        if self._is_blocked:
+            return None
+        count("linker.layer_events")
+        if self._pending_keys:
+            count("linker.coalesced")
+        self._pending_keys.update(dict.fromkeys(self._STATE))
+        return self._schedule()
+
+    def _on_paint(self, *_):
+        # paint event is emitted before the label image is updated
+        QTimer.singleShot(0, self._on_labels_change)
+
+    def _on_sheet_data_change(self, info: ItemInfo):
+        if self._is_blocked:
+            return None
+        with self.blocked():
+            self.sync_sheet()
+        return None
+
+
+def _feature_getter(name: str) -> Callable[[Layer, slice], np.ndarray]:
+    def _get(layer: Layer, rows: slice) -> np.ndarray:
+        return layer.features[name].to_numpy()[rows]
+
+    return _get
+
+
+class FeaturesLinker(_LayerLinker[Layer]):
+    """Linker between layer features and a spreadsheet."""
+
+    def __init__(self, layer: Layer, sheet: SpreadSheet, latency: int = 0):
+        super().__init__(layer, sheet, latency=latency)
+        self._update_state()
+
+    @classmethod
+    def prepare(
+        cls,
+        layer: Layer,
+        sheet: SpreadSheet,
+        latency: int = 0,
+        sync: bool = True,
+    ):
+        """
+        Link the layer features and the spreadsheet.
+
+        If ``sync`` is false, the spreadsheet is assumed to be already
+        identical to the layer features.
+        """
+        self = cls(layer, sheet, latency=latency)
+        if sync:
+            self.sync_sheet()
+        else:
+            self._update_cache()
+        self.link()
+        return self
+
+    def link(self):
+        self._layer.events.data.connect(self._on_data_change)
+        self._features_event().connect(self._on_features_change)
+        self._sheet.events.data.connect(self._on_sheet_data_change)
+
+    def unlink(self):
+        self.flush()
+        self._layer.events.data.disconnect(self._on_data_change)
+        self._features_event().disconnect(self._on_features_change)
+        self._sheet.events.data.disconnect(self._on_sheet_data_change)
+
+    def _features_event(self):
+        # Tracks layer does not have the features event
+        events = self._layer.events
+        return getattr(events, "features", events.properties)
+
+    def _update_state(self):
+        self._STATE = {
+            name: _feature_getter(name) for name in self._layer.features
+        }
+
+    def _nrows(self) -> int:
+        return self._layer.features.shape[0]
+
+    @timed("linker.sync_sheet")
+    def sync_sheet(self):
+        self._update_state()
+        self._pending_range = None
+        with timer("SpreadSheet.assign"), _keep_proxy(self._sheet):
+            self._sheet.data = self._layer.features
+        self._update_cache()
+
+    def _sheet_values(self, key: str, rows: slice) -> dict[str, Any]:
+        values = self._STATE[key](self._layer, rows)
+        if (missing := pd.isna(values)).any():
+            # tabulous does not accept NaN nor pd.NA for some dtypes, but an
+            # empty cell is parsed as a missing value in any column.
+            values = values.astype(object)
+            values[missing] = ""
+        return {key: values}
+
+    def _on_features_change(self, *_):
+        if self._is_blocked:
+            return None
+        if list(self._layer.features.columns) != list(self._STATE):
+            # column changes are applied immediately
+            self._pending_keys.clear()
+            with self.blocked():
+                self.sync_sheet()
+            return None
+        count("linker.layer_events")
+        if self._pending_keys:
+            count("linker.coalesced")
+        self._pending_keys.update(dict.fromkeys(self._STATE))
+        return self._schedule()
+
+    @timed("linker.apply_sheet_change")
     @_check_if_blocked
-    def _on_edge_color_change(self, *_):
-        with self._sheet.events.data.blocked():
-            self._sheet.assign(
-                edge_color=[
-                    normalize_color(x * 255).html
-                    for x in self._layer.edge_color
-                ]
-            )
+    def _apply_sheet_change(self, rows: slice | None, columns: slice | None):
+        sheet = self._sheet
+        layer = self._layer
+        with sheet.events.data.blocked():
+            try:
+                if self._source_nrows() != self._nrows():
+                    # rows of the layer cannot be added or removed here
+                    return self.sync_sheet()
+                features = layer.features
+                if rows is None or list(sheet.columns) != list(
+                    features.columns
+                ):
+                    layer.features = sheet.data
+                    self._update_state()
+                    self._update_cache()
+                    return None
+                names = list(sheet.columns[columns])
+                for name in names:
+                    values = _parse_cells(sheet, rows, name)
+                    icol = features.columns.get_loc(name)
+                    features.iloc[rows, icol] = values.to_numpy()
+                refresh_features(layer, set(names))
+                self._update_cache(rows)
+            except Exception as e:
+                self.sync_sheet()
+                raise e
+        return None
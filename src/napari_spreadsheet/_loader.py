@@ -0,0 +1,403 @@
+"""Background loading of table files into spreadsheets."""
+
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator
+
+import pandas as pd
+from qtpy.QtCore import QObject, QTimer, Signal
+
+from ._formats import (
+    EXCEL_SUFFIXES,
+    FEATHER_SUFFIXES,
+    HDF5_SUFFIXES,
+    PARQUET_SUFFIXES,
+    TEXT_SUFFIXES,
+)
+from ._tabulous_compat import append_rows, get_index_col, open_file, set_source
+
+if TYPE_CHECKING:  # pragma: no cover
+    from tabulous import TableViewerWidget
+    from tabulous.widgets import SpreadSheet
+
+# number of rows parsed at once
+CHUNK_SIZE = 50_000
+# maximum memory (bytes) of string data loaded into a spreadsheet
+MAX_MEMORY = 2**30
+# maximum number of parsed chunks not inserted into spreadsheets yet
+MAX_PENDING_CHUNKS = 4
+
+
+def iter_table_chunks(
+    path: str | Path, chunk_size: int = CHUNK_SIZE
+) -> Iterator[tuple[pd.DataFrame, int]]:
+    """
+    Iterate over a text table file as string DataFrames of ``chunk_size`` rows.
+
+    Cells are not type-inferred because spreadsheets store strings anyway.
+    The number of bytes read so far is yielded with each chunk.
+    """
+    index_col = get_index_col(path)
+    with open(path, "rb") as f, pd.read_csv(
+        f, index_col=index_col, dtype=str, chunksize=chunk_size
+    ) as reader:
+        for chunk in reader:
+            if index_col is not None:
+                chunk.index = _parse_index(chunk.index)
+            yield chunk, f.tell()
+
+
+def _parse_index(index: pd.Index) -> pd.Index:
+    try:
+        return pd.Index(pd.to_numeric(index), name=index.name)
+    except (ValueError, TypeError):
+        return index
+
+
+def iter_parquet_chunks(
+    path: str | Path,
+    chunk_size: int = CHUNK_SIZE,
+    columns: list[str] | None = None,
+) -> Iterator[tuple[pd.DataFrame, float]]:
+    """
+    Iterate over a memory-mapped Parquet file as string DataFrames.
+
+    Only the given ``columns`` are read. The fraction of rows read so far is
+    yielded with each chunk.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    file = pq.ParquetFile(path, memory_map=True)
+    nrows = max(file.metadata.num_rows, 1)
+    nread = 0
+    for batch in file.iter_batches(
+        batch_size=chunk_size,
+        columns=columns,
+        use_threads=False,
+        use_pandas_metadata=True,
+    ):
+        nread += batch.num_rows
+        yield _arrow_to_frame(pa.Table.from_batches([batch])), nread / nrows
+
+
+def iter_feather_chunks(
+    path: str | Path,
+    chunk_size: int = CHUNK_SIZE,
+    columns: list[str] | None = None,
+) -> Iterator[tuple[pd.DataFrame, float]]:
+    """
+    Iterate over a memory-mapped Feather (Arrow IPC) file as string DataFrames.
+
+    Only the given ``columns`` are read. Uncompressed files are not copied
+    until the cells are converted to strings.
+    """
+    import pyarrow.feather as pf
+
+    table = pf.read_table(path, columns=columns, memory_map=True)
+    nrows = max(table.num_rows, 1)
+    for start in range(0, table.num_rows, chunk_size):
+        chunk = table.slice(start, chunk_size)  # zero-copy
+        yield _arrow_to_frame(chunk), (start + chunk.num_rows) / nrows
+
+
+def iter_hdf5_chunks(
+    path: str | Path,
+    chunk_size: int = CHUNK_SIZE,
+    columns: list[str] | None = None,
+) -> Iterator[tuple[str | None, pd.DataFrame, float]]:
+    """
+    Iterate over the tables of a pandas HDF5 file as DataFrames.
+
+    Tables stored in the "table" format are read in chunks of rows and only
+    the given ``columns`` are read. Tables in the "fixed" format are read at
+    once. The key (None if the file has only one table) and the fraction of
+    the file read so far are also yielded.
+    """
+    with pd.HDFStore(path, mode="r") as store:
+        keys = store.keys()
+        for i, key in enumerate(keys):
+            storer = store.get_storer(key)
+            name = key if len(keys) > 1 else None
+            if not storer.is_table:
+                df = store.select(key)
+                if columns is not None:
+                    df = df[columns]
+                yield name, df, (i + 1) / len(keys)
+                continue
+            nrows = max(storer.nrows, 1)
+            for start in range(0, storer.nrows, chunk_size):
+                df = store.select(
+                    key, start=start, stop=start + chunk_size, columns=columns
+                )
+                progress = (i + (start + len(df)) / nrows) / len(keys)
+                yield name, df, progress
+
+
+def _arrow_to_frame(table) -> pd.DataFrame:
+    """Convert an Arrow table into a DataFrame of strings within Arrow."""
+    import pyarrow as pa
+
+    pandas_metadata = table.schema.pandas_metadata or {}
+    index_columns = {
+        c
+        for c in pandas_metadata.get("index_columns", [])
+        if isinstance(c, str)
+    }
+    fields = [
+        field if field.name in index_columns else field.with_type(pa.string())
+        for field in table.schema
+    ]
+    try:
+        table = table.cast(pa.schema(fields, metadata=table.schema.metadata))
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        # spreadsheet will convert them into strings
+        return table.to_pandas(use_threads=False)
+    # already on a worker thread; Arrow's thread pool would contend for GIL
+    return table.to_pandas(
+        types_mapper={pa.string(): pd.StringDtype()}.get, use_threads=False
+    )
+
+
+def _read_table(
+    path: Path, chunk_size: int, columns: list[str] | None = None
+) -> Iterator[tuple[str, pd.DataFrame, int]]:
+    """Yield (sheet name, data, bytes read) of a table file."""
+    size = path.stat().st_size
+    if path.suffix in TEXT_SUFFIXES:
+        for chunk, pos in iter_table_chunks(path, chunk_size):
+            yield path.stem, chunk, pos
+    elif path.suffix in PARQUET_SUFFIXES:
+        for chunk, frac in iter_parquet_chunks(path, chunk_size, columns):
+            yield path.stem, chunk, int(size * frac)
+    elif path.suffix in FEATHER_SUFFIXES:
+        for chunk, frac in iter_feather_chunks(path, chunk_size, columns):
+            yield path.stem, chunk, int(size * frac)
+    elif path.suffix in HDF5_SUFFIXES:
+        for key, chunk, frac in iter_hdf5_chunks(path, chunk_size, columns):
+            name = path.stem if key is None else key.lstrip("/")
+            yield name, chunk, int(size * frac)
+    else:
+        out = open_file(path)
+        if not isinstance(out, dict):
+            out = {path.stem: out}
+        for name, df in out.items():
+            yield name, df, size
+
+
+def _import_backend(suffix: str):
+    """Import the optional library needed to read a file format."""
+    if suffix in EXCEL_SUFFIXES:
+        import openpyxl  # noqa: F401
+    elif suffix in PARQUET_SUFFIXES:
+        import pyarrow.parquet  # noqa: F401
+    elif suffix in FEATHER_SUFFIXES:
+        import pyarrow.feather  # noqa: F401
+    elif suffix in HDF5_SUFFIXES:
+        import tables  # noqa: F401
+
+
+class _LoaderSignals(QObject):
+    """Signals to send parsed data from a worker thread to the main thread."""
+
+    yielded = Signal(object)
+    errored = Signal(object)
+    finished = Signal()
+
+
+_EXECUTOR: ThreadPoolExecutor | None = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """
+    Return the thread pool used to parse files.
+
+    Qt's global thread pool is not used because it is also used by Qt itself
+    (such as image scaling in the main thread), which will hang if all the
+    threads in the pool are waiting for the GIL.
+    """
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        _EXECUTOR = ThreadPoolExecutor(
+            max_workers=os.cpu_count(), thread_name_prefix="table-loader"
+        )
+    return _EXECUTOR
+
+
+class TableLoader:
+    """
+    Load a table file into spreadsheets on a worker thread.
+
+    The file is parsed in a thread pool. Parsed chunks are sent to the main
+    thread, where the first chunk is added as a new spreadsheet and the others
+    are appended to it. At most ``MAX_PENDING_CHUNKS`` chunks are parsed ahead
+    of the main thread. Progress is shown as a napari progress bar. Parsing
+    stops when the loaded data exceeds ``max_memory`` bytes. For columnar
+    formats, only ``columns`` are read.
+    """
+
+    # keep running loaders alive until they finish
+    _running: set[TableLoader] = set()
+
+    def __init__(
+        self,
+        table_viewer: TableViewerWidget,
+        path: str | Path,
+        chunk_size: int = CHUNK_SIZE,
+        max_memory: int = MAX_MEMORY,
+        columns: list[str] | None = None,
+    ):
+        self._table_viewer = table_viewer
+        self._path = Path(path)
+        self._chunk_size = chunk_size
+        self._columns = columns
+        self._max_memory = max_memory
+        # bytes of the parsed chunks, counted on the worker thread
+        self._nbytes = 0
+        self._truncated = False
+        # released when a chunk is inserted, so that parsing does not run
+        # ahead of the main thread
+        self._slots = threading.Semaphore(MAX_PENDING_CHUNKS)
+        self._sheets: dict[str, SpreadSheet] = {}
+        # chunks that are not inserted to spreadsheets yet
+        self._pending: list[tuple[str, pd.DataFrame]] = []
+        self._parsed = False
+        self._cancelled = False
+        self._inserting = False
+        self._progress = None
+        self._signals = _LoaderSignals()
+        self._signals.yielded.connect(self._on_yielded)
+        self._signals.errored.connect(self._on_errored)
+        self._signals.finished.connect(self._on_parsed)
+
+    @property
+    def sheets(self) -> list[SpreadSheet]:
+        """Spreadsheets added by this loader."""
+        return list(self._sheets.values())
+
+    @property
+    def is_running(self) -> bool:
+        """True if the file is not completely loaded yet."""
+        return self in self._running
+
+    def start(self) -> TableLoader:
+        """Start loading the file on a worker thread."""
+        from napari.utils import progress
+
+        # missing optional dependencies are reported before starting
+        _import_backend(self._path.suffix)
+        self._progress = progress(
+            total=self._path.stat().st_size,
+            desc=f"Loading {self._path.name}",
+        )
+        self._running.add(self)
+        _get_executor().submit(self._parse)
+        return self
+
+    def cancel(self):
+        """Stop loading the file."""
+        self._cancelled = True
+        self._pending.clear()
+        self._running.discard(self)
+
+    def _parse(self):
+        """Parse the file and send the data to the main thread."""
+        try:
+            for out in _read_table(
+                self._path, self._chunk_size, self._columns
+            ):
+                nbytes = self._nbytes + _memory_usage(out[1])
+                if nbytes > self._max_memory and self._nbytes > 0:
+                    # the first chunk is always loaded
+                    self._truncated = True
+                    break
+                self._nbytes = nbytes
+                if not self._acquire_slot():
+                    break
+                self._signals.yielded.emit(out)
+        except Exception as e:
+            self._signals.errored.emit(e)
+        finally:
+            self._signals.finished.emit()
+
+    def _acquire_slot(self) -> bool:
+        """Wait until a chunk can be sent, return False if cancelled."""
+        while not self._slots.acquire(timeout=0.1):
+            if self._cancelled:
+                return False
+        return not self._cancelled
+
+    def _on_yielded(self, out: tuple[str, pd.DataFrame, int]):
+        if not self.is_running:
+            return self._slots.release()
+        name, chunk, pos = out
+        self._pending.append((name, chunk))
+        # updating progress bar may process events, so the chunk must be
+        # registered before it
+        self._progress.update(pos - self._progress.n)
+        return self._insert_pending()
+
+    def _on_errored(self, exc: Exception):
+        from napari.utils.notifications import notification_manager
+
+        self.cancel()
+        notification_manager.receive_error(type(exc), exc, exc.__traceback__)
+
+    def _on_parsed(self):
+        self._parsed = True
+        self._progress.close()
+        if self.is_running:
+            self._insert_pending()
+
+    def _insert_pending(self):
+        # adding a spreadsheet may process events, which calls this method
+        # again before the first chunk is registered
+        if not self.is_running or self._inserting:
+            return None
+        self._inserting = True
+        try:
+            while self._pending:
+                name, chunk = self._pending[0]
+                if (sheet := self._sheets.get(name)) is None:
+                    self._sheets[name] = self._table_viewer.add_spreadsheet(
+                        chunk, name=name, copy=False
+                    )
+                elif sheet not in self._table_viewer.tables:
+                    return self.cancel()
+                elif sheet.proxy.proxy_type != "none":
+                    # rows cannot be inserted while sorted/filtered
+                    QTimer.singleShot(200, self._insert_pending)
+                    return None
+                else:
+                    append_rows(sheet, chunk)
+                self._pending.pop(0)
+                self._slots.release()
+        finally:
+            self._inserting = False
+        if self._parsed:
+            return self._finish(truncated=self._truncated)
+        return None
+
+    def _finish(self, truncated: bool):
+        self.cancel()
+        if truncated:
+            from napari.utils.notifications import show_warning
+
+            show_warning(
+                f"Loading {self._path.name!r} stopped because it exceeded "
+                f"the memory limit of {self._max_memory} bytes."
+            )
+        else:
+            # source is only set to complete tables, otherwise saving the
+            # spreadsheet would overwrite the file with the truncated data
+            for sheet in self._sheets.values():
+                set_source(sheet, self._path)
+        return None
+
+
+def _memory_usage(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(deep=True).sum())
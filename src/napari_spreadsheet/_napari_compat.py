@@ -0,0 +1,76 @@
+"""
+Access to the private methods of napari layers.
+
+napari has no public API to recalculate the colors of some shapes, or the
+colors mapped from features updated in-place, which is what makes linked
+edits of large layers cheap. All the access to its private methods is
+confined to this module, and it is only used with the versions of napari it
+is known to work with. Otherwise, the public setters that recalculate the
+whole layer are used instead.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import TYPE_CHECKING
+
+import numpy as np
+from napari import __version__
+from napari.layers import Shapes
+
+if TYPE_CHECKING:  # pragma: no cover
+    from napari.layers import Layer
+
+# versions of napari whose private methods are used, as [minimum, maximum)
+NAPARI_VERSION_RANGE = ((0, 4), (0, 5))
+
+
+def is_supported(version: str) -> bool:
+    """True if the private methods of the napari ``version`` can be used."""
+    match = re.match(r"(\d+)\.(\d+)", version)
+    lower, upper = NAPARI_VERSION_RANGE
+    return match is not None and (
+        lower <= tuple(int(v) for v in match.groups()) < upper
+    )
+
+
+SUPPORTED = is_supported(__version__)
+
+
+def color_feature(layer: Layer, attr: str) -> str | None:
+    """Name of the feature that ``{attr}_color`` of a layer is mapped from."""
+    if isinstance(layer, Shapes):
+        return getattr(layer, f"_{attr}_color_property") or None
+    prop = getattr(layer, f"_{attr}").color_properties
+    return None if prop is None else prop.name
+
+
+def refresh_colors(layer: Layer, attr: str) -> None:
+    """
+    Recalculate ``{attr}_color`` of a layer from its features.
+
+    The current colormap or color cycle is kept. Only available if
+    ``SUPPORTED`` is true.
+    """
+    if isinstance(layer, Shapes):
+        layer._refresh_color(attr, update_color_mapping=False)
+        return None
+    manager = getattr(layer, f"_{attr}")
+    name = manager.color_properties.name
+    values = {name: np.asarray(layer.features[name])}
+    manager._refresh_colors(values, update_color_mapping=False)
+    return None
+
+
+def set_shapes_colors(
+    layer: Shapes, attr: str, indices: np.ndarray, colors: np.ndarray
+) -> None:
+    """Set ``{attr}_color`` of the shapes at ``indices`` to RGBA ``colors``."""
+    if SUPPORTED:
+        getattr(layer._data_view, f"update_{attr}_colors")(indices, colors)
+        getattr(layer.events, f"{attr}_color")()
+    else:
+        all_colors = getattr(layer, f"{attr}_color").copy()
+        all_colors[indices] = colors
+        setattr(layer, f"{attr}_color", all_colors)
+    return None
@@ -0,0 +1,102 @@
+"""Lazy proxies of spreadsheets sent to the console."""
+
+from __future__ import annotations
+
+import weakref
+from typing import TYPE_CHECKING, Iterator
+
+from ._tabulous_compat import parse_columns, raw_data, source_shape
+
+if TYPE_CHECKING:  # pragma: no cover
+    import pandas as pd
+    from tabulous.widgets import SpreadSheet
+
+# table -> proxy, so that sending the same table again reuses the proxy
+_PROXIES: weakref.WeakKeyDictionary[
+    SpreadSheet, TableProxy
+] = weakref.WeakKeyDictionary()
+
+
+class TableProxy:
+    """
+    A read-only, live view of the data of a spreadsheet.
+
+    Nothing is copied until a column is accessed, and only the accessed
+    columns are parsed. Columns always reflect the current spreadsheet data.
+    Use ``to_pandas()`` to get a snapshot as a DataFrame.
+    """
+
+    def __init__(self, table: SpreadSheet):
+        self._table_ref = weakref.ref(table)
+        self._name = table.name
+
+    def _table(self) -> SpreadSheet:
+        if (table := self._table_ref()) is None:
+            raise RuntimeError(f"Spreadsheet {self._name!r} is closed.")
+        self._name = table.name
+        return table
+
+    @property
+    def columns(self) -> pd.Index:
+        """Column names of the spreadsheet."""
+        return raw_data(self._table()).columns
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """Shape of the spreadsheet data."""
+        return source_shape(self._table())
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.columns)
+
+    def __contains__(self, key) -> bool:
+        return key in self.columns
+
+    def keys(self) -> pd.Index:
+        """Column names, as ``DataFrame.keys``."""
+        return self.columns
+
+    def __getitem__(self, key: str | list[str]) -> pd.Series | pd.DataFrame:
+        table = self._table()
+        columns = raw_data(table).columns
+        if isinstance(key, list):
+            missing = [k for k in key if k not in columns]
+        else:
+            missing = [key] if key not in columns else []
+        if missing:
+            raise KeyError(missing[0] if len(missing) == 1 else missing)
+        return parse_columns(table, key)
+
+    def __getattr__(self, name: str) -> pd.Series:
+        if name.startswith("_") or name not in self.columns:
+            raise AttributeError(
+                f"{type(self).__name__!r} object has no attribute {name!r}"
+            )
+        return self[name]
+
+    def __dir__(self) -> list[str]:
+        names = [c for c in self.columns if isinstance(c, str)]
+        return sorted(set(super().__dir__()) | set(names))
+
+    def to_pandas(self) -> pd.DataFrame:
+        """Return a copy of the spreadsheet data."""
+        return self._table().data.copy()
+
+    def __repr__(self) -> str:
+        if self._table_ref() is None:
+            return f"{type(self).__name__}({self._name!r}, closed)"
+        nrows, ncols = self.shape  # updates the name
+        return (
+            f"{type(self).__name__}({self._name!r}, {nrows} rows x {ncols} "
+            f"columns: {list(self.columns)!r})"
+        )
+
+
+def table_proxy(table: SpreadSheet) -> TableProxy:
+    """Return the lazy proxy of a spreadsheet."""
+    if (proxy := _PROXIES.get(table)) is None:
+        proxy = _PROXIES[table] = TableProxy(table)
+    return proxy
@@ -1,20 +1,26 @@
 from pathlib import Path
 from typing import Sequence, Union
 
+from ._formats import SUPPORTED_SUFFIXES
+
 PathLike = str
 PathOrPaths = Union[PathLike, Sequence[PathLike]]
 
 
 def get_reader(path: PathOrPaths):
     if isinstance(path, (str, Path)):
-        if Path(path).suffix in (".txt", ".dat", ".csv", ".xlsx"):
+        if Path(path).suffix in SUPPORTED_SUFFIXES:
             return open_table_data
 
     return None
 
 
 def open_table_data(path: PathOrPaths):
-    """Open a table data file in a docked tabulous widget."""
+    """
+    Open table data files in a docked tabulous widget.
+
+    Files are loaded in parallel on worker threads.
+    """
 
     from ._widget import MainWidget
 
@@ -0,0 +1,139 @@
+"""Timers and counters of sync operations."""
+
+from __future__ import annotations
+
+from contextlib import nullcontext
+from functools import wraps
+from time import perf_counter
+from typing import TYPE_CHECKING, Callable, ContextManager, TypeVar
+
+if TYPE_CHECKING:  # pragma: no cover
+    import pandas as pd
+
+_F = TypeVar("_F", bound=Callable)
+
+# Statistics are collected only if enabled. Instrumented functions check this
+# flag first so that the overhead is a single global lookup when disabled.
+_enabled = False
+
+
+class _Record:
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+
+_TIMERS: dict[str, _Record] = {}
+_COUNTERS: dict[str, int] = {}
+
+
+def enable_stats(enabled: bool = True):
+    """Enable or disable collecting statistics of sync operations."""
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def is_stats_enabled() -> bool:
+    """True if statistics of sync operations are collected."""
+    return _enabled
+
+
+def reset_stats():
+    """Clear all the collected statistics."""
+    _TIMERS.clear()
+    _COUNTERS.clear()
+
+
+def stats() -> pd.DataFrame:
+    """
+    Return the collected statistics as a DataFrame.
+
+    Timers have the number of calls and the total, mean and maximum time
+    (sec) of each operation. Time of nested operations is also included in
+    the outer ones. Counters only have the "count" column.
+    """
+    import pandas as pd
+
+    names = sorted(_TIMERS)
+    df = pd.DataFrame(
+        {
+            "count": [_TIMERS[n].count for n in names],
+            "total": [_TIMERS[n].total for n in names],
+            "mean": [_TIMERS[n].total / _TIMERS[n].count for n in names],
+            "max": [_TIMERS[n].max for n in names],
+        },
+        index=pd.Index(names, name="name", dtype=object),
+    )
+    counters = pd.DataFrame(
+        {"count": [_COUNTERS[n] for n in sorted(_COUNTERS)]},
+        index=pd.Index(sorted(_COUNTERS), name="name", dtype=object),
+    )
+    if counters.empty:
+        return df
+    return pd.concat([df, counters])
+
+
+def count(name: str, n: int = 1):
+    """Increment a counter."""
+    if _enabled:
+        _COUNTERS[name] = _COUNTERS.get(name, 0) + n
+
+
+def _add_time(name: str, dt: float):
+    if (rec := _TIMERS.get(name)) is None:
+        rec = _TIMERS[name] = _Record()
+    rec.count += 1
+    rec.total += dt
+    if dt > rec.max:
+        rec.max = dt
+
+
+class _Timer:
+    __slots__ = ("_name", "_t0")
+
+    def __init__(self, name: str):
+        self._name = name
+
+    def __enter__(self):
+        self._t0 = perf_counter()
+        return self
+
+    def __exit__(self, *_):
+        _add_time(self._name, perf_counter() - self._t0)
+
+
+_NULL_TIMER = nullcontext()
+
+
+def timer(name: str) -> ContextManager:
+    """Return a context manager that measures the time of an operation."""
+    if _enabled:
+        return _Timer(name)
+    return _NULL_TIMER
+
+
+def timed(name: str) -> Callable[[_F], _F]:
+    """
+    Decorate a function to measure its time as operation ``name``.
+
+    Attributes of the function are kept, so that a decorated singledispatch
+    function can still be registered.
+    """
+
+    def _decorator(func: _F) -> _F:
+        @wraps(func)
+        def _func(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            t0 = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _add_time(name, perf_counter() - t0)
+
+        return _func
+
+    return _decorator
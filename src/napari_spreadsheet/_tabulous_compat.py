@@ -0,0 +1,130 @@
+"""
+Access to the private state of tabulous spreadsheets.
+
+tabulous has no public API to read the unparsed cells of a spreadsheet, which
+is what makes the lazy and partial conversions of this plugin cheap. All the
+access to its private attributes is confined to this module, and the versions
+of tabulous it is known to work with are checked on import.
+"""
+
+from __future__ import annotations
+
+import re
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Sequence
+
+import tabulous
+
+if TYPE_CHECKING:  # pragma: no cover
+    import pandas as pd
+    from tabulous.widgets import SpreadSheet
+
+# supported versions of tabulous, as [minimum, maximum)
+TABULOUS_VERSION_RANGE = ((0, 5), (0, 6))
+
+
+def check_version(version: str) -> None:
+    """Raise ImportError if the tabulous ``version`` is not supported."""
+    match = re.match(r"(\d+)\.(\d+)", version)
+    lower, upper = TABULOUS_VERSION_RANGE
+    if match is None or not (
+        lower <= tuple(int(v) for v in match.groups()) < upper
+    ):
+        raise ImportError(
+            f"napari-spreadsheet requires tabulous>={lower[0]}.{lower[1]},"
+            f"<{upper[0]}.{upper[1]} but {version} is installed."
+        )
+    return None
+
+
+check_version(tabulous.__version__)
+
+
+def raw_data(sheet: SpreadSheet) -> pd.DataFrame:
+    """
+    Return the cell strings of a spreadsheet.
+
+    Rows are those of the table data, including the ones hidden by the sort
+    or filter of the view. The returned DataFrame must not be edited.
+    """
+    return sheet.native._data_raw
+
+
+def source_shape(sheet: SpreadSheet) -> tuple[int, int]:
+    """Shape of the table data, including the hidden rows."""
+    return sheet.native._data_raw.shape
+
+
+def parse_columns(
+    sheet: SpreadSheet, columns: str | Sequence[str]
+) -> pd.Series | pd.DataFrame:
+    """
+    Parse given columns of a spreadsheet in the same way as ``sheet.data``.
+
+    Other columns are not parsed. The output can be edited without affecting
+    the spreadsheet.
+    """
+    qsheet = sheet.native
+    cached = qsheet._data_cache is not None
+    out = qsheet._get_sub_frame(columns)
+    # a column of the parsed data must not be edited in-place
+    return out.copy() if cached else out
+
+
+@contextmanager
+def proxy_released(sheet: SpreadSheet):
+    """
+    Release the sort/filter proxy of a spreadsheet in this context.
+
+    Unlike ``sheet.proxy.released()``, the buttons in the header are kept
+    where they are, instead of being removed and installed again.
+    """
+    qsheet = sheet.native
+    obj = sheet.proxy.obj
+    qsheet.setProxy(None, clear_header_widgets=False)
+    try:
+        yield
+    finally:
+        qsheet.setProxy(obj, clear_header_widgets=False)
+
+
+def read_csv_kwargs(sheet: SpreadSheet, name: str) -> dict[str, Any]:
+    """Keyword arguments of ``pd.read_csv`` to parse the column ``name``."""
+    dtype_map = sheet.native._columns_dtype.copy()
+    for key in list(dtype_map):
+        if key != name:
+            del dtype_map[key]
+    return dtype_map.as_pandas_kwargs()
+
+
+def append_rows(sheet: SpreadSheet, df: pd.DataFrame) -> None:
+    """Append rows to a spreadsheet without undo history and animation."""
+    qsheet = sheet.native
+    nrows = qsheet._data_raw.shape[0]
+    with sheet.undo_manager.blocked():
+        with qsheet._anim_row.using_animation(False):
+            qsheet.insertRows(nrows, len(df), df.astype("string"))
+    return None
+
+
+def set_source(sheet: SpreadSheet, path: str | Path) -> None:
+    """Set the file a spreadsheet is saved to."""
+    from tabulous.widgets._source import Source
+
+    sheet._source = Source(path)
+    return None
+
+
+def get_index_col(path: str | Path) -> int | None:
+    """Return the index column of a text table file, as tabulous reads it."""
+    from tabulous._io import _get_index_col
+
+    return _get_index_col(path)
+
+
+def open_file(path: str | Path) -> pd.DataFrame | dict[str, pd.DataFrame]:
+    """Open a table file in the same way as tabulous."""
+    from tabulous._io import open_file
+
+    return open_file(path)
@@ -0,0 +1,11 @@
+import gc
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _collect_garbage():
+    # Widgets not added to the viewer are deleted by garbage collection. If
+    # it happens while napari lists the top-level widgets, Qt crashes.
+    yield
+    gc.collect()
@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose
+from tabulous.color import normalize_color
+
+from napari_spreadsheet import _color, enable_stats, reset_stats, stats
+from napari_spreadsheet._color import (
+    ColorLookup,
+    hex_to_rgba,
+    rgba_to_categorical,
+    rgba_to_hex,
+)
+
+
+def _random_rgba8(n: int = 100):
+    rgba8 = np.random.default_rng(0).integers(0, 256, size=(n, 4))
+    rgba8[::2, 3] = 255
+    return rgba8
+
+
+def test_rgba_to_hex():
+    rgba8 = _random_rgba8()
+    expected = [normalize_color(x).html for x in rgba8]
+    assert rgba_to_hex(rgba8 / 255).tolist() == expected
+    assert rgba_to_categorical(rgba8 / 255).tolist() == expected
+
+
+def test_rgba_to_hex_rounding():
+    rgba = np.array(
+        [[0.999, 0.003, 0.25, 1], [1, 0, 0, 0.999], [1, 0, 0, 0.998]],
+        dtype=np.float32,
+    )
+    # channels are rounded, not truncated as normalize_color(x * 255) does
+    expected = ["#FF0140", "#FF0000", "#FF0000FE"]
+    assert rgba_to_hex(rgba).tolist() == expected
+    assert rgba_to_categorical(rgba).tolist() == expected
+    assert normalize_color(rgba[0] * 255).html == "#FE003F"
+    # 8-bit colors stored as float32 are converted exactly
+    rgba8 = np.arange(256)[:, np.newaxis].repeat(4, axis=1)
+    rgba32 = (rgba8 / 255).astype(np.float32)
+    expected = [normalize_color(x).html for x in rgba8]
+    assert rgba_to_hex(rgba32).tolist() == expected
+
+
+def test_rgba_to_categorical_unique():
+    rgba = np.array([[1, 0, 0, 1], [0, 1, 0, 1], [1, 0, 0, 1]])
+    cat = rgba_to_categorical(rgba)
+    assert len(cat.categories) == 2
+    assert cat.tolist() == ["#FF0000", "#00FF00", "#FF0000"]
+
+
+def test_hex_to_rgba():
+    rgba8 = _random_rgba8()
+    assert_allclose(hex_to_rgba(rgba_to_hex(rgba8 / 255)), rgba8 / 255)
+    assert_allclose(
+        hex_to_rgba(["red", "#ff000080", "#00FF00"]),
+        [[1, 0, 0, 1], [1, 0, 0, 128 / 255], [0, 1, 0, 1]],
+    )
+    assert hex_to_rgba([]).shape == (0, 4)
+
+
+def test_hex_to_rgba_missing():
+    with pytest.raises(ValueError):
+        hex_to_rgba(["#FF0000", None])
+
+
+def test_color_lookup():
+    reset_stats()
+    enable_stats()
+    try:
+        lookup = ColorLookup(["#FF0000", "blue", "", "#FF0000"], opacity=0.5)
+        parsed = stats()
+        assert lookup("#FF0000") == (255, 0, 0, 127)
+        assert lookup("blue") == (0, 0, 255, 127)
+        assert lookup("") is None
+        # precomputed colors are not parsed again
+        assert stats().equals(parsed)
+        assert lookup("#00FF0080") == (0, 255, 0, 127)
+        green = (*normalize_color("green")[:3], 127)
+        assert lookup("green") == green
+        assert lookup("green") == green
+        assert stats().loc["normalize_color", "count"] == 2
+    finally:
+        enable_stats(False)
+        reset_stats()
+
+
+def test_color_lookup_limits(monkeypatch):
+    monkeypatch.setattr(_color, "_MAX_PRECOMPUTED", 4)
+    monkeypatch.setattr(_color, "_PRECOMPUTE_CHUNK", 3)
+    colors = [f"#00000{i}" for i in range(1, 7)]
+    # colors are parsed in chunks, up to the maximum number
+    lookup = ColorLookup(colors)
+    assert list(lookup._colors) == colors[:4]
+    assert lookup("#000006") == (0, 0, 6, 255)
+    # the oldest colors are evicted
+    lookup.update(["#00000A", "#00000B"])
+    assert list(lookup._colors) == colors[2:4] + ["#00000A", "#00000B"]
+    # a chunk with invalid colors does not prevent the others
+    lookup = ColorLookup(["#000001", "#000002", "#000003", "?", "#000005"])
+    assert list(lookup._colors) == ["#000001", "#000002", "#000003"]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1000])
+def test_chunked_conversion(chunk_size: int):
+    rgba8 = _random_rgba8()[np.random.default_rng(1).integers(0, 100, 500)]
+    cat = rgba_to_categorical(rgba8 / 255)
+    chunked = rgba_to_categorical(
+        rgba8 / 255, chunk_size=chunk_size, max_workers=4
+    )
+    assert chunked.tolist() == cat.tolist()
+    assert chunked.categories.tolist() == cat.categories.tolist()
+    assert_allclose(
+        hex_to_rgba(cat, chunk_size=chunk_size, max_workers=4),
+        hex_to_rgba(cat),
+    )
+    assert (
+        rgba_to_categorical(np.zeros((0, 4)), chunk_size=chunk_size).size == 0
+    )
@@ -1,6 +1,9 @@
 import napari
+import numpy as np
+import pandas as pd
 
 from napari_spreadsheet import MainWidget
+from napari_spreadsheet._conversion import spreadsheet_to_layer
 from numpy.testing import assert_allclose
 
 
@@ -38,7 +41,7 @@ def test_points_link_unlink(make_napari_viewer):
     layer = viewer.add_points([[0, 0], [0, 1], [1, 0]])
     wdt.layer_to_spreadsheet(layer)
     table = wdt._table_viewer.current_table
-    wdt.link_spreadsheet_and_layer()
+    wdt.link_spreadsheet_and_layer(latency=0)
     table.cell[0, 0] = -1
     assert layer.data[0, 0] == -1
     wdt.unlink_spreadsheet_and_layer()
@@ -54,7 +57,7 @@ def test_shapes_link_unlink(make_napari_viewer):
     layer = viewer.add_shapes([[0, 0], [0, 1], [1, 0], [1, 1]])
     wdt.layer_to_spreadsheet(layer)
     table = wdt._table_viewer.current_table
-    wdt.link_spreadsheet_and_layer()
+    wdt.link_spreadsheet_and_layer(latency=0)
     table.cell[0, 0] = "#FF0000"
     assert_allclose(layer.face_color[0], [1, 0, 0, 1])
     wdt.unlink_spreadsheet_and_layer()
@@ -70,10 +73,517 @@ def test_vectors_link_unlink(make_napari_viewer):
     layer = viewer.add_vectors([[[1, 1], [1, 1]]])
     wdt.layer_to_spreadsheet(layer)
     table = wdt._table_viewer.current_table
-    wdt.link_spreadsheet_and_layer()
+    wdt.link_spreadsheet_and_layer(latency=0)
     table.cell[0, 0] = -1
     assert layer.data[0, 0, 0] == -1
     wdt.unlink_spreadsheet_and_layer()
     assert layer.data[0, 0, 0] == -1
     table.cell[0, 0] = -2
     assert layer.data[0, 0, 0] == -1
+
+
+def test_points_color_round_trip(make_napari_viewer):
+    viewer: napari.Viewer = make_napari_viewer()
+    wdt = MainWidget(viewer)
+
+    layer = viewer.add_points(
+        [[0, 0], [0, 1], [1, 0]],
+        face_color=["red", "#00FF0080", "red"],
+    )
+    wdt.layer_to_spreadsheet(layer)
+    table = wdt._table_viewer.current_table
+    assert table.data["face_color"].tolist() == [
+        "#FF0000",
+        "#00FF0080",
+        "#FF0000",
+    ]
+    table.cell[1, 2] = "#0000FF"
+    wdt.spreadsheet_to_layer()
+    assert_allclose(layer.face_color[1], [0, 0, 1, 1])
+
+
+def test_color_lookup_update(make_napari_viewer):
+    viewer: napari.Viewer = make_napari_viewer()
+    wdt = MainWidget(viewer)
+
+    layer = viewer.add_points([[0, 0], [0, 1], [1, 0]], face_color="red")
+    wdt.layer_to_spreadsheet(layer)
+    table = wdt._table_viewer.current_table
+    lookup = table.background_color.get("face_color")
+    lookup._parse_one.cache_clear()
+
+    # edited colors are parsed in advance, not on painting
+    table.cell[1, 2] = "#0000FF"
+    assert lookup("#0000FF") == (0, 0, 255, 127)
+    # so are the colors written by the linked layer
+    wdt.link_spreadsheet_and_layer(latency=0)
+    layer.face_color = ["red", "#0000FF", "#00FF00"]
+    assert lookup("#00FF00") == (0, 255, 0, 127)
+    assert lookup._parse_one.cache_info().misses == 0
+
+
+def test_points_link_rows(make_napari_viewer, qtbot):
+    viewer: napari.Viewer = make_napari_viewer()
+    wdt = MainWidget(viewer)
+
+    layer = viewer.add_points([[0, 0], [0, 1], [1, 0]], size=3)
+    wdt.layer_to_spreadsheet(layer)
+    table = wdt._table_viewer.current_table
+    wdt.link_spreadsheet_and_layer()
+    linker = table.metadata["spreadsheet-source"].linker
+    table.cell[1, 5] = 5
+    qtbot.waitUntil(lambda: layer.size[1, 0] == 5, timeout=1000)
+    assert_allclose(layer.size[:, 0], [3, 5, 3])
+    layer.add([2, 2])
+    assert table.data.shape[0] == 4
+    assert table.data.iloc[3, :2].tolist() == [2, 2]
+    layer.selected_data = {0, 2}
+    layer.remove_selected()
+    assert table.data.iloc[:, :2].values.tolist() == [[0, 1], [2, 2]]
+    assert table.data["size"].tolist() == [5, 3]
+    layer.data = [[3, 3]]
+    linker.flush()
+    assert table.data.iloc[:, :2].values.tolist() == [[3, 3]]
+
+
+def test_spreadsheet_to_points_columns(make_napari_viewer):
+    viewer: napari.Viewer = make_napari_viewer()
+    wdt = MainWidget(viewer)
+
+    layer = viewer.add_points([[0, 0], [0, 1], [1, 0]], size=3)
+    wdt.layer_to_spreadsheet(layer)
+    table = wdt._table_viewer.current_table
+    table.cell[0, 0] = -1
+    table.cell[0, 5] = 5
+    emitted = []
+    layer.events.data.connect(lambda e: emitted.append("data"))
+    layer.events.face_color.connect(lambda e: emitted.append("face_color"))
+    spreadsheet_to_layer(layer, table, columns=["size"])
+    assert emitted == []
+    assert layer.size[0, 0] == 5
+    assert layer.data[0, 0] == 0
+    emitted.clear()
+    spreadsheet_to_layer(layer, table)
+    assert emitted == ["data"]
+    assert layer.data[0, 0] == -1
+
+
+def test_points_link_latency(make_napari_viewer, qtbot):
+    viewer: napari.Viewer = make_napari_viewer()
+    wdt = MainWidget(viewer)
+
+    layer = viewer.add_points([[0, 0], [0, 1], [1, 0]])
+    wdt.layer_to_spreadsheet(layer)
+    table = wdt._table_viewer.current_table
+    wdt.link_spreadsheet_and_layer(latency=50)
+    linker = table.metadata["spreadsheet-source"].linker
+    table.cell[0, 0] = -1
+    table.cell[2, 1] = -2
+    assert layer.data[0, 0] == 0
+    qtbot.waitUntil(lambda: layer.data[0, 0] == -1, timeout=1000)
+    assert layer.data[2, 1] == -2
+
+    layer.data[1] = [5, 5]
+    layer.events.data(value=layer.data)
+    assert table.data.iloc[1, 0] == 0
+    linker.flush()
+    assert table.data.iloc[1, :2].tolist() == [5, 5]
+
+
+def test_link_default_latency(make_napari_viewer, qtbot):
+    viewer: napari.Viewer = make_napari_viewer()
+    wdt = MainWidget(viewer)
+
+    layer = viewer.add_points([[0, 0], [0, 1], [1, 0]])
+    wdt.layer_to_spreadsheet(layer)
+    table = wdt._table_viewer.current_table
+    wdt.link_spreadsheet_and_layer()
+    linker = table.metadata["spreadsheet-source"].linker
+    assert linker.latency == wdt.link_latency > 0
+    table.cell[0, 0] = -1
+    table.cell[1, 1] = -2
+    assert layer.data[0, 0] == 0
+    qtbot.waitUntil(lambda: layer.data[0, 0] == -1, timeout=1000)
+    assert layer.data[1, 1] == -2
+
+
+def test_pending_edits_on_row_removal(make_napari_viewer, qtbot):
+    viewer: napari.Viewer = make_napari_viewer()
+    wdt = MainWidget(viewer)
+
+    layer = viewer.add_points([[1, 1], [2, 2], [3, 3], [4, 4]])
+    wdt.layer_to_spreadsheet(layer)
+    table = wdt._table_viewer.current_table
+    wdt.link_spreadsheet_and_layer()
+    linker = table.metadata["spreadsheet-source"].linker
+
+    # rows of the pending edit are shifted
+    table.cell[2, 0] = 50
+    layer.selected_data = {0}
+    layer.remove_selected()
+    qtbot.waitUntil(lambda: linker._pending_range is None, timeout=1000)
+    assert_allclose(layer.data, [[2, 2], [50, 3], [4, 4]])
+    assert_allclose(table.data.iloc[:, :2], layer.data)
+
+    # edits of the removed rows are dropped
+    table.cell[1, 1] = 60
+    layer.selected_data = {1}
+    layer.remove_selected()
+    qtbot.waitUntil(lambda: linker._pending_range is None, timeout=1000)
+    assert_allclose(layer.data, [[2, 2], [4, 4]])
+    assert_allclose(table.data.iloc[:, :2], layer.data)
+
+
+def test_link_coordinates_in_place(make_napari_viewer):
+    viewer: napari.Viewer = make_napari_viewer()
+    wdt = MainWidget(viewer)
+
+    layer = viewer.add_points([[0.0, 0.0], [0.0, 1.0], [1.0, 0.0]])
+    wdt.layer_to_spreadsheet(layer)
+    table = wdt._table_viewer.current_table
+    wdt.link_spreadsheet_and_layer(latency=0)
+    data = layer.data
+    table.cell[1, 0] = 2.5
+    assert layer.data is data
+    assert_allclose(layer.data[1], [2.5, 1])
+    table.cell[1, 0] = 100
+    assert layer.data is data
+    assert_allclose(layer.extent.data, [[0, 0], [100, 1]])
+    assert viewer.dims.range[0][1] >= 100
+
+    vectors = viewer.add_vectors(
+        np.array([[[0, 0], [1, 1]], [[2, 2], [1, 0]]], dtype=float)
+    )
+    wdt.layer_to_spreadsheet(vectors)
+    table = wdt._table_viewer.current_table
+    wdt.link_spreadsheet_and_layer(latency=0)
+    table.cell[0, 3] = 0.5
+    assert_allclose(vectors.data[0], [[0, 0], [1, 0.5]])
+    data = vectors.data
+    table.cell[1, 2] = 4
+    assert vectors.data is data
+    assert_allclose(vectors.data[1], [[2, 2], [4, 0]])
+
+
+def test_features_link(make_napari_viewer):
+    viewer: napari.Viewer = make_napari_viewer()
+    wdt = MainWidget(viewer)
+
+    layer = viewer.add_points(
+        [[0, 0], [0, 1], [1, 0]],
+        features={"a": [0.0, 0.5, 1.0], "b": ["x", "y", "z"]},
+        face_color="a",
+        face_colormap="gray",
+    )
+    wdt.link_spreadsheet_and_features(layer, latency=0)
+    table = wdt._table_viewer.current_table
+    features = layer.features
+
+    # sheet -> layer
+    table.cell[2, 0] = "0.0"
+    assert layer.features is features
+    assert layer.features["a"].tolist() == [0.0, 0.5, 0.0]
+    assert_allclose(layer.face_color[2], [0, 0, 0, 1])
+
+    # layer -> sheet
+    layer.features = {"a": [0.0, 0.5, 0.0], "b": ["x", "w", "z"]}
+    assert table.data["b"].tolist() == ["x", "w", "z"]
+    layer.selected_data = {0}
+    layer.remove_selected()
+    assert table.data["b"].tolist() == ["w", "z"]
+    layer.add([2, 2])
+    assert table.data.shape[0] == 3
+    assert table.data["b"].tolist()[:2] == ["w", "z"]
+
+    # layer points cannot be added from the sheet
+    table.index.insert(0, 1)
+    assert table.data.shape[0] == 3
+
+    wdt.unlink_spreadsheet_and_layer()
+    table.cell[0, 1] = "v"
+    assert layer.features["b"][0] == "w"
+
+
+def test_features_link_missing_values(make_napari_viewer):
+    viewer: napari.Viewer = make_napari_viewer()
+    wdt = MainWidget(viewer)
+
+    layer = viewer.add_points(
+        np.zeros((6, 2)),
+        features={
+            "a": [np.nan, 1.0, np.nan, 2.0, np.nan, 3.0],
+            "b": pd.array([1, None, 3, None, 5, 6], dtype="Int64"),
+            "c": ["x", None, "z", "w", None, "v"],
+        },
+    )
+    wdt.link_spreadsheet_and_features(layer, latency=0)
+    table = wdt._table_viewer.current_table
+    linker = table.metadata["spreadsheet-source"].linker
+    written = []
+    write_rows = linker._write_rows
+    linker._write_rows = lambda key, rows: (
+        written.append((key, rows.tolist())),
+        write_rows(key, rows),
+    )
+
+    # missing values are not changes
+    features = layer.features.copy()
+    features.loc[1, "c"] = "q"
+    layer.features = features
+    assert written == [("a", []), ("b", []), ("c", [1])]
+    assert table.data["c"].tolist()[:2] == ["x", "q"]
+
+    # missing values are written to the sheet
+    written.clear()
+    features = layer.features.copy()
+    features.loc[1, "a"] = np.nan
+    features.loc[2, "b"] = pd.NA
+    features.loc[0, "c"] = None
+    layer.features = features
+    assert written == [("a", [1]), ("b", [2]), ("c", [0])]
+    assert (
+        table.data.isna().values.tolist()
+        == layer.features.isna().values.tolist()
+    )
+
+    # and back to the layer
+    table.cell[3, 0] = ""
+    assert np.isnan(layer.features["a"][3])
+    assert layer.features.isna().sum().tolist() == [5, 3, 2]
+
+
+def test_tracks_link(make_napari_viewer):
+    viewer: napari.Viewer = make_napari_viewer()
+    wdt = MainWidget(viewer)
+
+    data = [[0, 0, 1, 1], [0, 1, 2, 2], [1, 0, 5, 5], [1, 1, 6, 6]]
+    layer = viewer.add_tracks(data)
+    wdt.layer_to_spreadsheet(layer)
+    table = wdt._table_viewer.current_table
+    assert table.data.shape == (4, 4)
+    assert table.columns[0] == "track_id"
+    wdt.link_spreadsheet_and_layer(latency=0)
+    table.cell[1, 2] = -1
+    assert layer.data[1, 2] == -1
+    layer.data = np.array(data) * 2
+    assert table.data.iloc[:, 2].tolist() == [2, 4, 10, 12]
+
+
+def test_labels_link(make_napari_viewer, qtbot):
+    viewer: napari.Viewer = make_napari_viewer()
+    wdt = MainWidget(viewer)
+
+    data = np.zeros((6, 6), dtype=np.uint8)
+    data[0:2, 0:3] = 1
+    data[3:6, 4:6] = 4
+    layer = viewer.add_labels(data)
+    wdt.layer_to_spreadsheet(layer)
+    table = wdt._table_viewer.current_table
+    df = table.data
+    assert df["label"].tolist() == [1, 4]
+    assert df["area"].tolist() == [6, 6]
+    assert_allclose(df.iloc[:, 2:4], [[0.5, 1.0], [4.0, 4.5]])
+    assert df.iloc[:, 4:].values.tolist() == [[0, 0, 2, 3], [3, 4, 6, 6]]
+
+    wdt.link_spreadsheet_and_layer(latency=0)
+    new = data.copy()
+    new[5, 0] = 2
+    layer.data = new
+    assert table.data["label"].tolist() == [1, 2, 4]
+    new = new.copy()
+    new[0, 3] = 1
+    layer.data = new
+    assert table.data["area"].tolist() == [7, 1, 6]
+    # statistics are read-only
+    table.cell[0, 1] = 100
+    assert table.data["area"].tolist() == [7, 1, 6]
+    layer.brush_size = 1
+    layer.paint((5, 0), 1)
+    qtbot.waitUntil(lambda: table.data["label"].tolist() == [1, 4])
+    assert table.data["area"].tolist() == [8, 6]
+
+
+def test_surface_link(make_napari_viewer):
+    viewer: napari.Viewer = make_napari_viewer()
+    wdt = MainWidget(viewer)
+
+    vertices = np.array([[0, 0], [0, 20], [10, 0], [10, 10]], dtype=float)
+    faces = np.array([[0, 1, 2], [1, 2, 3]])
+    values = np.linspace(0, 1, len(vertices))
+    layer = viewer.add_surface((vertices, faces, values))
+    wdt.layer_to_spreadsheet(layer)
+    table = wdt._table_viewer.current_table
+    assert table.data.shape == (4, 3)
+    wdt.link_spreadsheet_and_layer(latency=0)
+    table.cell[1, 0] = 5
+    assert layer.vertices[1, 0] == 5
+    table.cell[2, 2] = 0.25
+    assert layer.vertex_values[2] == 0.25
+    layer.vertex_values = values * 2
+    assert_allclose(table.data["value"], values * 2)
+
+
+def test_shapes_vertices_round_trip(make_napari_viewer):
+    viewer: napari.Viewer = make_napari_viewer()
+    wdt = MainWidget(viewer)
+
+    data = [
+        np.array([[0, 0], [1, 1], [0, 1]]),
+        np.array([[2, 2], [3, 3]]),
+        np.array([[0, 0], [2, 2]]),
+    ]
+    layer = viewer.add_shapes(
+        data, shape_type=["polygon", "path", "rectangle"]
+    )
+    wdt.shapes_vertices_to_spreadsheet(layer)
+    table = wdt._table_viewer.current_table
+    df = table.data
+    assert df.shape[0] == 9
+    assert list(df["shape_id"]) == [0, 0, 0, 1, 1, 2, 2, 2, 2]
+    assert list(df["vertex_index"]) == [0, 1, 2, 0, 1, 0, 1, 2, 3]
+
+    # rows are grouped by shape_id and sorted by vertex_index
+    table.data = df.iloc[::-1].reset_index(drop=True)
+    table.cell[0, 4] = 5
+    wdt.spreadsheet_to_shapes_vertices()
+    assert layer.shape_type == ["polygon", "path", "rectangle"]
+    assert_allclose(layer.data[0], data[0])
+    assert_allclose(layer.data[1], data[1])
+    assert_allclose(layer.data[2], [[0, 0], [2, 0], [2, 2], [0, 5]])
+
+
+def test_points_link_selection(make_napari_viewer):
+    viewer: napari.Viewer = make_napari_viewer()
+    wdt = MainWidget(viewer)
+
+    layer = viewer.add_points([[0, 3], [1, 1], [2, 2], [3, 0]])
+    wdt.layer_to_spreadsheet(layer)
+    table = wdt._table_viewer.current_table
+    wdt.link_spreadsheet_and_layer(latency=0)
+    layer.selected_data = {1, 2}
+    assert [sl for sl, _ in table.selections] == [slice(1, 3)]
+    table.selections = [(slice(3, 4), slice(0, 1))]
+    assert layer.selected_data == {3}
+
+    # rows of a sorted view are mapped to the layer indices
+    table.proxy.sort(table.columns[1])
+    layer.selected_data = {0, 1}
+    assert [sl for sl, _ in table.selections] == [slice(1, 2), slice(3, 4)]
+    table.selections = [(slice(0, 2), slice(0, 1))]
+    assert layer.selected_data == {1, 3}
+
+    # hidden rows are not selected
+    table.proxy.filter(lambda df: df.iloc[:, 0] > 1)
+    layer.selected_data = {0, 3}
+    assert [sl for sl, _ in table.selections] == [slice(1, 2)]
+    table.selections = [(slice(0, 1), slice(0, 1))]
+    assert layer.selected_data == {2}
+
+
+def test_points_link_scattered_selection(make_napari_viewer):
+    viewer: napari.Viewer = make_napari_viewer()
+    wdt = MainWidget(viewer)
+
+    layer = viewer.add_points(np.random.random((200, 2)))
+    wdt.layer_to_spreadsheet(layer)
+    table = wdt._table_viewer.current_table
+    wdt.link_spreadsheet_and_layer(latency=0)
+
+    # ranges of a scattered selection are merged over the smallest gaps
+    selected = set(range(0, 100, 2)) | {150, 151, 180}
+    layer.selected_data = selected
+    rows = [sl for sl, _ in table.selections]
+    assert len(rows) == 32
+    assert rows[-2:] == [slice(150, 152), slice(180, 181)]
+    covered = {i for sl in rows for i in range(sl.start, sl.stop)}
+    assert covered >= selected
+    assert len(covered) == len(selected) + 20
+    assert layer.selected_data == selected
+
+
+def test_points_link_sorted_filtered(make_napari_viewer):
+    viewer: napari.Viewer = make_napari_viewer()
+    wdt = MainWidget(viewer)
+
+    layer = viewer.add_points([[0, 3], [1, 1], [2, 2], [3, 0]], size=3)
+    wdt.layer_to_spreadsheet(layer)
+    table = wdt._table_viewer.current_table
+    wdt.link_spreadsheet_and_layer(latency=0)
+    table.proxy.sort(table.columns[1])
+
+    # cells of the sorted view are mapped to the layer elements
+    table.cell[0, 0] = 10
+    assert_allclose(layer.data[:, 0], [0, 1, 2, 10])
+    layer.size = np.array([3, 3, 5, 3])
+    layer.events.size()
+    assert table.data["size"].tolist() == [3, 3, 5, 3]
+    assert table.proxy.proxy_type == "sort"
+    # the update is recorded as one step of the undo history
+    table.undo_manager.undo()
+    assert table.data["size"].tolist() == [3, 3, 3, 3]
+    assert table.proxy.proxy_type == "sort"
+    table.undo_manager.redo()
+    assert table.data["size"].tolist() == [3, 3, 5, 3]
+    assert table.proxy.proxy_type == "sort"
+
+    # the filter is kept after the rows of the layer change
+    table.proxy.filter(lambda df: df["size"] > 3)
+    assert table.cell[0, 0] == "2"
+    layer.add([4, 4])
+    assert table.data.shape[0] == 5
+    assert table.proxy.proxy_type == "filter"
+    table.cell[0, 0] = 20
+    assert_allclose(layer.data[:, 0], [0, 1, 20, 10, 4])
+
+
+def test_layers_to_spreadsheets(make_napari_viewer, qtbot):
+    viewer: napari.Viewer = make_napari_viewer()
+    wdt = MainWidget(viewer)
+
+    points = viewer.add_points([[0, 0], [0, 1], [1, 0]])
+    vectors = viewer.add_vectors(np.zeros((2, 2, 2)))
+    viewer.add_points([[3, 3]], name="other")
+    tables = wdt._table_viewer.tables
+    n0 = len(tables)
+    worker = wdt.layers_to_spreadsheets([points, vectors])
+    qtbot.waitUntil(lambda: len(tables) == n0 + 2)
+    assert [t.name for t in list(tables)[n0:]] == [points.name, vectors.name]
+    assert tables[n0].data.shape[0] == 3
+    assert tables[n0 + 1].metadata["spreadsheet-source"].layer is vectors
+    qtbot.waitUntil(lambda: not worker.is_running)
+
+    worker = wdt.layers_to_spreadsheets(napari.layers.Points, concat=True)
+    qtbot.waitUntil(lambda: len(tables) == n0 + 3)
+    df = tables[n0 + 2].data
+    assert df["layer"].tolist() == [points.name] * 3 + ["other"]
+    assert_allclose(df.iloc[3, 1:3].astype(float), [3, 3])
+    qtbot.waitUntil(lambda: not worker.is_running)
+
+
+def test_widget_matches_headless_conversion(make_napari_viewer):
+    from napari_spreadsheet import dataframe_to_layer_data, layer_to_dataframe
+
+    viewer: napari.Viewer = make_napari_viewer()
+    wdt = MainWidget(viewer)
+
+    layer = viewer.add_points(
+        np.random.random((10, 3)),
+        face_color=np.random.random((10, 4)),
+        size=np.arange(10),
+    )
+    viewer.dims.axis_labels = ["z", "y", "x"]
+    wdt.layer_to_spreadsheet(layer)
+    table = wdt._table_viewer.tables[-1]
+    df = layer_to_dataframe(
+        (layer.data, {"face_color": layer.face_color, "size": 1}, "points"),
+        ["z", "y", "x"],
+    )
+    assert list(table.data.columns[:3]) == ["data_z", "data_y", "data_x"]
+    assert_allclose(table.data.iloc[:, :3], df.iloc[:, :3])
+    assert table.data["face_color"].tolist() == df["face_color"].tolist()
+
+    # the spreadsheet converts back to the layer data
+    data, kwargs, _ = dataframe_to_layer_data(table.data, "points")
+    assert_allclose(data, layer.data)
+    assert_allclose(kwargs["face_color"], layer.face_color, atol=1 / 255)
+    assert_allclose(kwargs["size"], layer.size[:, 0])
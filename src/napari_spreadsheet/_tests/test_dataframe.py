@@ -0,0 +1,128 @@
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+from numpy.testing import assert_allclose
+
+from napari_spreadsheet import dataframe_to_layer_data, layer_to_dataframe
+
+_CODE = """
+import sys
+
+import numpy as np
+from napari_spreadsheet import layer_to_dataframe
+
+layer_to_dataframe((np.zeros((3, 2)), {"face_color": "#FF0000"}, "points"))
+layer_to_dataframe((np.array([[0, 1], [2, 2]]), {}, "labels"))
+print("\\n".join(sys.modules))
+"""
+
+
+def test_no_qt_nor_napari():
+    out = subprocess.run(
+        [sys.executable, "-c", _CODE],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    imported = {name.split(".")[0] for name in out.split()}
+    assert imported.isdisjoint(
+        {"napari", "PyQt5", "qtpy", "scipy", "tabulous"}
+    )
+
+
+def test_points_round_trip():
+    data = np.array([[0.0, 1.0, 2.0], [3.0, 4.0, 5.0]])
+    kwargs = {
+        "face_color": ["#FF0000", "#00FF00"],
+        "edge_color": [0.0, 0.0, 1.0, 1.0],
+        "edge_width": 0.5,
+        "size": [[3, 3, 3], [4, 4, 4]],
+    }
+    df = layer_to_dataframe((data, kwargs, "points"), ["t", "y", "x"])
+    assert list(df.columns) == [
+        "data_t",
+        "data_y",
+        "data_x",
+        "face_color",
+        "edge_color",
+        "edge_width",
+        "size",
+    ]
+    assert df["face_color"].tolist() == ["#FF0000", "#00FF00"]
+    assert df["edge_color"].tolist() == ["#0000FF"] * 2
+
+    out, out_kwargs, layer_type = dataframe_to_layer_data(df, "points")
+    assert layer_type == "points"
+    assert_allclose(out, data)
+    assert_allclose(out_kwargs["face_color"], [[1, 0, 0, 1], [0, 1, 0, 1]])
+    assert_allclose(out_kwargs["edge_width"], [0.5, 0.5])
+    assert_allclose(out_kwargs["size"], [3, 4])
+
+
+def test_axis_labels():
+    data = np.zeros((2, 2, 2))
+    df = layer_to_dataframe((data, {}, "vectors"), ["z", "y", "x"])
+    assert list(df.columns) == ["data_y", "data_x", "data_y_vec", "data_x_vec"]
+    with pytest.raises(ValueError):
+        layer_to_dataframe((data, {}, "vectors"), ["x"])
+    df = layer_to_dataframe((np.zeros((2, 3)), {}, "tracks"))
+    assert list(df.columns) == ["track_id", "data_0", "data_1"]
+
+
+def test_tracks_and_shapes_round_trip():
+    tracks = np.array([[0, 0, 1.0, 2.0], [0, 1, 1.5, 2.5], [1, 0, 3, 4]])
+    df = layer_to_dataframe((tracks, {}, "tracks"))
+    assert_allclose(dataframe_to_layer_data(df, "tracks")[0], tracks)
+
+    vertices = pd.DataFrame(
+        {
+            "shape_id": [0, 0, 0, 1, 1],
+            "shape_type": ["polygon"] * 3 + ["line"] * 2,
+            "vertex_index": [0, 1, 2, 0, 1],
+            "data_0": [0, 1, 1, 5, 6],
+            "data_1": [0, 0, 1, 5, 6],
+        }
+    )
+    data, kwargs, _ = dataframe_to_layer_data(vertices, "shapes")
+    assert [len(d) for d in data] == [3, 2]
+    assert kwargs["shape_type"] == ["polygon", "line"]
+
+
+def test_labels_not_invertible():
+    df = layer_to_dataframe((np.array([[0, 1], [2, 2]]), {}, "labels"))
+    assert df["area"].tolist() == [1, 2]
+    with pytest.raises(NotImplementedError):
+        dataframe_to_layer_data(df, "labels")
+
+
+def test_arrow():
+    pa = pytest.importorskip("pyarrow")
+    layer_data = (np.ones((3, 2)), {"face_color": "#FF0000"}, "points")
+    from napari_spreadsheet import layer_to_arrow
+
+    table = layer_to_arrow(layer_data)
+    assert isinstance(table, pa.Table)
+    data, kwargs, _ = dataframe_to_layer_data(table, "points")
+    assert_allclose(data, np.ones((3, 2)))
+    assert_allclose(kwargs["face_color"], [[1, 0, 0, 1]] * 3)
+
+
+def test_chunked_conversion():
+    rng = np.random.default_rng(0)
+    data = rng.random((100, 2))
+    kwargs = {
+        "face_color": rng.random((100, 4)),
+        "edge_color": "#FF0000",
+        "edge_width": rng.random(100),
+        "size": rng.random(100),
+    }
+    df = layer_to_dataframe((data, kwargs, "points"))
+    chunked = layer_to_dataframe(
+        (data, kwargs, "points"), chunk_size=7, max_workers=4
+    )
+    pd.testing.assert_frame_equal(chunked, df)
+    out = dataframe_to_layer_data(df, "points", chunk_size=7, max_workers=4)
+    assert_allclose(out[1]["face_color"], kwargs["face_color"], atol=1 / 255)
@@ -0,0 +1,38 @@
+import subprocess
+import sys
+
+# modules that must not be imported until the widget is used
+HEAVY_MODULES = {
+    "magicgui",
+    "napari",
+    "numpy",
+    "pandas",
+    "PyQt5",
+    "qtpy",
+    "tabulous",
+}
+
+_CODE = """
+import sys
+
+before = set(sys.modules)
+import napari_spreadsheet
+from napari_spreadsheet._reader import get_reader
+
+get_reader("table.csv")
+print("\\n".join(set(sys.modules) - before))
+"""
+
+
+def test_import_time_modules():
+    out = subprocess.run(
+        [sys.executable, "-c", _CODE],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    imported = {name.split(".")[0] for name in out.split()}
+    imported.discard("napari_spreadsheet")
+    assert imported.isdisjoint(HEAVY_MODULES)
+    if (stdlib := getattr(sys, "stdlib_module_names", None)) is not None:
+        assert imported <= stdlib
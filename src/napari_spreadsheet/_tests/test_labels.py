@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose
+
+from napari_spreadsheet._labels import label_statistics
+
+
+@pytest.mark.parametrize("dtype", [np.uint8, np.int32, np.uint64])
+def test_label_statistics(dtype):
+    data = np.zeros((4, 5, 6), dtype=dtype)
+    data[1:3, 0:2, 2:5] = 2
+    data[3, 4, 5] = 7
+    stats = label_statistics(data)
+    assert stats["label"].tolist() == [2, 7]
+    assert stats["area"].tolist() == [12, 1]
+    assert_allclose(stats["centroid"], [[1.5, 0.5, 3], [3, 4, 5]])
+    assert stats["bbox_min"].tolist() == [[1, 0, 2], [3, 4, 5]]
+    assert stats["bbox_max"].tolist() == [[3, 2, 5], [4, 5, 6]]
+
+
+def test_label_statistics_sparse():
+    data = np.zeros((3, 3), dtype=np.int64)
+    data[0, 0] = 10**12
+    data[2, 1:] = 5
+    stats = label_statistics(data)
+    assert stats["label"].tolist() == [5, 10**12]
+    assert stats["area"].tolist() == [2, 1]
+    assert stats["bbox_max"].tolist() == [[3, 3], [1, 1]]
+
+
+def test_label_statistics_empty():
+    stats = label_statistics(np.zeros((3, 3), dtype=np.uint8))
+    assert stats["label"].size == 0
+    assert stats["centroid"].shape == (0, 2)
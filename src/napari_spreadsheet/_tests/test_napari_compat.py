@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+from napari.layers import Shapes
+from numpy.testing import assert_allclose
+
+from napari_spreadsheet import _napari_compat as compat
+
+
+@pytest.mark.parametrize("version", ["0.4.17", "0.4.19.post1", "0.4.20rc0"])
+def test_supported_version(version):
+    assert compat.is_supported(version)
+
+
+@pytest.mark.parametrize("version", ["0.3.8", "0.5.0", "1.0.0", "unknown"])
+def test_unsupported_version(version):
+    assert not compat.is_supported(version)
+
+
+@pytest.mark.parametrize("private", [True, False])
+def test_shapes_colors(monkeypatch, private: bool):
+    monkeypatch.setattr(compat, "SUPPORTED", private)
+    layer = Shapes(
+        [np.zeros((4, 2)) + i for i in range(3)],
+        shape_type="polygon",
+        features={"a": [0.0, 0.5, 1.0]},
+        face_color="a",
+        face_colormap="gray",
+    )
+    assert compat.color_feature(layer, "face") == "a"
+    assert compat.color_feature(layer, "edge") is None
+    default = layer.edge_color[1].copy()
+    emitted = []
+    layer.events.edge_color.connect(lambda e: emitted.append(e))
+    compat.set_shapes_colors(
+        layer, "edge", np.array([0, 2]), np.array([[1, 0, 0, 1]] * 2)
+    )
+    assert_allclose(layer.edge_color[[0, 2]], [[1, 0, 0, 1]] * 2)
+    assert_allclose(layer.edge_color[1], default)
+    assert emitted
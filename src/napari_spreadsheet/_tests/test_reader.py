@@ -1,13 +1,28 @@
 import tempfile
+import time
 from pathlib import Path
 
 import napari
+import yaml
 from napari_spreadsheet import MainWidget
+from napari_spreadsheet._formats import (
+    FEATHER_SUFFIXES,
+    HDF5_SUFFIXES,
+    PARQUET_SUFFIXES,
+    SUPPORTED_SUFFIXES,
+)
+from napari_spreadsheet._loader import (
+    MAX_PENDING_CHUNKS,
+    TableLoader,
+    _memory_usage,
+)
 from napari_spreadsheet._reader import get_reader
+from napari_spreadsheet._writer import write_layer_features, write_table_data
 import pandas as pd
+import pytest
 
 
-def test_reader(make_napari_viewer):
+def test_reader(make_napari_viewer, qtbot):
     viewer: napari.Viewer = make_napari_viewer()
     wdt = MainWidget(viewer)
     with tempfile.TemporaryDirectory() as tmpdir:
@@ -18,5 +33,96 @@ def test_reader(make_napari_viewer):
         reader = get_reader(path)
         assert reader is not None
         reader(path)
+        qtbot.waitUntil(lambda: not TableLoader._running)
 
         wdt._table_viewer.current_table.data.shape == (3, 2)
+
+
+def test_chunked_reader(make_napari_viewer, qtbot, tmp_path: Path):
+    viewer: napari.Viewer = make_napari_viewer()
+    MainWidget(viewer)
+    path = tmp_path / "test.csv"
+    df = pd.DataFrame({"a": range(25), "b": [0.5] * 25})
+    df.to_csv(path)
+    loader = MainWidget.open_table_data(path, chunk_size=10)
+    qtbot.waitUntil(lambda: not loader.is_running)
+    (sheet,) = loader.sheets
+    pd.testing.assert_frame_equal(sheet.data, df, check_names=False)
+
+    loader = MainWidget.open_table_data(path, chunk_size=10, max_memory=1)
+    qtbot.waitUntil(lambda: not loader.is_running)
+    assert loader.sheets[0].data.shape == (10, 2)
+    # parsing stops at the memory limit
+    assert loader._nbytes <= _memory_usage(df.iloc[:10].astype(str))
+
+
+def test_reader_backpressure(make_napari_viewer, qtbot, tmp_path: Path):
+    viewer: napari.Viewer = make_napari_viewer()
+    MainWidget(viewer)
+    path = tmp_path / "test.csv"
+    df = pd.DataFrame({"a": range(1000), "b": [0.5] * 1000})
+    df.to_csv(path)
+    loader = MainWidget.open_table_data(path, chunk_size=10)
+    # the main thread does not process the chunks during sleep
+    time.sleep(0.5)
+    nbytes = _memory_usage(df.iloc[:10].astype(str))
+    assert loader._nbytes <= (MAX_PENDING_CHUNKS + 1) * nbytes * 1.5
+    qtbot.waitUntil(lambda: not loader.is_running, timeout=20000)
+    (sheet,) = loader.sheets
+    assert sheet.data.shape == (1000, 2)
+
+
+def test_reader_multiple_files(make_napari_viewer, qtbot, tmp_path: Path):
+    viewer: napari.Viewer = make_napari_viewer()
+    wdt = MainWidget(viewer)
+    paths = []
+    for i in range(4):
+        path = tmp_path / f"test-{i}.csv"
+        pd.DataFrame({"a": [i] * 3}).to_csv(path)
+        paths.append(str(path))
+    get_reader(paths[0])(paths)
+    qtbot.waitUntil(lambda: len(wdt._table_viewer.tables) == 5)
+    qtbot.waitUntil(lambda: not TableLoader._running)
+    names = {table.name for table in wdt._table_viewer.tables}
+    assert {f"test-{i}" for i in range(4)} <= names
+
+
+@pytest.mark.parametrize("suffix", [".parquet", ".feather", ".h5"])
+def test_columnar_formats(make_napari_viewer, qtbot, tmp_path: Path, suffix):
+    pytest.importorskip("pyarrow")
+    if suffix == ".h5":
+        pytest.importorskip("tables")
+    viewer: napari.Viewer = make_napari_viewer()
+    MainWidget(viewer)
+    df = pd.DataFrame({"a": range(25), "b": [0.5] * 25, "c": ["x"] * 25})
+    path = write_table_data(tmp_path / f"test{suffix}", df)
+    assert get_reader(path) is not None
+    loader = MainWidget.open_table_data(path, chunk_size=10)
+    qtbot.waitUntil(lambda: not loader.is_running)
+    (sheet,) = loader.sheets
+    pd.testing.assert_frame_equal(sheet.data, df, check_names=False)
+
+    loader = MainWidget.open_table_data(path, columns=["c", "a"])
+    qtbot.waitUntil(lambda: not loader.is_running)
+    assert list(loader.sheets[0].data.columns) == ["c", "a"]
+
+
+def test_write_layer_features(tmp_path: Path):
+    pytest.importorskip("pyarrow")
+    features = pd.DataFrame({"a": [1, 2, 3]})
+    path = str(tmp_path / "features.parquet")
+    assert write_layer_features(path, None, {"features": features}) == [path]
+    pd.testing.assert_frame_equal(pd.read_parquet(path), features)
+
+
+def test_manifest_suffixes():
+    manifest = Path(__file__).parent.parent / "napari.yaml"
+    contributions = yaml.safe_load(manifest.read_text())["contributions"]
+    (reader,) = contributions["readers"]
+    assert set(reader["filename_patterns"]) == {
+        f"*{suffix}" for suffix in SUPPORTED_SUFFIXES
+    }
+    # columnar formats are written by the plugin, text ones by napari
+    columnar = set(PARQUET_SUFFIXES + FEATHER_SUFFIXES + HDF5_SUFFIXES)
+    for writer in contributions["writers"]:
+        assert set(writer["filename_extensions"]) == columnar
@@ -0,0 +1,47 @@
+import napari
+
+import napari_spreadsheet
+from napari_spreadsheet import MainWidget
+
+
+def test_stats_disabled(make_napari_viewer):
+    viewer: napari.Viewer = make_napari_viewer()
+    wdt = MainWidget(viewer)
+
+    napari_spreadsheet.reset_stats()
+    layer = viewer.add_points([[0, 0], [0, 1], [1, 0]])
+    wdt.layer_to_spreadsheet(layer)
+    assert napari_spreadsheet.stats().empty
+
+
+def test_stats_linked_edits(make_napari_viewer):
+    viewer: napari.Viewer = make_napari_viewer()
+    wdt = MainWidget(viewer)
+
+    napari_spreadsheet.reset_stats()
+    napari_spreadsheet.enable_stats()
+    try:
+        layer = viewer.add_points([[0, 0], [0, 1], [1, 0]])
+        wdt.layer_to_spreadsheet(layer)
+        wdt.link_spreadsheet_and_layer(latency=0)
+        table = wdt._table_viewer.current_table
+        table.cell[0, 0] = -1
+        layer.data = layer.data + 1
+        df = napari_spreadsheet.stats()
+    finally:
+        napari_spreadsheet.enable_stats(False)
+        napari_spreadsheet.reset_stats()
+
+    assert df.loc["layer_to_spreadsheet", "count"] == 1
+    assert df.loc["update_layer_rows", "count"] == 1
+    assert df.loc["linker.sheet_events", "count"] == 1
+    assert df.loc["linker.layer_events", "count"] >= 1
+    assert df.loc["linker.applied", "count"] >= 2
+    assert df.loc["SpreadSheet.assign", "count"] >= 1
+    assert (df["total"].dropna() >= 0).all()
+
+
+def test_stats_panel(make_napari_viewer):
+    viewer: napari.Viewer = make_napari_viewer()
+    wdt = MainWidget(viewer)
+    wdt.show_stats_panel()
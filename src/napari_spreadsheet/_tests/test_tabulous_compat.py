@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+from tabulous import TableViewerWidget
+
+from napari_spreadsheet import _tabulous_compat as compat
+
+
+@pytest.mark.parametrize("version", ["0.5.0", "0.5.5", "0.5.6.dev1+g123"])
+def test_supported_version(version):
+    compat.check_version(version)
+
+
+@pytest.mark.parametrize("version", ["0.4.9", "0.6.0", "1.0.0", "unknown"])
+def test_unsupported_version(version):
+    with pytest.raises(ImportError, match="tabulous>=0.5,<0.6"):
+        compat.check_version(version)
+
+
+def test_private_access(qtbot):
+    viewer = TableViewerWidget(show=False)
+    qtbot.addWidget(viewer.native)
+    sheet = viewer.add_spreadsheet(
+        pd.DataFrame({"a": [3, 1, 2], "b": ["x", "y", "z"]}), dtyped=True
+    )
+    compat.append_rows(sheet, pd.DataFrame({"a": [0], "b": ["w"]}))
+    assert sheet.data["a"].tolist() == [3, 1, 2, 0]
+    # array proxy does not install buttons in the header
+    sheet.proxy.set([3, 1, 2, 0])
+    # the source rows are accessed regardless of the sorted view
+    assert compat.source_shape(sheet) == (4, 2)
+    assert compat.raw_data(sheet)["a"].tolist() == ["3", "1", "2", "0"]
+    column = compat.parse_columns(sheet, "a")
+    assert column.tolist() == [3, 1, 2, 0]
+    column[:] = 5
+    assert sheet.data["a"].tolist() == [3, 1, 2, 0]
+    assert compat.read_csv_kwargs(sheet, "a")["dtype"] == {"a": "int64"}
+
+    with compat.proxy_released(sheet):
+        assert sheet.proxy.proxy_type == "none"
+        sheet.cell[0, 0] = "-1"
+    assert sheet.proxy.proxy_type == "sort"
+    assert sheet.data_shown["a"].tolist() == [0, 1, 2, -1]
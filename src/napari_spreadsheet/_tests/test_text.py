@@ -0,0 +1,55 @@
+import napari
+import numpy as np
+import pandas as pd
+from napari.layers.utils.string_encoding import FormatStringEncoding
+
+from napari_spreadsheet import MainWidget
+from napari_spreadsheet._text import format_features, get_layer_text
+
+
+def test_format_features():
+    features = pd.DataFrame(
+        {
+            "a": [0.5, np.nan, 1 / 3, 0.5],
+            "b": [1, 2, 3, 1],
+            "c": pd.Categorical(["x", "y", "x", "z"]),
+            "d": ["p", "q", "r", "s"],
+        }
+    )
+    for fmt in ["{a}", "n={b:03d}, a={a:.2f}", "{c}-{d!r}", "{a}{b}{c}{d}"]:
+        expected = FormatStringEncoding(format=fmt)(features)
+        assert format_features(fmt, features).tolist() == expected.tolist()
+    assert format_features("{d.upper}", features) is None
+
+
+def test_layer_text_cache(make_napari_viewer):
+    viewer: napari.Viewer = make_napari_viewer()
+    layer = viewer.add_points(
+        [[0, 0], [0, 1], [1, 0]],
+        features={"a": [0, 0, 1], "b": ["x", "y", "z"]},
+        text="{b}-{a}",
+    )
+    text = get_layer_text(layer)
+    assert text.tolist() == ["x-0", "y-0", "z-1"]
+    assert get_layer_text(layer) is text
+    layer.features = {"a": [2, 0, 1], "b": ["x", "y", "z"]}
+    assert get_layer_text(layer).tolist() == ["x-2", "y-0", "z-1"]
+
+
+def test_update_layer_text_in_place(make_napari_viewer):
+    viewer: napari.Viewer = make_napari_viewer()
+    layer = viewer.add_points(
+        [[0, 0], [0, 1], [1, 0]],
+        text=["a", "b", "c"],
+    )
+    wdt = MainWidget(viewer)
+    wdt.load_layer_text(layer)
+    array = layer.text.string.array
+    wdt._table_viewer.current_table.cell[1, 0] = "longer"
+    wdt.update_layer_text(layer)
+    assert layer.text.string.array.tolist() == ["a", "longer", "c"]
+    assert layer.text.view_text([0, 1, 2]).tolist() == ["a", "longer", "c"]
+    wdt._table_viewer.current_table.cell[2, 0] = "d"
+    wdt.update_layer_text(layer)
+    assert layer.text.string.array.tolist() == ["a", "longer", "d"]
+    assert array.tolist() == ["a", "b", "c"]
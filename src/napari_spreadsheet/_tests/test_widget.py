@@ -1,6 +1,9 @@
 import napari
+import numpy as np
+import pytest
+from tabulous.types import ItemInfo
 
-from napari_spreadsheet import MainWidget, current_widget
+from napari_spreadsheet import MainWidget, _napari_compat, current_widget
 
 
 def test_layer_features(make_napari_viewer):
@@ -49,3 +52,113 @@ def test_current_widget(make_napari_viewer):
     viewer: napari.Viewer = make_napari_viewer()
     wdt = MainWidget(viewer)
     assert current_widget() is wdt._table_viewer
+
+
+def test_layer_features_edited_columns(make_napari_viewer, monkeypatch):
+    viewer: napari.Viewer = make_napari_viewer()
+    layer = viewer.add_points(
+        [[0, 0], [0, 1], [1, 0]],
+        features={"a": [0, 0, 1], "b": [0.5, 1.5, 2.5]},
+    )
+    features = layer.features
+
+    wdt = MainWidget(viewer)
+    wdt.load_layer_features(layer)
+    table = wdt._table_viewer.current_table
+    tracker = table.metadata["spreadsheet-source"].features
+    assert tracker.dirty == set()
+    table.cell[1, 1] = "-1.5"
+    assert tracker.dirty == {"b"}
+    wdt.update_layer_features(layer)
+    assert layer.features["b"].tolist() == [0.5, -1.5, 2.5]
+    assert layer.features["a"].tolist() == [0, 0, 1]
+    # edited cells are written in-place
+    assert layer.features is features
+    assert tracker.dirty == set()
+
+    # features replaced after loading, the whole table is parsed
+    layer.features = {"a": [3, 4, 5], "b": [0.0, 0.0, 0.0]}
+    table.cell[0, 0] = "2"
+    wdt.update_layer_features(layer)
+    assert layer.features["a"].tolist() == [2, 0, 1]
+    assert layer.features["b"].tolist() == [0.5, -1.5, 2.5]
+
+    # events after the spreadsheet is deleted are ignored
+    monkeypatch.setattr(tracker, "_sheet", lambda: None)
+    tracker._on_data_change(ItemInfo(0, 0, "1", "2"))
+    assert tracker.dirty == set()
+
+
+@pytest.mark.parametrize("private", [True, False])
+def test_layer_features_dependent_encodings(
+    make_napari_viewer, monkeypatch, private: bool
+):
+    # without the private methods, the whole layer is refreshed
+    monkeypatch.setattr(_napari_compat, "SUPPORTED", private)
+    viewer: napari.Viewer = make_napari_viewer()
+    layer = viewer.add_points(
+        [[0, 0], [0, 1], [1, 0]],
+        features={"a": [0.0, 0.5, 1.0], "b": ["x", "y", "z"], "c": [0, 1, 2]},
+        face_color="a",
+        face_colormap="gray",
+        text="{b}",
+    )
+
+    wdt = MainWidget(viewer)
+    wdt.load_layer_features(layer)
+    table = wdt._table_viewer.current_table
+    table.cell[0, 1] = "w"
+    wdt.update_layer_features(layer)
+    assert layer.text.view_text([0]).tolist() == ["w"]
+
+    table.cell[2, 0] = "0.0"
+    wdt.update_layer_features(layer)
+    np.testing.assert_allclose(layer.face_color[2], [0, 0, 0, 1])
+    assert layer.text.view_text([0, 1, 2]).tolist() == ["w", "y", "z"]
+
+
+def test_table_viewer_pool(make_napari_viewer, qtbot):
+    from napari_spreadsheet._widget import _POOL
+
+    viewer: napari.Viewer = make_napari_viewer()
+    MainWidget(viewer)
+    qtbot.waitUntil(lambda: _POOL._spare is not None)
+    spare = _POOL._spare
+    theme = "light" if viewer.theme == "dark" else "dark"
+    viewer.theme = theme
+    assert _POOL.get(viewer.theme) is spare
+    assert spare.theme.startswith(f"{theme}-")
+    qtbot.waitUntil(lambda: _POOL._spare is not None)
+    assert _POOL._spare is not spare
+
+
+def test_table_proxy(make_napari_viewer):
+    from napari_spreadsheet._proxy import table_proxy
+
+    viewer: napari.Viewer = make_napari_viewer()
+    wdt = MainWidget(viewer)
+    table = wdt._table_viewer.add_spreadsheet(
+        {"a": [1, 2, 3], "b": ["x", "y", "z"]}
+    )
+    wdt.send_table_to_namespace("df")
+    proxy = table_proxy(table)
+    assert table_proxy(table) is proxy
+    assert proxy.shape == (3, 2)
+    assert list(proxy) == ["a", "b"]
+    assert proxy.a.tolist() == [1, 2, 3]
+
+    # always reflects the current data
+    table.cell[0, 0] = "10"
+    assert proxy["a"].tolist() == [10, 2, 3]
+    snapshot = proxy.to_pandas()
+    table.cell[1, 0] = "20"
+    assert snapshot["a"].tolist() == [10, 2, 3]
+
+    # parsed data is not editable through the proxy
+    table.data  # parse and cache the data
+    column = proxy["a"]
+    column[0] = -1
+    assert table.data["a"].tolist() == [10, 20, 3]
+    assert proxy[["b"]].shape == (3, 1)
+    with pytest.raises(KeyError):
+        proxy["c"]
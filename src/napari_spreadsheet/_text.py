@@ -0,0 +1,146 @@
+"""Vectorized evaluation and incremental update of layer text."""
+
+from __future__ import annotations
+
+import weakref
+from string import Formatter
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+from ._stats import timed
+
+if TYPE_CHECKING:  # pragma: no cover
+    from napari.layers import Layer
+
+# layer -> (format string, features version, evaluated text)
+_CACHE: weakref.WeakKeyDictionary[
+    Layer, tuple[str, int, np.ndarray]
+] = weakref.WeakKeyDictionary()
+# layer -> version of the features, incremented on every features event
+_VERSIONS: weakref.WeakKeyDictionary[Layer, int] = weakref.WeakKeyDictionary()
+
+
+def format_features(fmt: str, features: pd.DataFrame) -> np.ndarray | None:
+    """
+    Evaluate a format string for each row of the features, column-wise.
+
+    The result is the same as calling ``fmt.format(**row)`` for each row, but
+    each field is formatted only once per unique value. None is returned if
+    any field is not a plain feature name.
+    """
+    nrows = features.shape[0]
+    out = np.full(nrows, "", dtype=object)
+    for literal, field, spec, conversion in Formatter().parse(fmt):
+        if literal:
+            out += literal
+        if field is None:
+            continue
+        if field not in features.columns or "{" in spec:
+            # attribute access, indexing or nested fields
+            return None
+        values = features[field].to_numpy()
+        codes, uniques = pd.factorize(values, use_na_sentinel=False)
+        formatted = np.array(
+            [_format_value(v, spec, conversion) for v in uniques],
+            dtype=object,
+        )
+        out += formatted[codes]
+    return out.astype(str)
+
+
+def _format_value(value, spec: str, conversion: str | None) -> str:
+    if conversion == "r":
+        value = repr(value)
+    elif conversion == "s":
+        value = str(value)
+    elif conversion == "a":
+        value = ascii(value)
+    return format(value, spec)
+
+
+@timed("get_layer_text")
+def get_layer_text(layer: Layer) -> np.ndarray:
+    """
+    Return the text strings of a layer.
+
+    Strings of a format-string encoding are evaluated column-wise and cached
+    until the layer features change.
+    """
+    from napari.layers.utils.string_encoding import (
+        ConstantStringEncoding,
+        DirectStringEncoding,
+        FormatStringEncoding,
+        ManualStringEncoding,
+    )
+
+    encoding = layer.text.string
+    if isinstance(encoding, ConstantStringEncoding):
+        return np.zeros(len(layer.data), dtype="<U1")
+    elif isinstance(encoding, ManualStringEncoding):
+        return encoding.array
+    elif isinstance(encoding, DirectStringEncoding):
+        return encoding(layer.features)
+    elif not isinstance(encoding, FormatStringEncoding):
+        raise NotImplementedError(encoding)
+
+    _watch(layer)
+    fmt = encoding.format
+    version = _VERSIONS[layer]
+    if (cached := _CACHE.get(layer)) is not None and cached[:2] == (
+        fmt,
+        version,
+    ):
+        return cached[2]
+    text = format_features(fmt, layer.features)
+    if text is None:
+        text = encoding(layer.features)
+    _CACHE[layer] = (fmt, version, text)
+    return text
+
+
+@timed("set_layer_text")
+def set_layer_text(layer: Layer, text: np.ndarray):
+    """
+    Set text strings to a layer.
+
+    If the layer already has manually encoded strings of the same length,
+    only the changed strings are replaced in-place.
+    """
+    from napari.layers.utils.string_encoding import ManualStringEncoding
+
+    text = np.asarray(text, dtype=str)
+    encoding = layer.text.string
+    if (
+        not isinstance(encoding, ManualStringEncoding)
+        or encoding.array.shape != text.shape
+    ):
+        layer.text = text
+        return None
+    array = encoding.array
+    changed = np.flatnonzero(array != text)
+    if changed.size == 0:
+        return None
+    if text.dtype.itemsize > array.dtype.itemsize:
+        # longer strings do not fit in the current array
+        array = encoding.array = array.astype(text.dtype)
+    array[changed] = text[changed]
+    layer.text.events.string()
+    return None
+
+
+def _watch(layer: Layer):
+    if layer in _VERSIONS:
+        return None
+    _VERSIONS[layer] = 0
+    ref = weakref.ref(layer)
+
+    def _increment(*_):
+        if (layer := ref()) is not None:
+            _VERSIONS[layer] += 1
+
+    events = layer.events
+    getattr(events, "features", events.properties).connect(_increment)
+    events.data.connect(_increment)
+    return None
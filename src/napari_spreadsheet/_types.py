@@ -2,8 +2,6 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING, Any, NewType
 
-from magicgui import register_type
-
 if TYPE_CHECKING:  # pragma: no cover
     import pandas as pd
     from magicgui.widgets import Widget
@@ -43,5 +41,38 @@ def get_layers_with_text(gui: Widget) -> list[Layer]:
     return [x for x in viewer.layers if hasattr(x, "text") > 0]
 
 
-register_type(LayerWithFeatures, choices=get_layers_with_features)
-register_type(LayerWithText, choices=get_layers_with_features)
+def get_convertible_layers(gui: Widget) -> list[Layer]:
+    from napari.layers import Labels, Points, Shapes, Surface, Tracks, Vectors
+    from napari.utils._magicgui import find_viewer_ancestor
+
+    viewer = find_viewer_ancestor(gui.native)
+    if not viewer:
+        return []
+    types = (Labels, Points, Shapes, Surface, Tracks, Vectors)
+    return [x for x in viewer.layers if isinstance(x, types)]
+
+
+def get_shapes_layers(gui: Widget) -> list[Layer]:
+    from napari.layers import Shapes
+    from napari.utils._magicgui import find_viewer_ancestor
+
+    viewer = find_viewer_ancestor(gui.native)
+    if not viewer:
+        return []
+    return [x for x in viewer.layers if isinstance(x, Shapes)]
+
+
+_registered = False
+
+
+def register_types():
+    """Register the layer types to magicgui, if not registered yet."""
+    global _registered
+    if _registered:
+        return None
+    from magicgui import register_type
+
+    register_type(LayerWithFeatures, choices=get_layers_with_features)
+    register_type(LayerWithText, choices=get_layers_with_features)
+    _registered = True
+    return None
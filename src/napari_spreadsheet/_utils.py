@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING, Callable
 
-from magicgui.widgets import ComboBox, Dialog, LineEdit
+from magicgui.widgets import ComboBox, Dialog, LineEdit, Select
 from qtpy import QtWidgets as QtW
 
 if TYPE_CHECKING:  # pragma: no cover
@@ -38,6 +38,21 @@ def get_layer_by_dialog(
     return out
 
 
+def get_layers_by_dialog(
+    parent: QtW.QWidget | None = None,
+    choices=None,
+) -> list[Layer] | None:
+    select = Select(choices=choices, label="Layers")
+    dlg = Dialog(widgets=[select])
+    dlg.native.setParent(parent, dlg.native.windowFlags())
+    dlg.reset_choices()
+    if dlg.exec():
+        out = list(dlg[0].value)
+    else:
+        out = None
+    return out
+
+
 def get_layers(w):
     from napari.utils._magicgui import find_viewer_ancestor
 
@@ -4,21 +4,25 @@ import weakref
 from typing import TYPE_CHECKING, Callable, TypeVar
 
 from qtpy import QtWidgets as QtW
-import numpy as np
 from tabulous import TableViewerWidget as _TableViewerWidget
 
 from . import _utils
+from ._stats import timer
 from ._types import (
     LayerWithFeatures,
     LayerWithText,
+    get_convertible_layers,
     get_layers_with_features,
     get_layers_with_text,
+    get_shapes_layers,
+    register_types,
 )
 
 if TYPE_CHECKING:  # pragma: no cover
     import napari
-    from napari.layers import Layer
+    from napari.layers import Layer, Shapes
     from tabulous.widgets import SpreadSheet
+    from ._features import FeaturesTracker
     from ._linker import _LayerLinker
 
     _L = TypeVar("_L", bound=Layer)
@@ -32,6 +36,57 @@ class TableViewerWidget(_TableViewerWidget):
         raise AttributeError("console is not available in this widget.")
 
 
+def _new_table_viewer(napari_theme: str) -> TableViewerWidget:
+    from tabulous._utils import init_config
+
+    with init_config() as cfg:
+        cfg.window.nonmain_style = True
+        col = cfg.window.theme.split("-")[1]
+        cfg.window.theme = f"{napari_theme}-{col}"
+        return TableViewerWidget(show=False)
+
+
+class _TableViewerPool:
+    """
+    Hand out hidden table viewers.
+
+    Constructing a table viewer takes hundreds of msec. After a viewer is
+    handed out, a spare one is constructed when the event loop is idle so
+    that the next request returns immediately.
+    """
+
+    def __init__(self):
+        self._spare: TableViewerWidget | None = None
+        self._theme = "dark"
+        self._warming = False
+
+    def get(self, napari_theme: str) -> TableViewerWidget:
+        """Return a table viewer of the given napari theme."""
+        self._theme = napari_theme
+        if (table_viewer := self._spare) is None:
+            table_viewer = _new_table_viewer(napari_theme)
+        else:
+            self._spare = None
+            col = table_viewer.theme.split("-")[1]
+            if table_viewer.theme != (theme := f"{napari_theme}-{col}"):
+                table_viewer.theme = theme
+        self._schedule_warm()
+        return table_viewer
+
+    def _schedule_warm(self):
+        from qtpy.QtCore import QTimer
+
+        if self._spare is None and not self._warming:
+            self._warming = True
+            QTimer.singleShot(0, self._warm)
+
+    def _warm(self):
+        self._warming = False
+        if self._spare is None:
+            self._spare = _new_table_viewer(self._theme)
+
+
+_POOL = _TableViewerPool()
 _void = object()
 
 
@@ -41,6 +96,7 @@ class LayerSource:
     def __init__(self, layer: Layer):
         self._layer = weakref.ref(layer)
         self._linker: weakref.ReferenceType[_LayerLinker] | None = None
+        self.features: FeaturesTracker | None = None
 
     def __repr__(self) -> str:
         layer = self.layer
@@ -72,23 +128,75 @@ class LayerSource:
 _SOURCE = "spreadsheet-source"
 
 
+class StatsPanel(QtW.QWidget):
+    """A panel that shows the statistics of sync operations."""
+
+    # interval (msec) of refreshing the statistics while enabled
+    _INTERVAL = 1000
+
+    def __init__(self, parent: QtW.QWidget | None = None):
+        from qtpy.QtCore import QTimer
+        from tabulous.widgets import Table
+
+        from ._stats import is_stats_enabled
+
+        super().__init__(parent)
+        self._table = Table(name="stats", editable=False)
+        self._enabled = QtW.QCheckBox("Enabled")
+        self._enabled.setChecked(is_stats_enabled())
+        self._enabled.toggled.connect(self._set_enabled)
+        self._timer = QTimer(self)
+        self._timer.setInterval(self._INTERVAL)
+        self._timer.timeout.connect(self.refresh)
+
+        _header = QtW.QHBoxLayout()
+        _header.setContentsMargins(0, 0, 0, 0)
+        _header.addWidget(self._enabled)
+        _header.addWidget(_utils.create_button(self.refresh, name="Refresh"))
+        _header.addWidget(_utils.create_button(self.reset, name="Reset"))
+        _layout = QtW.QVBoxLayout()
+        _layout.addLayout(_header)
+        _layout.addWidget(self._table.native)
+        self.setLayout(_layout)
+        self._set_enabled(is_stats_enabled())
+
+    def refresh(self):
+        """Show the current statistics."""
+        from ._stats import stats
+
+        self._table.data = stats().reset_index()
+
+    def reset(self):
+        """Clear all the statistics."""
+        from ._stats import reset_stats
+
+        reset_stats()
+        self.refresh()
+
+    def _set_enabled(self, enabled: bool):
+        from ._stats import enable_stats
+
+        enable_stats(enabled)
+        if enabled:
+            self._timer.start()
+        else:
+            self._timer.stop()
+        self.refresh()
+
+
 class MainWidget(QtW.QWidget):
     _current_widget: TableViewerWidget | None = None
+    # default latency (msec) of links, so that bursts of events such as
+    # dragging points are coalesced into one update per frame
+    link_latency: int = 16
 
     def __init__(
         self, napari_viewer: napari.Viewer, *, new_sheet: bool = True
     ):
         super().__init__()
         self._viewer = napari_viewer
-
-        from tabulous._utils import init_config
-
-        with init_config() as cfg:
-            cfg.window.nonmain_style = True
-            col = cfg.window.theme.split("-")[1]
-            cfg.window.theme = f"{napari_viewer.theme}-{col}"
-            self._table_viewer = TableViewerWidget(show=False)
-
+        register_types()
+        self._table_viewer = _POOL.get(napari_viewer.theme)
         self._init_ui()
 
         self.__class__._current_widget = self._table_viewer
@@ -107,7 +215,23 @@ class MainWidget(QtW.QWidget):
             self._table_viewer.add_spreadsheet()
 
     @classmethod
-    def open_table_data(cls, path: str):
+    def open_table_data(
+        cls,
+        path: str,
+        chunk_size: int | None = None,
+        max_memory: int | None = None,
+        columns: list[str] | None = None,
+    ):
+        """
+        Open a table data file in the current table viewer.
+
+        The file is parsed on a worker thread in chunks of ``chunk_size`` rows.
+        The first chunk is shown as soon as it is ready and the rest are
+        appended until the data exceeds ``max_memory`` bytes. For Parquet,
+        Feather and HDF5 files, only ``columns`` are read if given.
+        """
+        from . import _loader
+
         if cls._current_widget is None:
             import napari
 
@@ -119,7 +243,34 @@ class MainWidget(QtW.QWidget):
             table_viewer = self._table_viewer
         else:
             table_viewer = cls._current_widget
-        table_viewer.open(path, type="spreadsheet")
+        loader = _loader.TableLoader(
+            table_viewer,
+            path,
+            chunk_size=chunk_size or _loader.CHUNK_SIZE,
+            max_memory=max_memory or _loader.MAX_MEMORY,
+            columns=columns,
+        )
+        return loader.start()
+
+    def save_table_data(self, path: str = _void):
+        """Save the current spreadsheet to a file."""
+        from ._writer import write_table_data
+
+        table = self._table_viewer.current_table
+        if table is None:
+            return
+        if path is _void:
+            path, _ = QtW.QFileDialog.getSaveFileName(
+                self,
+                "Save table data",
+                table.name,
+                "CSV (*.csv *.txt *.dat);;Excel (*.xlsx);;"
+                "Parquet (*.parquet *.pq);;Feather (*.feather *.arrow);;"
+                "HDF5 (*.h5 *.hdf5)",
+            )
+            if not path:
+                return
+        write_table_data(path, table.data)
         return None
 
     def popup_current_table(self):
@@ -140,12 +291,18 @@ class MainWidget(QtW.QWidget):
                 parent=self, choices=get_layers_with_features
             )
         if layer is not None:
-            self._table_viewer.add_spreadsheet(
+            from ._features import FeaturesTracker
+
+            source = LayerSource(layer)
+            # spreadsheet converts data to strings, features need no copy
+            sheet = self._table_viewer.add_spreadsheet(
                 layer.features,
                 name=layer.name + "-features",
-                metadata={_SOURCE: LayerSource(layer)},
+                metadata={_SOURCE: source},
+                copy=False,
                 dtyped=True,
             )
+            source.features = FeaturesTracker(sheet, layer.features)
 
     def update_layer_features(self, layer: LayerWithFeatures = _void):
         """Update napari layer features with the current spreadsheet."""
@@ -159,18 +316,18 @@ class MainWidget(QtW.QWidget):
                     parent=self, choices=get_layers_with_features
                 )
         if layer is not None:
-            layer.features = table.data
-            layer.refresh()
+            tracker = _get_features_tracker(table, layer)
+            if tracker is None or not tracker.update_layer(layer):
+                layer.features = table.data
+                if tracker is not None:
+                    tracker.reset(layer.features)
+            with timer("layer.refresh"):
+                layer.refresh()
         return None
 
     def load_layer_text(self, layer: LayerWithText = _void):
         """Load layer text as a spreadsheet from the napari viewer."""
-        from napari.layers.utils.string_encoding import (
-            ConstantStringEncoding,
-            ManualStringEncoding,
-            DirectStringEncoding,
-            FormatStringEncoding,
-        )
+        from ._text import get_layer_text
 
         table = self._table_viewer.current_table
         if table is None:
@@ -180,19 +337,8 @@ class MainWidget(QtW.QWidget):
                 parent=self, choices=get_layers_with_text
             )
         if layer is not None:
-            if isinstance(layer.text.string, ConstantStringEncoding):
-                data = np.zeros(len(layer.data), dtype="<U1")
-            elif isinstance(layer.text.string, ManualStringEncoding):
-                data = layer.text.string.array
-            elif isinstance(
-                layer.text.string, (DirectStringEncoding, FormatStringEncoding)
-            ):
-                data = layer.text.string(layer.features)
-            else:
-                raise NotImplementedError(layer.text.string)
-
             self._table_viewer.add_spreadsheet(
-                {"text": data},
+                {"text": get_layer_text(layer)},
                 name=layer.name + "-text",
                 metadata={_SOURCE: LayerSource(layer)},
                 dtyped=True,
@@ -200,6 +346,9 @@ class MainWidget(QtW.QWidget):
 
     def update_layer_text(self, layer: LayerWithText = _void):
         """Update napari layer text with the current spreadsheet."""
+        from ._tabulous_compat import raw_data
+        from ._text import set_layer_text
+
         table = self._table_viewer.current_table
         if table is None:
             return
@@ -210,44 +359,53 @@ class MainWidget(QtW.QWidget):
                     parent=self, choices=get_layers_with_text
                 )
         if layer is not None:
-            df = table.data
+            # strings of the cells need no parsing
+            df = raw_data(table)
             if df.shape[1] == 1:
-                text = df.iloc[:, 0].tolist()
+                text = df.iloc[:, 0]
             elif "text" in df.columns:
-                text = df["text"].tolist()
+                text = df["text"]
             else:
                 raise ValueError(
                     "Could not find the column for the layer text. "
                     "Spreadsheet must have only one column or a column "
                     "named 'text'."
                 )
-            layer.text = text
-            layer.refresh()
+            set_layer_text(layer, text.fillna("").to_numpy(dtype=str))
+            with timer("layer.refresh"):
+                layer.refresh()
         return None
 
     def open_new_widget(self):
         """Open a new spreadsheet dock widget."""
-        from tabulous._utils import init_config
-
-        with init_config() as cfg:
-            cfg.window.nonmain_style = True
-            col = cfg.window.theme.split("-")[1]
-            cfg.window.theme = f"{self._viewer.theme}-{col}"
-            table_viewer = TableViewerWidget(show=False)
-
+        table_viewer = _POOL.get(self._viewer.theme)
         self._viewer.window.add_dock_widget(table_viewer, name="Spreadsheet")
         return None
 
+    def show_stats_panel(self):
+        """Open a dock widget of the timers and counters of sync operations."""
+        self._viewer.window.add_dock_widget(
+            StatsPanel(), name="Spreadsheet stats"
+        )
+        return None
+
     def send_table_to_namespace(self, identifier: str = _void):
-        """Send data of the current spreadsheet to napari console."""
+        """
+        Send data of the current spreadsheet to napari console.
+
+        A lazy proxy of the spreadsheet is sent instead of a copy of its
+        data. Call ``to_pandas()`` of the proxy to get a DataFrame.
+        """
+        from ._proxy import table_proxy
+
         if identifier is _void:
             identifier = _utils.get_str_by_dialog(
                 label="identifier", value="df", parent=self
             )
 
         if identifier is not None:
-            data = self._table_viewer.current_table.data
-            self._viewer.update_console({identifier: data})
+            proxy = table_proxy(self._table_viewer.current_table)
+            self._viewer.update_console({identifier: proxy})
         return None
 
     def layer_to_spreadsheet(self, layer: Layer = _void):
@@ -263,6 +421,64 @@ class MainWidget(QtW.QWidget):
         sheet = layer_to_spreadsheet(layer, self._table_viewer)
         sheet.metadata[_SOURCE] = LayerSource(layer)
 
+    def layers_to_spreadsheets(
+        self,
+        layers: list[Layer] | type[Layer] = _void,
+        concat: bool = False,
+    ):
+        """
+        Convert states of many layers to spreadsheets at once.
+
+        ``layers`` can also be a layer type to convert all the layers of the
+        type. Layers are converted concurrently in a worker thread, and all
+        the spreadsheets are added after that. If ``concat`` is true, a single
+        spreadsheet with the "layer" column is added instead.
+        """
+        from napari.qt.threading import create_worker
+
+        from ._conversion import layers_to_sheet_data
+
+        if layers is _void:
+            layers = _utils.get_layers_by_dialog(
+                parent=self, choices=get_convertible_layers
+            )
+            if not layers:
+                return None
+        elif isinstance(layers, type):
+            layers = [x for x in self._viewer.layers if isinstance(x, layers)]
+        else:
+            layers = list(layers)
+        worker = create_worker(layers_to_sheet_data, layers)
+        worker.returned.connect(
+            lambda dfs: self._add_sheet_data(layers, dfs, concat)
+        )
+        worker.start()
+        return worker
+
+    def concat_layers_to_spreadsheet(self, layers: list[Layer] = _void):
+        """Convert states of many layers to one spreadsheet."""
+        return self.layers_to_spreadsheets(layers, concat=True)
+
+    def _add_sheet_data(self, layers: list[Layer], dfs, concat: bool):
+        from ._conversion import concat_sheet_data, sheet_data_to_spreadsheet
+
+        native = self._table_viewer.native
+        # add all the spreadsheets in one repaint
+        native.setUpdatesEnabled(False)
+        try:
+            if concat:
+                df = concat_sheet_data(layers, dfs)
+                sheet_data_to_spreadsheet(df, self._table_viewer, "layers")
+            else:
+                for layer, df in zip(layers, dfs):
+                    sheet = sheet_data_to_spreadsheet(
+                        df, self._table_viewer, layer.name
+                    )
+                    sheet.metadata[_SOURCE] = LayerSource(layer)
+        finally:
+            native.setUpdatesEnabled(True)
+        return None
+
     def spreadsheet_to_layer(
         self, layer: Layer = _void, table: SpreadSheet = _void
     ):
@@ -281,19 +497,102 @@ class MainWidget(QtW.QWidget):
                     return
         spreadsheet_to_layer(layer, table)
 
+    def shapes_vertices_to_spreadsheet(self, layer: Shapes = _void):
+        """Convert shapes to a spreadsheet with one row per vertex."""
+        from ._conversion import shapes_vertices_to_spreadsheet
+
+        if layer is _void:
+            layer = _utils.get_layer_by_dialog(
+                parent=self, choices=get_shapes_layers
+            )
+            if layer is None:
+                return
+        sheet = shapes_vertices_to_spreadsheet(layer, self._table_viewer)
+        sheet.metadata[_SOURCE] = LayerSource(layer)
+
+    def spreadsheet_to_shapes_vertices(
+        self, layer: Shapes = _void, table: SpreadSheet = _void
+    ):
+        """Update shapes using the current vertex spreadsheet."""
+        from ._conversion import spreadsheet_to_shapes_vertices
+
+        if table is _void:
+            table = self._table_viewer.current_table
+        if layer is _void:
+            layer = _get_source(table, choices=get_shapes_layers)
+            if layer is None:
+                layer = _utils.get_layer_by_dialog(
+                    parent=self, choices=get_shapes_layers
+                )
+                if layer is None:
+                    return
+        spreadsheet_to_shapes_vertices(layer, table)
+
     def link_spreadsheet_and_layer(
-        self, layer: Layer = _void, table: SpreadSheet = _void
+        self,
+        layer: Layer = _void,
+        table: SpreadSheet = _void,
+        latency: int | None = None,
     ):
-        """Link the layer state and the corresponding spreadsheet."""
+        """
+        Link the layer state and the corresponding spreadsheet.
+
+        If ``latency`` (msec) is positive, events are buffered and the linked
+        side is updated at most once per ``latency``. Defaults to
+        ``link_latency``; use 0 to update the linked side immediately.
+        """
         from ._linker import get_linker
 
+        if latency is None:
+            latency = self.link_latency
+
         if table is _void:
             table = self._table_viewer.current_table
         if layer is _void:
             layer = _get_source(table)
             if layer is None:
                 raise RuntimeError("No layer is available.")
-        linker = get_linker(layer, table)
+        linker = get_linker(layer, table, latency=latency)
+        source: LayerSource = table.metadata[_SOURCE]
+        source.linker = linker
+
+    def link_spreadsheet_and_features(
+        self,
+        layer: LayerWithFeatures = _void,
+        table: SpreadSheet = _void,
+        latency: int | None = None,
+    ):
+        """
+        Link the layer features and the corresponding spreadsheet.
+
+        If the current spreadsheet is not loaded from layer features, the
+        features of the selected layer are loaded as a new spreadsheet.
+        ``latency`` is the same as in ``link_spreadsheet_and_layer``.
+        """
+        from ._linker import FeaturesLinker
+
+        if latency is None:
+            latency = self.link_latency
+
+        if table is _void:
+            table = self._table_viewer.current_table
+        if table is None:
+            return
+        if layer is _void:
+            layer = _get_source(table, choices=get_layers_with_features)
+            if layer is None:
+                layer = _utils.get_layer_by_dialog(
+                    parent=self, choices=get_layers_with_features
+                )
+                if layer is None:
+                    return
+        if (tracker := _get_features_tracker(table, layer)) is None:
+            self.load_layer_features(layer)
+            table = self._table_viewer.current_table
+            tracker = _get_features_tracker(table, layer)
+        linker = FeaturesLinker.prepare(
+            layer, table, latency=latency, sync=not tracker.is_synced(layer)
+        )
         source: LayerSource = table.metadata[_SOURCE]
         source.linker = linker
 
@@ -315,18 +614,25 @@ class MainWidget(QtW.QWidget):
                 "Layers",
                 [
                     ("Layer state -> SpreadSheet", self.layer_to_spreadsheet),  # noqa
+                    ("Layer states -> SpreadSheets", self.layers_to_spreadsheets),  # noqa
+                    ("Layer states -> Concatenated SpreadSheet", self.concat_layers_to_spreadsheet),  # noqa
                     ("Layer features -> SpreadSheet", self.load_layer_features),  # noqa
                     ("Layer text -> SpreadSheet", self.load_layer_text),
                     ("SpreadSheet -> Layer state", self.spreadsheet_to_layer),  # noqa
                     ("SpreadSheet -> Layer features", self.update_layer_features),  # noqa
                     ("SpreadSheet -> Layer text", self.update_layer_text),
+                    ("Shapes vertices -> SpreadSheet", self.shapes_vertices_to_spreadsheet),  # noqa
+                    ("SpreadSheet -> Shapes vertices", self.spreadsheet_to_shapes_vertices),  # noqa
                     ("Link layer state", self.link_spreadsheet_and_layer),
+                    ("Link layer features", self.link_spreadsheet_and_features),  # noqa
                     ("Unlink layer state", self.unlink_spreadsheet_and_layer),
                 ]
             ),
             _utils.create_button(self.popup_current_table, name="Popup"),  # noqa
+            _utils.create_button(self.save_table_data, name="Save"),  # noqa
             _utils.create_button(self.send_table_to_namespace, name="Table to console"),  # noqa
             _utils.create_button(self.open_new_widget, name="New widget"),  # noqa
+            _utils.create_button(self.show_stats_panel, name="Stats"),  # noqa
         ]
         # fmt: on
         for btn in buttons:
@@ -359,3 +665,12 @@ def _get_source(
     if layer_default is not None and layer_default in available_layers:
         return layer_default
     return None
+
+
+def _get_features_tracker(
+    table: SpreadSheet, layer: Layer
+) -> FeaturesTracker | None:
+    layer_source: LayerSource | None = table.metadata.get(_SOURCE, None)
+    if layer_source is None or layer_source.layer is not layer:
+        return None
+    return layer_source.features
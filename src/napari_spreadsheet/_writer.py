@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from ._formats import (
+    EXCEL_SUFFIXES,
+    FEATHER_SUFFIXES,
+    HDF5_SUFFIXES,
+    PARQUET_SUFFIXES,
+    TEXT_SUFFIXES,
+)
+
+if TYPE_CHECKING:  # pragma: no cover
+    import pandas as pd
+
+# key of the table in HDF5 files
+HDF5_KEY = "data"
+
+
+def write_table_data(path: str | Path, df: pd.DataFrame) -> str:
+    """Write a DataFrame to a file, the format is determined by the suffix."""
+    path = Path(path)
+    suffix = path.suffix
+    if suffix in TEXT_SUFFIXES:
+        df.to_csv(path)
+    elif suffix in EXCEL_SUFFIXES:
+        df.to_excel(path)
+    elif suffix in PARQUET_SUFFIXES:
+        df.to_parquet(path)
+    elif suffix in FEATHER_SUFFIXES:
+        # feather does not support custom index
+        if not _is_default_index(df.index):
+            df = df.reset_index()
+        df.to_feather(path)
+    elif suffix in HDF5_SUFFIXES:
+        # "table" format can be read by chunks and by columns
+        df.to_hdf(path, key=HDF5_KEY, mode="w", format="table")
+    else:
+        raise ValueError(f"Extension {suffix!r} not supported.")
+    return str(path)
+
+
+def write_layer_features(
+    path: str, data: Any, meta: dict[str, Any]
+) -> list[str]:
+    """Write the features of a layer to a table file."""
+    import pandas as pd
+
+    features = meta.get("features", None)
+    if features is None:
+        return []
+    return [write_table_data(path, pd.DataFrame(features))]
+
+
+def _is_default_index(index: pd.Index) -> bool:
+    import pandas as pd
+
+    if not isinstance(index, pd.RangeIndex) or index.name is not None:
+        return False
+    return index.start == 0 and index.step == 1